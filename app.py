@@ -2,15 +2,48 @@ import dash
 import dash_bootstrap_components as dbc
 import dash_core_components as dcc
 import dash_html_components as html
-import feedparser
-import pandas as pd
-import plotly.express as px
-from dash.dependencies import Input, Output
+import dash_table
+from dash_table.Format import Format, Group, Scheme, Symbol
+from dash_table import FormatTemplate
+from dash.dependencies import Input, Output, State
 from dash.exceptions import PreventUpdate
-import numpy as np
-from numpy import random
 import datetime
-import joblib
+import flask
+import functools
+import hashlib
+import json
+import os
+import re
+import threading
+from urllib.parse import urlencode
+import zlib
+from offload import heavy
+import layoutcache
+import metrics
+import warmup
+from warmup import lazy_import
+
+# heavy libraries are imported on first use, in fast-boot mode that happens on the warm-up thread
+comparables = lazy_import("comparables")
+cube = lazy_import("cube")
+datamodel = lazy_import("datamodel")
+feedparser = lazy_import("feedparser")
+joblib = lazy_import("joblib")
+np = lazy_import("numpy")
+pagedtable = lazy_import("pagedtable")
+projectgroups = lazy_import("projectgroups")
+pd = lazy_import("pandas")
+px = lazy_import("plotly.express")
+rangeindex = lazy_import("rangeindex")
+regions = lazy_import("regions")
+searchindex = lazy_import("searchindex")
+snapshots = lazy_import("snapshots")
+
+# FAST_BOOT=1: build the layout from precomputed figures (python precompute.py) and load data,
+# model and news in the background, so a worker serves requests right after import
+FAST_BOOT = os.environ.get("FAST_BOOT") == "1"
+PRECOMPUTED_DIR = "resources/precomputed"
+PRECOMPUTED = os.path.join(PRECOMPUTED_DIR, "boot.json")
 
 external_stylesheets = [dbc.themes.FLATLY]
 
@@ -18,45 +51,156 @@ app = dash.Dash(__name__, external_stylesheets=[dbc.themes.FLATLY])  # , externa
 
 server = app.server
 
-#load ML model
-model = joblib.load("resources/model2.joblib")
+# per-callback latency/size histograms on /metrics
+metrics.init_app(app)
+
+# start-up steps, state on /healthz and /readyz
+warm = warmup.Warmup()
+warm.init_app(server)
+
+# the xgboost booster is not guaranteed to be thread safe, predictions are serialized per worker
+model_lock = threading.Lock()
+
+# df, the indexes, map_view, empty_map, model, fig and hist are set once by the warm-up steps and
+# only read afterwards, so callbacks running on several threads can share them without locking
+df = None
+range_index = None
+stage_rows = None
+search_index = None
+comparable_index = None
+stats_cube = None
+listing_table = None
+project_groups = None
+price_history = None
+model = None
+map_view = None
+empty_map = None
+
+
+# columns of resources/projects.csv and units.csv the dashboard uses
+PROJECT_COLUMNS = ['url', 'dev_status', 'Address', 'latitude', 'longitude', 'Wohntyp', 'region', 'Name']
+
+# columns of the search box's index
+SEARCH_COLUMNS = ['Name', 'Address', 'region']
+UNIT_COLUMNS = ['price', 'sqft', 'rooms', 'price-pred', 'diff_from_prediction']
+
+
+def load_data(compact=True):
+    # one row per unit, joined with its project; the hover strings are formatted per figure for the
+    # plotted rows only (datamodel.derive), compact stores strings as categories and measures as float32
+    df = datamodel.join(*datamodel.read('resources', PROJECT_COLUMNS, UNIT_COLUMNS), derived=False)
+    if compact:
+        df = datamodel.compact(df)
+    # completion year and stage parsed from dev_status for the year filter
+    df = pd.concat([df, datamodel.completion(df['dev_status'])], axis=1)
+    df = df[df['price'].notna()]
+    df = df[df['sqft'].notna()]
+
+    # remove invalid points outside Germany
+    df = df.loc[(df['longitude'] <= 15.58) & (df['longitude'] >= 5.58)]
+    df = df.loc[(df['latitude'] <= 55.05) & (df['latitude'] >= 47.25)]
+
+    # create scale for size of markers
+    df_diffq = (df["price"].max() - df["price"].min()) / 16
+    df["scale"] = (df["price"] - df["price"].min()) / df_diffq + 1
+
+    # create EUR per sqm ('sqm' is acutally size in m²)
+    df['Eur/m²'] = round(df['price'] / df['sqft'])
+
+    # remove invalid points with wrong Eur/m²
+    df = df.loc[(df['Eur/m²'] >= 2500) & (df['Eur/m²'] <= 25000)]
+
+    # position of the row, sent with every map point so a click identifies the unit
+    df['row'] = np.arange(len(df), dtype=np.int32)
+
+    return df
+
+
+# range sliders: filtered column, slider bounds, step and marks; a handle at either end of a slider
+# leaves that side open, so listings beyond the slider's scale are never cut off
+RANGE_FILTERS = {
+    'price-range': {'column': 'price', 'min': 0, 'max': 3000000, 'step': 50000,
+                    'marks': {0: '0', 1000000: '1mio', 2000000: '2mio', 3000000: '>3mio'}},
+    'psqm-range': {'column': 'Eur/m²', 'min': 0, 'max': 20000, 'step': 500,
+                   'marks': {0: '0', 5000: '5k', 10000: '10k', 15000: '15k', 20000: '>20k'}},
+    'size-range': {'column': 'sqft', 'min': 0, 'max': 300, 'step': 5,
+                   'marks': {0: '0', 100: '100', 200: '200', 300: '>300'}},
+    'predict-range': {'column': 'diff_from_prediction', 'min': -0.5, 'max': 0.5, 'step': 0.05,
+                      'marks': {-0.5: '<-50%', -0.25: '-25%', 0: '0', 0.25: '25%', 0.5: '>50%'}},
+}
 
-df = pd.read_csv('resources/dashdata.csv', index_col=0)
-df = df[df['price'].notna()]
-df = df[df['sqft'].notna()]
+# the map filters in the argument order of filtered_rows, shared by every callback that follows them
+FILTER_IDS = ['years-slider', 'price-range', 'psqm-range', 'size-range', 'predict-range', 'category-filter',
+              'stage-filter']
+FILTER_INPUTS = [Input(id, 'value') for id in FILTER_IDS]
+FILTER_STATES = [State(id, 'value') for id in FILTER_IDS]
+
+
+# listings tab: columns of the table, sorted and filtered on the server, one page sent at a time
+TABLE_COLUMNS = [
+    {'id': 'Name', 'name': 'Project'},
+    {'id': 'region', 'name': 'Region'},
+    {'id': 'Wohntyp', 'name': 'Type'},
+    {'id': 'dev_status', 'name': 'Status'},
+    {'id': 'price', 'name': 'Price', 'type': 'numeric',
+     'format': Format(precision=0, scheme=Scheme.fixed, group=Group.yes, symbol=Symbol.yes, symbol_suffix=' €')},
+    {'id': 'sqft', 'name': 'm²', 'type': 'numeric', 'format': Format(precision=0, scheme=Scheme.fixed)},
+    {'id': 'rooms', 'name': 'Rooms', 'type': 'numeric'},
+    {'id': 'Eur/m²', 'name': 'Eur/m²', 'type': 'numeric',
+     'format': Format(precision=0, scheme=Scheme.fixed, group=Group.yes)},
+    {'id': 'diff_from_prediction', 'name': 'Deviation', 'type': 'numeric', 'format': FormatTemplate.percentage(0)},
+]
+TABLE_PAGE_SIZE = 15
 
-# remove invalid points outside Germany
-df = df.loc[(df['longitude'] <= 15.58) & (df['longitude'] >= 5.58)]
-df = df.loc[(df['latitude'] <= 55.05) & (df['latitude'] >= 47.25)]
 
-# insert slight variation to longitude/latitude to display units of same adress
+# statistics tab: filters (dimension, label list, placeholder) and group-by choices
+STATS_FILTERS = [('region', 'regions', "All regions"), ('Wohntyp', 'wohntypen', "All building types"),
+                 ('dev_status', 'dev_states', "All states"), ('price_band', 'price_bands', "All prices")]
+STATS_GROUPS = [('region', 'region'), ('Wohntyp', 'building type'), ('dev_status', 'state'),
+                ('price_band', 'price band')]
 
-df['longitude'] = [x + random.choice([i for i in range(-10, 10) if i != 0]) / 1000000 for x in df['longitude']]
-df['latitude'] = [x + random.choice([i for i in range(-10, 10) if i != 0]) / 1000000 for x in df['latitude']]
 
-# create scale for size of markers
-df_diffq = (df["price"].max() - df["price"].min()) / 16
-df["scale"] = (df["price"] - df["price"].min()) / df_diffq + 1
+def range_slider(id):
+    spec = RANGE_FILTERS[id]
+    return dcc.RangeSlider(id=id, min=spec['min'], max=spec['max'], step=spec['step'], marks=spec['marks'],
+                           value=[spec['min'], spec['max']], allowCross=False)
 
-# create EUR per sqm ('sqm' is acutally size in m²)
-df['Eur/m²'] = round(df['price'] / df['sqft'])
 
-# remove invalid points with wrong Eur/m²
-df = df.loc[(df['Eur/m²'] >= 2500) & (df['Eur/m²'] <= 25000)]
+def range_bounds(id, value):
+    # (low, high) of a slider value, None for a handle at the end of the slider
+    spec = RANGE_FILTERS[id]
+    if not value:
+        return None, None
+    low, high = value
+    return (None if low <= spec['min'] else low), (None if high >= spec['max'] else high)
 
 
-# lists for labels
-wohntypen = df['Wohntyp'].unique()
-wohntypendf = pd.DataFrame(wohntypen, columns=['c'])
-wohntypendf = wohntypendf.dropna().sort_values('c')
+def completion_rows(years, stages):
+    # sorted row positions of the checked stages, for scheduled projects only those with a completion
+    # year in `years`; None if nothing is filtered out
+    stages = labels['stages'] if stages is None else stages
+    years = labels['years'] if not years else years
+    if set(stages) >= set(labels['stages']) and list(years) == labels['years']:
+        return None
+    parts = [stage_rows[stage] for stage in stages if stage != datamodel.SCHEDULED]
+    if datamodel.SCHEDULED in stages:
+        parts.append(range_index.columns['completion_year'].rows(*years))
+    # the stages are disjoint, so the parts are too
+    return np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
 
-regions = df['region'].unique()
-regiondf = pd.DataFrame(regions, columns=['c'])
-regiondf = regiondf.dropna().sort_values('c')
 
-dev_states = df['dev_status'].unique()
-dev_statesdf = pd.DataFrame(dev_states, columns=['c'])
-dev_statesdf = dev_statesdf.dropna().sort_values('c')
+# lists for labels
+def label_lists(df):
+    return {
+        'wohntypen': sorted(df['Wohntyp'].dropna().unique()),
+        'regions': sorted(df['region'].dropna().unique()),
+        'dev_states': sorted(df['dev_status'].dropna().unique()),
+        'years': [int(df['completion_year'][df['completion_year'] > 0].min()),
+                  int(df['completion_year'].max())],
+        'stages': list(datamodel.STAGES),
+        'price_bands': list(cube.PRICE_BANDS),
+    }
+
 
 # navbar
 navbar = dbc.NavbarSimple(
@@ -109,36 +253,96 @@ footer = dbc.NavbarSimple(
 )
 
 # interactive map
-fig = px.scatter_mapbox(df, lat="latitude", lon="longitude", color='Eur/m²', hover_name="Name",
-                        size=df['scale'], size_max=13,
-                        hover_data={"url": False, "price": False, "Wohntyp": True,
-                                    "latitude": False, "longitude": False, "scale": False,
-                                    "Price": True, "price-pred": False, "Predicted price": True, "sqft": False,
-                                    "Living space": True, "Eur/m²": True, "Status": True
-                                    },
-                        color_continuous_scale=px.colors.diverging.Portland, zoom=4, mapbox_style='carto-positron',
-                        opacity=1, custom_data=["url"])
-
-fig.update_layout(
-    clickmode='event+select',
-    margin=dict(l=0, r=0, t=0, b=0),
+# fixed viewport (center of Germany) and colour range of the whole data, so filtering never moves
+# the map or rescales the colours; set with the data
+MAP_CENTER = {'lat': 51.13, 'lon': 9.21}
+MAP_ZOOM = 4
+
+
+def map_parameters(df):
+    return {'center': MAP_CENTER, 'zoom': MAP_ZOOM,
+            'range_color': [float(df['Eur/m²'].min()), float(df['Eur/m²'].max())]}
+
+
+# columns of the hover box; hidden columns are still sent per point as customdata, so only those px
+# would show otherwise (position, size), url, row and group (customdata[0], [1] and [2], read by the
+# click callbacks) are listed
+HOVER_DATA = {"url": False, "row": False, "group": False, "latitude": False, "longitude": False, "scale": False,
+              "Wohntyp": True, "Units": True, "Price": True, "Predicted price": True, "Deviation": True,
+              "Living space": True, "Eur/m²": True, "Status": True}
+
+
+# hover strings of the project markers (projectgroups.aggregate): ranges over the units of a location
+def project_hover(points):
+    def span(low, high, template):
+        return template.format(low) if low == high else (template + " – " + template).format(low, high)
+
+    return points.assign(**{
+        'Units': points['units'],
+        'Price': [span(low, high, "€{:,.0f}") for low, high in zip(points['price_min'], points['price_max'])],
+        'Predicted price': [span(low, high, "€{:,.0f}") for low, high in zip(points['pred_min'], points['pred_max'])],
+        'Deviation': ["{:+.0%}".format(diff) for diff in points['diff_from_prediction']],
+        'Living space': [span(low, high, "{:,.0f} m²") for low, high in zip(points['sqft_min'], points['sqft_max'])],
+        'Status': points['dev_status'],
+    })
+
+
+def initial_map(points):
+    points = project_hover(points)
+    fig = px.scatter_mapbox(points, lat="latitude", lon="longitude", color='Eur/m²', hover_name="Name",
+                            size=points['scale'], size_max=13,
+                            hover_data=HOVER_DATA,
+                            color_continuous_scale=px.colors.diverging.Portland,
+                            mapbox_style='carto-positron', opacity=1, custom_data=["url"], **map_view)
+
+    fig.update_layout(
+        clickmode='event+select',
+        margin=dict(l=0, r=0, t=0, b=0),
+
+    )
+    return fig
+
+
+# map of a filter selection, same viewport and colour range as the initial map
+def filtered_map(points):
+    points = project_hover(points)
+    fig = px.scatter_mapbox(points, lat="latitude", lon="longitude", color='Eur/m²', hover_name="Name",
+                            size=points['scale'], size_max=13,
+                            hover_data=HOVER_DATA,
+                            color_continuous_scale=px.colors.diverging.Portland, mapbox_style='carto-positron',
+                            opacity=1, **map_view)
+
+    fig.update_layout(transition_duration=500,
+                      margin=dict(l=0, r=0, t=0, b=0))
+    return fig
+
+
+# price history of a listing, placeholder without plotly so the layout builds without it
+def trajectory_placeholder(text):
+    return {'data': [], 'layout': {'width': 350, 'height': 490, 'xaxis': {'visible': False},
+                                   'yaxis': {'visible': False},
+                                   'annotations': [{'text': text, 'showarrow': False, 'font': {'size': 12}}],
+                                   'paper_bgcolor': 'rgba(1, 91, 150, 0.05)',
+                                   'plot_bgcolor': 'rgba(1, 91, 150, 0.05)'}}
 
-)
 
 # histogram
-hist = px.histogram(df, x="Eur/m²",
-                    title='Histogram of price per m²',
-                    labels={'total_bill': 'total bill'},  # can specify one label per df column
-                    opacity=0.8, width=350, height=490,
-                    # represent bars with log scale
-                    color_discrete_sequence=['indianred']  # color of histogram bars
-                    )
+def initial_histogram(df):
+    hist = px.histogram(df, x="Eur/m²",
+                        title='Histogram of price per m²',
+                        labels={'total_bill': 'total bill'},  # can specify one label per df column
+                        opacity=0.8, width=350, height=490,
+                        # represent bars with log scale
+                        color_discrete_sequence=['indianred']  # color of histogram bars
+                        )
+
+    hist.update_layout(
+        margin=dict(l=10, r=20, t=50, b=10),
+        paper_bgcolor='rgba(1, 91, 150, 0.05)',
+        plot_bgcolor='rgba(1, 91, 150, 0.05)'
+    )
+    return hist
 
-hist.update_layout(
-    margin=dict(l=10, r=20, t=50, b=10),
-    paper_bgcolor='rgba(1, 91, 150, 0.05)',
-    plot_bgcolor='rgba(1, 91, 150, 0.05)'
-)
 
 # news sites, possibility to add more sources
 
@@ -203,9 +407,6 @@ def update_news():
                     ),
 
 
-# slider years
-YEARS = [2020, 2021, 2022, 2023, 2024, 2025]
-
 tabs_styles = {
     'height': '44px',
     'width': '200%',
@@ -219,6 +420,102 @@ tab_style = {
     'background-color': 'rgba(1, 91, 150, 0.05)'
 }
 
+# start-up steps, run in this order on import or on the warm-up thread (FAST_BOOT)
+news = None
+
+
+@warm.step("data")
+def warm_data():
+    global df, range_index, stage_rows, search_index, comparable_index, stats_cube, listing_table, price_history
+    global project_groups, map_view, empty_map
+    df = load_data()
+    range_index = rangeindex.RangeIndex(df, [spec['column'] for spec in RANGE_FILTERS.values()] + ['completion_year'])
+    stage_rows = {stage: np.flatnonzero(df['stage'].values == stage) for stage in datamodel.STAGES}
+    search_index = searchindex.SearchIndex.from_frame(df, SEARCH_COLUMNS)
+    comparable_index = comparables.Comparables(df)
+    stats_cube = cube.Cube.from_frame(df)
+    listing_table = pagedtable.PagedTable(df, [column['id'] for column in TABLE_COLUMNS])
+    # dated snapshots of earlier crawls (python snapshots.py append), read on demand
+    price_history = snapshots.SnapshotStore()
+    # one map marker per location, units of the same building grouped
+    project_groups = projectgroups.ProjectGroups.from_frame(df)
+    map_view = map_parameters(df)
+    # returned as is when no listing matches the filters; px adds no trace for an empty frame, but
+    # plotly.js draws the map and colour bar only for a trace on them
+    empty_map = filtered_map(project_groups.aggregate(df, np.empty(0, dtype=np.int32)))
+    empty_map.add_scattermapbox(lat=[], lon=[], marker={'color': [], 'coloraxis': 'coloraxis'}, showlegend=False)
+    # per worker on /readyz
+    return {'rows': len(df), 'mb': datamodel.memory_report(df)['total_mb']}
+
+
+@warm.step("news")
+def warm_news():
+    global news
+    news = update_news()
+
+
+@warm.step("model")
+def warm_model():
+    global model
+    model = joblib.load("resources/model2.joblib")
+    # postal code/region table behind the model's is_lk feature
+    regions.load()
+
+
+# imports of a module: import x, from x import ..., lazy_import("x")
+IMPORTS = re.compile(r'^\s*(?:import|from)\s+(\w+)|lazy_import\("(\w+)"\)', re.M)
+
+
+def source_files():
+    # this file, precompute.py and every module next to them they import, directly or through each
+    # other (lazy imports included)
+    directory = os.path.dirname(os.path.abspath(__file__))
+    files, todo = [], [os.path.abspath(__file__), os.path.join(directory, 'precompute.py')]
+    while todo:
+        path = todo.pop()
+        if path in files:
+            continue
+        files.append(path)
+        with open(path, encoding='utf-8') as f:
+            for names in IMPORTS.findall(f.read()):
+                todo += [os.path.join(directory, name + '.py') for name in names
+                         if name and os.path.exists(os.path.join(directory, name + '.py'))]
+    return sorted(files)
+
+
+def data_version():
+    # precomputed files depend on the data and on the figure/layout code of this file and its modules
+    sha = hashlib.sha1()
+    for path in ['resources/projects.csv', 'resources/units.csv'] + source_files():
+        with open(path, 'rb') as f:
+            sha.update(f.read())
+    return sha.hexdigest()
+
+
+def load_precomputed():
+    # figures and label lists written by precompute.py, None if missing or built from other data/code
+    try:
+        with open(PRECOMPUTED) as f:
+            boot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if boot.get('data_version') != data_version():
+        return None
+    return boot
+
+
+boot = load_precomputed() if FAST_BOOT else None
+if boot is None:
+    # the layout needs labels and figures from the data
+    warm.run(["data"])
+    labels = label_lists(df)
+    fig = initial_map(project_groups.aggregate(df))
+    hist = initial_histogram(df)
+else:
+    labels, fig, hist = boot['labels'], boot['map'], boot['histogram']
+
+warm.start(background=FAST_BOOT)
+
 # Layout
 app.layout = html.Div([
 
@@ -242,7 +539,7 @@ app.layout = html.Div([
                             dcc.Dropdown(
                                 id='category-filter',
                                 options=[
-                                    {'label': i, 'value': i} for i in np.append('All', wohntypendf['c'].unique())
+                                    {'label': i, 'value': i} for i in ['All'] + labels['wohntypen']
 
                                 ],
                                 multi=False,
@@ -255,21 +552,7 @@ app.layout = html.Div([
                     html.Div(
                         [
                             html.P('Price range in Eur'),
-                            dcc.Dropdown(
-                                id='price-range',
-                                options=[
-                                    {'label': 'All', 'value': 'All'},
-                                    {'label': '0-250k', 'value': '250k'},
-                                    {'label': '250k-500k', 'value': '500k'},
-                                    {'label': '500k-1mio', 'value': '1mio'},
-                                    {'label': '1mio-1.5mio', 'value': '1.5mio'},
-                                    {'label': '1.5-2mio', 'value': '2mio'},
-                                    {'label': '>2mio', 'value': '>2mio'}
-                                ],
-                                value='All',
-                                multi=False,
-                                searchable=True,
-                            )
+                            range_slider('price-range')
                         ],
                         className='col-2',
                         style={'display': 'inline-block'}
@@ -278,17 +561,7 @@ app.layout = html.Div([
                     html.Div(
                         [
                             html.P('Price range in Eur/m²'),
-                            dcc.Dropdown(
-                                id='psqm-range',
-                                options=[
-                                    {'label': 'All', 'value': 'All'},
-                                    {'label': '0-7k', 'value': '7k'},
-                                    {'label': '7k-14k', 'value': '14k'},
-                                    {'label': '>14k', 'value': '>14k'}
-                                ],
-                                multi=False,
-                                value='All'
-                            )
+                            range_slider('psqm-range')
                         ],
                         className='col-2',
                         style={'display': 'inline-block'}
@@ -297,18 +570,7 @@ app.layout = html.Div([
                     html.Div(
                         [
                             html.P('Size range in m²'),
-                            dcc.Dropdown(
-                                id='size-range',
-                                options=[
-                                    {'label': 'All', 'value': 'All'},
-                                    {'label': '0-60m²', 'value': '60'},
-                                    {'label': '60-120m²', 'value': '120'},
-                                    {'label': '120-240m²', 'value': '240'},
-                                    {'label': '>240m²', 'value': '>240'}
-                                ],
-                                multi=False,
-                                value='All'
-                            )
+                            range_slider('size-range')
                         ],
                         className='col-2',
                         style={'display': 'inline-block'}
@@ -317,21 +579,19 @@ app.layout = html.Div([
                     html.Div(
                         [
                             html.P('Deviation from pred. price'),
-                            dcc.Dropdown(
-                                id='predict-range',
-                                options=[
-                                    {'label': 'All', 'value': 'All'},
-                                    {'label': '-20% and less', 'value': '<(20)'},
-                                    {'label': '-20% to -10%', 'value': '(20)'},
-                                    {'label': '-10% to 0%', 'value': '(10)'},
-                                    {'label': '0 to 10%', 'value': '10'},
-                                    {'label': '10% to 20%', 'value': '20'},
-                                    {'label': '20% and more', 'value': '>20'},
+                            range_slider('predict-range'),
+                        ],
+                        className='col-2',
+                        style={'display': 'inline-block'}
+                    ),
 
-                                ],
-                                multi=False,
-                                value='All'
-                            ),
+                    html.Div(
+                        [
+                            html.P('Search'),
+                            # suggestions on every keystroke, the map highlights the matches on enter
+                            dcc.Input(id='search', type='search', placeholder='Project, address or region',
+                                      list='search-suggestions', autoComplete='off', style={'width': '100%'}),
+                            html.Datalist(id='search-suggestions'),
                         ],
                         className='col-2',
                         style={'display': 'inline-block'}
@@ -357,11 +617,12 @@ app.layout = html.Div([
                                 id="slider-text",
                                 children="Year of completion: ",
                             ),
-                            dcc.Slider(
+                            dcc.RangeSlider(
                                 id="years-slider",
-                                min=min(YEARS),
-                                max=max(YEARS),
-                                value=2023,
+                                min=labels['years'][0],
+                                max=labels['years'][1],
+                                value=labels['years'],
+                                allowCross=False,
 
                                 marks={
                                     str(year): {
@@ -369,9 +630,18 @@ app.layout = html.Div([
                                         "style": {"color": "primary"},
 
                                     }
-                                    for year in YEARS
+                                    for year in range(labels['years'][0], labels['years'][1] + 1)
                                 },
                             ),
+                            # stages without a year are not affected by the slider
+                            dcc.Checklist(
+                                id="stage-filter",
+                                options=[{'label': stage, 'value': stage} for stage in labels['stages']],
+                                value=labels['stages'],
+                                labelStyle={'display': 'inline-block', 'margin-right': 15},
+                            ),
+                            html.A("Download the listings shown (CSV)", id="export-link", href="/api/export",
+                                   style={'fontSize': '12px'}),
 
                         ], className='col-11',
                     ),
@@ -392,7 +662,9 @@ app.layout = html.Div([
                                                id="link",
                                                href="https://propvision-herokuapp.com",
                                                target="_blank",
-                                           )],
+                                           ),
+                                               html.Div(id="units", style={'margin-top': 15}),
+                                               html.Div(id="comparables", style={'margin-top': 15})],
                                            style={'fontSize': '12px', 'margin-top': 25})],
 
                         style=tab_style,
@@ -409,7 +681,53 @@ app.layout = html.Div([
 
                     dcc.Tab(
                         label='Newsfeed',
-                        children=[html.Div(id="news", children=update_news())],
+                        children=[html.Div(id="news", children=html.P("Loading headlines ...", className="p-news"))],
+                        style=tab_style,
+                        className='col-2'
+                    ),
+
+                    dcc.Tab(
+                        label='Price history',
+                        children=[dcc.Graph(id="trajectory", figure=trajectory_placeholder(
+                            "Click on a marker to show its price history"))],
+                        style=tab_style,
+                        className='col-2'
+                    ),
+
+                    dcc.Tab(
+                        label='Best deals',
+                        children=[html.Div(id="best-deals", style={'fontSize': '12px', 'margin-top': 25})],
+                        style=tab_style,
+                        className='col-2'
+                    ),
+
+                    dcc.Tab(
+                        label='Listings',
+                        children=[dash_table.DataTable(
+                            id='listings',
+                            columns=TABLE_COLUMNS,
+                            page_action='custom', page_current=0, page_size=TABLE_PAGE_SIZE,
+                            sort_action='custom', sort_mode='single', sort_by=[],
+                            filter_action='custom', filter_query='',
+                            style_table={'overflowX': 'auto'},
+                            style_cell={'fontSize': '12px', 'textAlign': 'left', 'maxWidth': 160,
+                                        'overflow': 'hidden', 'textOverflow': 'ellipsis'},
+                        )],
+                        style=tab_style,
+                        className='col-2'
+                    ),
+
+                    dcc.Tab(
+                        label='Statistics',
+                        children=[html.Div(
+                            [dcc.Dropdown(id='stats-' + dim, placeholder=placeholder, value=None,
+                                          options=[{'label': i, 'value': i} for i in labels[key]])
+                             for dim, key, placeholder in STATS_FILTERS] +
+                            [dcc.Dropdown(id='stats-by', value='price_band', clearable=False,
+                                          options=[{'label': 'by ' + label, 'value': dim}
+                                                   for dim, label in STATS_GROUPS]),
+                             html.Div(id='stats-table', style={'margin-top': 15})],
+                            style={'fontSize': '12px', 'margin-top': 25})],
                         style=tab_style,
                         className='col-2'
                     ),
@@ -433,7 +751,7 @@ app.layout = html.Div([
             ]),
             html.Label(children="Status of development"),
             dcc.Dropdown(id='dev_status-dd', className="prediction-dropdown dash-dropdown",
-                         options=[{'label': i, 'value': i} for i in dev_statesdf['c'].unique()],
+                         options=[{'label': i, 'value': i} for i in labels['dev_states']],
                          multi=False,
                          value='',
                          placeholder="Select development status",
@@ -441,14 +759,14 @@ app.layout = html.Div([
 
             html.Label(children="Living style"),
             dcc.Dropdown(id='wohntyp-dd', className="prediction-dropdown dash-dropdown",
-                         options=[{'label': i, 'value': i} for i in wohntypendf['c'].unique()],
+                         options=[{'label': i, 'value': i} for i in labels['wohntypen']],
                          multi=False,
                          value='',
                          placeholder="Select category",
                          ),
             html.Label(children="Region"),
             dcc.Dropdown(id='region-dd', className="prediction-dropdown dash-dropdown",
-                         options=[{'label': i, 'value': i} for i in regiondf['c'].unique()],
+                         options=[{'label': i, 'value': i} for i in labels['regions']],
                          multi=False,
                          value='',
                          placeholder="Select region",
@@ -475,21 +793,32 @@ app.layout = html.Div([
 
 ])
 
+# the layout only changes with the data: serve it pre-serialized and pre-compressed
+layout_files = layoutcache.read(PRECOMPUTED_DIR) if boot is not None else None
+layoutcache.init_app(app, layout_files or layoutcache.compress(layoutcache.serialize(app.layout), brotli_quality=5),
+                     max_age=int(os.environ.get("LAYOUT_MAX_AGE", 60)))
+
 
 @app.callback(
     Output('histogram', 'figure'),
-    Input('map', 'selectedData'))
-def hist_selected_data(selectedData):
+    [Input('map', 'selectedData')],
+    FILTER_STATES)
+@metrics.instrument
+@heavy
+def hist_selected_data(selectedData, *filters):
+    warm.wait("data")
     if selectedData:
-
-        filtList = []
-        for i in range(len(selectedData['points'])):
-            filtList.append(selectedData['points'][i]['hovertext'])
-
-        filter_df = df[df['Name'].isin(filtList)][['Name', 'Eur/m²']]
-
+        # a marker stands for the units at its location (customdata[2] is its group) that pass the
+        # filters the map was drawn with
+        rows = project_groups.units_of([point['customdata'][2] for point in selectedData['points']
+                                        if 'customdata' in point])
+        selection = filtered_rows(*filters)
+        if selection is not None:
+            rows = np.intersect1d(rows, selection, assume_unique=True)
+        filter_df = df.iloc[rows][['Name', 'Eur/m²']]
     else:
         filter_df = df
+    metrics.mark("filter")
 
     hist = px.histogram(filter_df, x="Eur/m²",
                         title='Distribution of price per m²',
@@ -502,6 +831,7 @@ def hist_selected_data(selectedData):
         paper_bgcolor='rgba(1, 91, 150, 0.05)',
         plot_bgcolor='rgba(1, 91, 150, 0.05)'
     )
+    metrics.mark("figure")
 
     return hist
 
@@ -517,14 +847,13 @@ def hist_selected_data(selectedData):
      Input("region-dd", "value"),
 
      ])
-
+@metrics.instrument
+@heavy
 def update_output(n_clicks, sqft, rooms, devs, wohntyp, region):
     if n_clicks > 0:
+        warm.wait("model")
 
-        if "Landkreis" in region:
-            lk = True
-        else:
-            lk = False
+        lk = regions.load().is_lk(region)
 
         d = {'dev_status': [devs], 'sqft': [sqft], 'rooms': [rooms], 'wohntyp': [wohntyp], 'city': [region],
              'is_lk': [lk]}
@@ -533,7 +862,9 @@ def update_output(n_clicks, sqft, rooms, devs, wohntyp, region):
         try:
             test_data = test_data.astype({"sqft": float, "rooms": float})
 
-            y = model.predict(test_data)
+            with model_lock:
+                y = model.predict(test_data)
+            metrics.mark("predict")
 
             out = "€{:,.2f}".format(y[0])
             return out
@@ -556,6 +887,7 @@ def update_output(n_clicks, sqft, rooms, devs, wohntyp, region):
     Input('reset', 'n_clicks'),
 
 )
+@metrics.instrument
 def reset_input(n_click):
     return 0, "", "", "", "", ""
 
@@ -565,6 +897,7 @@ def reset_input(n_click):
     Output('link', 'children'),
     Output('link', 'href'),
     [Input('map', 'clickData')])
+@metrics.instrument
 def display_click_data(clickData):
     if clickData:
 
@@ -576,144 +909,360 @@ def display_click_data(clickData):
         raise PreventUpdate
 
 
-# callback filter to map
+# units of the clicked location, one marker stands for all of them
 @app.callback(
-    Output('map', 'figure'),
-    [Input('years-slider', 'value'),
-     Input('price-range', 'value'),
-     Input('psqm-range', 'value'),
-     Input('size-range', 'value'),
-     Input('predict-range', 'value'),
-     Input('category-filter', 'value'),
-     ])
-
-def update_figure(selected_year, price, rel_price, size, diff, cat):
-    filtered_df = df[:]
-
-    # sleceted years
-    f = "Fertigstellung "
-    if (selected_year == 2024):
-        filtered_df = filtered_df[filtered_df.dev_status.isin([f + "2020", "Fertiggestellt", f + "2021",
-                                                               f + "2022", f + "2023", f + "2024"])]
-    elif (selected_year == 2023):
-        filtered_df = filtered_df[filtered_df.dev_status.isin([f + "2020", "Fertiggestellt", f + "2021",
-                                                               f + "2022", f + "2023"])]
-    elif (selected_year == 2022):
-        filtered_df = filtered_df[filtered_df.dev_status.isin([f + "2020", "Fertiggestellt", f + "2021",
-                                                               f + "2022"])]
-    elif (selected_year == 2021):
-        filtered_df = filtered_df[filtered_df.dev_status.isin([f + "2020", "Fertiggestellt", f + "2021"])]
-
-    elif (selected_year == 2020):
-        filtered_df = filtered_df[filtered_df.dev_status.isin([f + "2020", "Fertiggestellt"])]
-
-    else:
-        filtered_df = filtered_df
-
-    # filter prices
-    if (price == '250k'):
-        filtered_df = filtered_df[filtered_df['price'] <= 250000]
-
-    if (price == '500k'):
-        filtered_df = filtered_df[(filtered_df['price'] > 250000) & (filtered_df['price'] <= 500000)]
-
-    if (price == '1mio'):
-        filtered_df = filtered_df[(filtered_df['price'] > 500000) & (filtered_df['price'] <= 1000000)]
-
-    if (price == '1.5mio'):
-        filtered_df = filtered_df[(filtered_df['price'] > 1000000) & (filtered_df['price'] <= 1500000)]
-
-    if (price == '2mio'):
-        filtered_df = filtered_df[(filtered_df['price'] > 1500000) & (filtered_df['price'] <= 2000000)]
-
-    if (price == '>2mio'):
-        filtered_df = filtered_df[filtered_df['price'] > 2000000]
-
-    else:
-        filtered_df = filtered_df
-
-    # price per sqm filter
-    if (size == '60'):
-        filtered_df = filtered_df[filtered_df['sqft'] <= 60]
-
-    if (size == '120'):
-        filtered_df = filtered_df[(filtered_df['sqft'] > 60) & (filtered_df['sqft'] <= 120)]
+    Output('units', 'children'),
+    [Input('map', 'clickData')] + FILTER_INPUTS)
+@metrics.instrument
+def show_units(clickData, *filters):
+    if not clickData:
+        raise PreventUpdate
+    warm.wait("data")
+    # the units the marker stands for: those of its location that pass the map filters
+    units = project_groups.units(clickData['points'][0]['customdata'][2])
+    selection = filtered_rows(*filters)
+    if selection is not None:
+        units = np.intersect1d(units, selection, assume_unique=True)
+    if not len(units):
+        return html.P("No units at this location match the filters")
+    units = df.iloc[units]
+
+    header = html.Tr([html.Th(c) for c in ["Unit", "Rooms", "m²", "Price", "Eur/m²", "Δ pred."]])
+    body = [html.Tr([html.Td(html.A(unit['Name'], href=unit['url'], target="_blank")),
+                     html.Td("" if unit['rooms'] != unit['rooms'] else "{:g}".format(unit['rooms'])),
+                     html.Td("{:,.0f}".format(unit['sqft'])),
+                     html.Td("€{:,.0f}".format(unit['price'])),
+                     html.Td("{:,.0f}".format(unit['Eur/m²'])),
+                     html.Td("{:+.0%}".format(unit['diff_from_prediction']))])
+            for _, unit in units.sort_values('price').iterrows()]
+    return [html.P("{} unit{} at this location".format(len(units), "s" if len(units) > 1 else "")),
+            dbc.Table([html.Thead(header), html.Tbody(body)], size='sm')]
+
+
+# comparable listings of the clicked location's first unit
+COMPARABLES = 5
 
-    if (size == '240'):
-        filtered_df = filtered_df[(filtered_df['sqft'] > 120) & (filtered_df['sqft'] <= 240)]
 
-    if (size == '>240'):
-        filtered_df = filtered_df[filtered_df['sqft'] > 240]
+@app.callback(
+    Output('comparables', 'children'),
+    [Input('map', 'clickData')])
+@metrics.instrument
+def show_comparables(clickData):
+    if not clickData:
+        raise PreventUpdate
+    warm.wait("data")
+    row = df.iloc[clickData['points'][0]['customdata'][1]]
+    # the other units of the same listing are the closest, but not comparables
+    positions, _ = comparable_index.query(row['row'], k=COMPARABLES + 8)
+    comps = df.iloc[positions]
+    comps = comps[comps['url'] != row['url']].head(COMPARABLES)
+
+    def delta(value, reference):
+        return "{:+.0%}".format(value / reference - 1)
+
+    header = html.Tr([html.Th(c) for c in ["Comparable", "km", "m²", "Eur/m²", "Price", "Δ"]])
+    body = [html.Tr([html.Td(html.A(comp['Name'], href=comp['url'], target="_blank")),
+                     html.Td("{:.1f}".format(geo_km(row, comp))),
+                     html.Td("{:,.0f}".format(comp['sqft'])),
+                     html.Td("{:,.0f}".format(comp['Eur/m²'])),
+                     html.Td("€{:,.0f}".format(comp['price'])),
+                     html.Td(delta(comp['price'], row['price']))])
+            for _, comp in comps.iterrows()]
+    return [html.P("Comparable listings"), dbc.Table([html.Thead(header), html.Tbody(body)], size='sm')]
+
+
+def geo_km(a, b):
+    # equirectangular distance, exact enough for comparables a few km apart
+    dy = (a['latitude'] - b['latitude']) * 111.32
+    dx = (a['longitude'] - b['longitude']) * 111.32 * np.cos(np.radians(a['latitude']))
+    return float(np.hypot(dx, dy))
+
+
+# price trajectories of the clicked listing's units over the stored snapshots
+@app.callback(
+    Output('trajectory', 'figure'),
+    [Input('map', 'clickData')])
+@metrics.instrument
+def show_trajectory(clickData):
+    if not clickData:
+        raise PreventUpdate
+    warm.wait("data")
+    point = clickData['points'][0]
+    history = price_history.history(point['customdata'][0])
+    if history.empty:
+        return trajectory_placeholder("No price history for this listing yet")
+    history['unit_id'] = history['unit_id'].astype(str)
+    fig = px.line(history, x='date', y='price', color='unit_id', title=point['hovertext'],
+                  labels={'date': '', 'price': 'Price', 'unit_id': 'Unit'}, width=350, height=490)
+    fig.update_traces(mode='lines+markers')
+    fig.update_layout(margin=dict(l=10, r=20, t=50, b=10),
+                      paper_bgcolor='rgba(1, 91, 150, 0.05)',
+                      plot_bgcolor='rgba(1, 91, 150, 0.05)')
+    return fig
 
-    else:
-        filtered_df = filtered_df
 
-    # filter size
-    if (rel_price == '7k'):
-        filtered_df = filtered_df[filtered_df['Eur/m²'] <= 7000]
+# statistics tab and /api/stats: slices of the aggregation cube
+@app.callback(
+    Output('stats-table', 'children'),
+    [Input('stats-' + dim, 'value') for dim, _, _ in STATS_FILTERS] + [Input('stats-by', 'value')])
+@metrics.instrument
+def show_stats(region, wohntyp, dev_status, band, by):
+    warm.wait("data")
+    rows = stats_cube.slice(by, region=region, Wohntyp=wohntyp, dev_status=dev_status, price_band=band)
+    total = stats_cube.cell(region=region, Wohntyp=wohntyp, dev_status=dev_status, price_band=band)
+
+    def cells(label, stats):
+        deviation = stats['mean_deviation']
+        return [html.Td(label), html.Td(stats['count']),
+                html.Td("{:,.0f}".format(stats['median_eur_m2']) if stats['count'] else ""),
+                html.Td("{:+.1%}".format(deviation) if deviation is not None else "")]
+
+    header = html.Tr([html.Th(c) for c in ["", "Listings", "Median Eur/m²", "Deviation"]])
+    body = [html.Tr(cells(row[by], row)) for row in rows] + [html.Tr(cells("Total", total))]
+    return dbc.Table([html.Thead(header), html.Tbody(body)], size='sm')
+
+
+@server.route("/api/stats")
+def stats_api():
+    # ?region=...&Wohntyp=...&dev_status=...&price_band=... for one cell, plus &by=<dimension> for a
+    # row per value of that dimension
+    if not warm.ready("data"):
+        return flask.jsonify(error="data not loaded"), 503
+    fixed = {dim: value for dim, value in flask.request.args.items() if dim != 'by'}
+    by = flask.request.args.get('by')
+    try:
+        if by:
+            return flask.jsonify(filters=fixed, by=by, rows=stats_cube.slice(by, **fixed))
+        return flask.jsonify(filters=fixed, stats=stats_cube.cell(**fixed))
+    except KeyError as e:
+        return flask.jsonify(error=e.args[0], dimensions=cube.DIMENSIONS), 400
+
+
+@server.route("/api/stats/dimensions")
+def stats_dimensions_api():
+    if not warm.ready("data"):
+        return flask.jsonify(error="data not loaded"), 503
+    return flask.jsonify(stats_cube.values)
+
+
+# newsfeed, fetched once per worker by the warm-up
+@app.callback(
+    Output('news', 'children'),
+    Input('news', 'id'))
+@metrics.instrument
+def show_news(_):
+    try:
+        warm.wait("news", timeout=10)
+    except warmup.NotReady:
+        raise PreventUpdate
+    return news
 
-    if (rel_price == '14k'):
-        filtered_df = filtered_df[(filtered_df['Eur/m²'] > 7000) & (filtered_df['Eur/m²'] <= 14000)]
 
-    if (rel_price == '>14k'):
-        filtered_df = filtered_df[filtered_df['Eur/m²'] > 14000]
+# search suggestions, cheap enough for every keystroke
+@app.callback(
+    Output('search-suggestions', 'children'),
+    Input('search', 'value'))
+@metrics.instrument
+def suggest(query):
+    if not query:
+        return []
+    warm.wait("data")
+    return [html.Option(value=completion) for completion in search_index.complete(query)]
+
+
+# highlight the markers with search matches among the filtered rows and zoom to them
+def highlight(fig, points, rows, query):
+    matches = search_index.search(query)
+    if rows is not None:
+        matches = np.intersect1d(matches, rows, assume_unique=True)
+    selected = np.flatnonzero(np.isin(points['group'].values, project_groups.group_of[matches]))
+    if not len(selected):
+        return fig
+    located = points.iloc[selected]
+    extent = max(located['latitude'].max() - located['latitude'].min(),
+                 located['longitude'].max() - located['longitude'].min(), 0.001)
+    fig.update_traces(selectedpoints=selected, unselected={'marker': {'opacity': 0.2}})
+    fig.update_layout(mapbox={'center': {'lat': located['latitude'].mean(), 'lon': located['longitude'].mean()},
+                              'zoom': float(np.clip(np.log2(360 / extent), MAP_ZOOM, 14))})
+    return fig
 
-    else:
-        filtered_df = filtered_df
 
-    # filter price prediction
-    if (diff == '<(20)'):
-        filtered_df = filtered_df[(filtered_df['diff_from_prediction'] < -0.2)]
+# sorted row positions of the listings matching the map filters, None for all of them. A filter
+# change fires the map, the best deals and the table with the same values, so a worker keeps its
+# recent selections (read-only arrays, keyed by the values with lists as tuples)
+def filtered_rows(selected_year, price, rel_price, size, diff, cat, stages):
+    return _filtered_rows(*[tuple(value) if isinstance(value, list) else value
+                            for value in (selected_year, price, rel_price, size, diff, cat, stages)])
 
-    if (diff == '(20)'):
-        filtered_df = filtered_df[
-            (filtered_df['diff_from_prediction'] < -0.1) & (filtered_df['diff_from_prediction'] >= -0.2)]
 
-    if (diff == '(10)'):
-        filtered_df = filtered_df[
-            (filtered_df['diff_from_prediction'] < 0) & (filtered_df['diff_from_prediction'] >= -0.1)]
+@functools.lru_cache(maxsize=32)
+def _filtered_rows(selected_year, price, rel_price, size, diff, cat, stages):
+    # price, Eur/m², size and deviation: row positions from the sorted indexes
+    values = {'price-range': price, 'psqm-range': rel_price, 'size-range': size, 'predict-range': diff}
+    rows = range_index.select({RANGE_FILTERS[id]['column']: range_bounds(id, value) for id, value in values.items()})
 
-    if (diff == '10'):
-        filtered_df = filtered_df[
-            (filtered_df['diff_from_prediction'] > 0) & (filtered_df['diff_from_prediction'] <= 0.1)]
+    # selected years and stages
+    completed = completion_rows(selected_year, stages)
+    if completed is not None:
+        rows = completed if rows is None else np.intersect1d(rows, completed, assume_unique=True)
 
-    if (diff == '20'):
-        filtered_df = filtered_df[
-            (filtered_df['diff_from_prediction'] > 0.1) & (filtered_df['diff_from_prediction'] <= 0.2)]
+    # building category
+    if cat and cat != 'All':
+        if rows is None:
+            rows = np.flatnonzero(df['Wohntyp'].values == cat)
+        else:
+            rows = rows[df['Wohntyp'].values[rows] == cat]
+    if rows is not None:
+        rows.flags.writeable = False
+    return rows
 
-    if (diff == '>20'):
-        filtered_df = filtered_df[(filtered_df['diff_from_prediction'] > 0.2)]
 
+# callback filter to map
+@app.callback(
+    Output('map', 'figure'),
+    FILTER_INPUTS + [Input('search', 'n_submit')],
+    [State('search', 'value')])
+@metrics.instrument
+@heavy
+def update_figure(selected_year, price, rel_price, size, diff, cat, stages, n_submit, query):
+    warm.wait("data")
+    rows = filtered_rows(selected_year, price, rel_price, size, diff, cat, stages)
+
+    metrics.mark("filter")
+    if rows is not None and not len(rows):
+        return empty_map
+
+    # one marker per location with units among the rows
+    points = project_groups.aggregate(df, rows)
+    fig = filtered_map(points)
+    if query:
+        fig = highlight(fig, points, rows, query)
+    metrics.mark("figure")
 
-    else:
-        filtered_df = filtered_df
+    return fig
 
-    # filter building category
 
-    if cat != 'All':
-        filtered_df = filtered_df[filtered_df['Wohntyp'] == cat]
-    else:
-        filtered_df = filtered_df
-
-    filtered_df = filtered_df.append(
-        {'Price': "", 'scale': 0, 'longitude': 9.21, 'latitude': 51.13, 'Name': "This is the center of germany",
-         'Predicted price': "", 'Living space': "", 'Status': "", 'Wohntyp': ""}, ignore_index=True)
-
-    fig = px.scatter_mapbox(filtered_df, lat="latitude", lon="longitude", color='Eur/m²', hover_name="Name",
-                            size=filtered_df['scale'], size_max=13,
-                            hover_data={"url": False, "price": False, "Wohntyp": True,
-                                        "latitude": False, "longitude": False, "scale": False,
-                                        "Price": True, "price-pred": False,
-                                        "Predicted price": True, "sqft": False, "Living space": True,
-                                        "Eur/m²": True, "Status": True
-                                        },
-                            color_continuous_scale=px.colors.diverging.Portland, zoom=4, mapbox_style='carto-positron',
-                            opacity=1)
+# the most underpriced listings on the map: lowest deviation from the predicted price
+BEST_DEALS = 10
 
-    fig.update_layout(transition_duration=500,
-                      margin=dict(l=0, r=0, t=0, b=0))
 
-    return fig
+@app.callback(
+    Output('best-deals', 'children'),
+    FILTER_INPUTS)
+@metrics.instrument
+def show_best_deals(selected_year, price, rel_price, size, diff, cat, stages):
+    warm.wait("data")
+    rows = filtered_rows(selected_year, price, rel_price, size, diff, cat, stages)
+    metrics.mark("filter")
+    # k smallest deviations by partial selection, not a sort of the filtered rows
+    deals = df.iloc[range_index.columns['diff_from_prediction'].smallest(rows, BEST_DEALS)]
+    if deals.empty:
+        return html.P("No listings match the filters")
+
+    header = html.Tr([html.Th(c) for c in ["Listing", "Region", "m²", "Price", "Predicted", "Δ"]])
+    body = [html.Tr([html.Td(html.A(deal['Name'], href=deal['url'], target="_blank")),
+                     html.Td(deal['region']),
+                     html.Td("{:,.0f}".format(deal['sqft'])),
+                     html.Td("€{:,.0f}".format(deal['price'])),
+                     html.Td("€{:,.0f}".format(deal['price-pred'])),
+                     html.Td("{:+.0%}".format(deal['diff_from_prediction']))])
+            for _, deal in deals.iterrows()]
+    return [html.P("Most underpriced listings"), dbc.Table([html.Thead(header), html.Tbody(body)], size='sm')]
+
+
+# one page of the listings on the map, sorted and filtered as in the table's header
+@app.callback(
+    [Output('listings', 'data'),
+     Output('listings', 'page_count')],
+    [Input('listings', 'page_current'),
+     Input('listings', 'page_size'),
+     Input('listings', 'sort_by'),
+     Input('listings', 'filter_query'),
+     ] + FILTER_INPUTS)
+@metrics.instrument
+def update_listings(page, size, sort_by, filter_query, selected_year, price, rel_price, size_range, diff, cat,
+                    stages):
+    warm.wait("data")
+    rows = filtered_rows(selected_year, price, rel_price, size_range, diff, cat, stages)
+    metrics.mark("filter")
+    try:
+        records, total = listing_table.page(rows, sort_by, filter_query, page or 0, size or TABLE_PAGE_SIZE)
+    except ValueError:
+        # a filter the table cannot evaluate (text compared with a number ...) matches nothing
+        return [], 1
+    return records, max(1, -(-total // (size or TABLE_PAGE_SIZE)))
+
+
+# export of the listings the map shows: /api/export?price=low,high&psqm=...&size=...&diff=...&years=...
+# &cat=...&stages=...&stages=...[&compression=gzip], the slider values as in the dashboard
+EXPORT_RANGES = {'years': None, 'price': 'price-range', 'psqm': 'psqm-range', 'size': 'size-range',
+                 'diff': 'predict-range'}
+EXPORT_COLUMNS = ['Name', 'Address', 'region', 'Wohntyp', 'dev_status', 'completion_year', 'price', 'sqft', 'rooms',
+                  'Eur/m²', 'price-pred', 'diff_from_prediction', 'latitude', 'longitude', 'url']
+EXPORT_CHUNK = 5000
+
+
+def export_query(filters):
+    # dashboard filter values -> query string of /api/export
+    query = [(name, ",".join(str(v) for v in filters[name])) for name in EXPORT_RANGES if filters.get(name)]
+    if filters.get('cat') and filters['cat'] != 'All':
+        query.append(('cat', filters['cat']))
+    if filters.get('stages') is not None and set(filters['stages']) != set(labels['stages']):
+        query += [('stages', stage) for stage in filters['stages']] or [('stages', '')]
+    return urlencode(query)
+
+
+def export_chunks(rows, compression=None):
+    # CSV encoded EXPORT_CHUNK rows at a time, so only one chunk of the selection is ever copied
+    encoder = zlib.compressobj(wbits=31) if compression == 'gzip' else None
+    n = len(df) if rows is None else len(rows)
+    for start in range(0, max(n, 1), EXPORT_CHUNK):
+        part = slice(start, start + EXPORT_CHUNK)
+        chunk = df.iloc[part] if rows is None else df.iloc[rows[part]]
+        data = chunk[EXPORT_COLUMNS].to_csv(index=False, header=start == 0).encode('utf-8')
+        yield encoder.compress(data) if encoder else data
+    if encoder:
+        yield encoder.flush()
+
+
+@server.route("/api/export")
+def export_api():
+    if not warm.ready("data"):
+        return flask.jsonify(error="data not loaded"), 503
+    args = flask.request.args
+    compression = args.get('compression')
+    if compression not in (None, 'gzip'):
+        return flask.jsonify(error="unsupported compression: " + compression), 400
+    try:
+        values = {name: [float(v) for v in args[name].split(',')] if name in args else None for name in EXPORT_RANGES}
+        if any(value is not None and len(value) != 2 for value in values.values()):
+            raise ValueError("ranges are low,high")
+    except ValueError as e:
+        return flask.jsonify(error=str(e)), 400
+    stages = [stage for stage in args.getlist('stages') if stage] if 'stages' in args else None
+    unknown = set(stages or []) - set(datamodel.STAGES)
+    if unknown:
+        return flask.jsonify(error="unknown stage(s): " + ", ".join(sorted(unknown)), stages=datamodel.STAGES), 400
+    rows = filtered_rows(values['years'] and [int(v) for v in values['years']], values['price'], values['psqm'],
+                         values['size'], values['diff'], args.get('cat', 'All'), stages)
+
+    # the selection is only row positions, the response is encoded while it is sent
+    name = "listings.csv" + (".gz" if compression else "")
+    return flask.Response(export_chunks(rows, compression),
+                          mimetype='application/gzip' if compression else 'text/csv',
+                          headers={'Content-Disposition': 'attachment; filename=' + name})
+
+
+# download link for the current map filters, no data needed
+@app.callback(
+    Output('export-link', 'href'),
+    FILTER_INPUTS)
+@metrics.instrument
+def update_export_link(selected_year, price, rel_price, size, diff, cat, stages):
+    filters = {'years': selected_year, 'price': price, 'psqm': rel_price, 'size': size, 'diff': diff, 'cat': cat,
+               'stages': stages}
+    query = export_query(filters)
+    return "/api/export" + ("?" + query if query else "")
 
 
 if __name__ == '__main__':
@@ -11,6 +11,7 @@ import numpy as np
 from numpy import random
 import datetime
 import joblib
+import datamodel
 
 external_stylesheets = [
     dbc.themes.FLATLY]  # ,'https://cdn.rawgit.com/plotly/dash-app-stylesheets/2d266c578d2a6e8850ebce48fdb52759b2aef506/stylesheet-oil-and-gas.css', 'https://codepen.io/chriddyp/pen/bWLwgP.css']
@@ -21,7 +22,7 @@ server = app.server
 
 model = joblib.load("resources/model2.joblib")
 
-df = pd.read_csv('resources/dashdata.csv', index_col=0)
+df = datamodel.load('resources')
 df = df[df['price'].notna()]
 df = df[df['sqft'].notna()]
 
@@ -13,6 +13,7 @@ import numpy as np
 from numpy import random
 import datetime
 import joblib
+import datamodel
 
 external_stylesheets = [
     dbc.themes.FLATLY]
@@ -23,7 +24,7 @@ server = app.server
 
 model = joblib.load("resources/model2.joblib")
 
-df = pd.read_csv('resources/dashdata.csv', index_col=0)
+df = datamodel.load('resources')
 df = df[df['price'].notna()]
 df = df[df['sqft'].notna()]
 
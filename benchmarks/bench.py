@@ -0,0 +1,276 @@
+"""Benchmark of the dashboard callbacks through /_dash-update-component.
+
+Runs a traffic mix either in-process (flask test client) or over HTTP against a local gunicorn,
+reports throughput, p50/p95/p99 latency per callback and memory, and stores the result under
+benchmarks/results/<commit>-<mode>-<mix>.json so later runs can be compared against it.
+
+    python -m benchmarks.bench --mode inprocess --mix mixed -n 500
+    python -m benchmarks.bench --mode http --clients 8 --compare <commit>
+"""
+import argparse
+import importlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import payloads
+from benchmarks.loadtest import ROOT, ENDPOINT, free_port, start_gunicorn
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+YEARS = [None, [2015, 2020], [2015, 2022], [2021, 2023], [2022, 2024]]
+STAGES = [None, ['Fertigstellung'], ['Fertiggestellt', 'Fertigstellung'],
+          ['Fertigstellung', 'Bau gestartet', 'geplant']]
+# range slider values, the former dropdown buckets plus the full range
+PRICES = [None, [0, 250000], [250000, 500000], [500000, 1000000], [1000000, 1500000], [1500000, 2000000],
+          [2000000, 3000000]]
+PSQM = [None, [0, 7000], [7000, 14000], [14000, 20000]]
+SIZES = [None, [0, 60], [60, 120], [120, 240], [240, 300]]
+DIFFS = [None, [-0.5, -0.2], [-0.2, -0.1], [-0.1, 0], [0, 0.1], [0.1, 0.2], [0.2, 0.5]]
+
+# share of each request kind per traffic mix
+MIXES = {
+    'filters': {'map': 1.0},
+    'lasso': {'hist': 1.0},
+    'predict': {'predict': 1.0},
+    'mixed': {'map': 0.6, 'hist': 0.25, 'predict': 0.15},
+}
+
+
+class Traffic:
+    # reproducible request bodies drawn from the real dashboard data
+
+    def __init__(self, seed=0):
+        self.rng = np.random.RandomState(seed)
+        data = pd.read_csv(os.path.join(ROOT, 'resources', 'projects.csv'),
+                           usecols=['project_id', 'latitude', 'longitude', 'Wohntyp', 'dev_status', 'region'])
+        # map markers: locations with a priced unit inside the map, close to the dashboard's groups
+        # (a few more, their ids select nothing)
+        units = pd.read_csv(os.path.join(ROOT, 'resources', 'units.csv'), usecols=['project_id', 'price', 'sqft'])
+        located = data[data['project_id'].isin(units.dropna()['project_id']) &
+                       data['longitude'].between(5.58, 15.58) & data['latitude'].between(47.25, 55.05)]
+        self.groups = located.groupby(['latitude', 'longitude']).ngroups
+        self.categories = ['All'] + sorted(data['Wohntyp'].dropna().unique())
+        self.dev_states = sorted(data['dev_status'].dropna().unique())
+        self.regions = sorted(data['region'].dropna().unique())
+
+    def pick(self, values):
+        return values[self.rng.randint(len(values))]
+
+    def map(self):
+        return payloads.map_body(self.pick(YEARS), self.pick(PRICES), self.pick(PSQM), self.pick(SIZES),
+                                 self.pick(DIFFS), self.pick(self.categories), self.pick(STAGES))
+
+    def hist(self):
+        # lasso selections cover anything from a block to a whole city
+        k = int(self.rng.lognormal(3, 1.2)) + 1
+        groups = self.rng.choice(self.groups, size=min(k, self.groups), replace=False)
+        return payloads.lasso_body([int(g) for g in groups])
+
+    def predict(self):
+        return payloads.predict_body(float(self.rng.randint(30, 200)), float(self.rng.randint(1, 6)),
+                                     self.pick(self.dev_states), self.pick(self.categories[1:]),
+                                     self.pick(self.regions))
+
+    def requests(self, mix, n):
+        kinds = list(MIXES[mix])
+        p = [MIXES[mix][k] for k in kinds]
+        return [(kind, payloads.encode(getattr(self, kind)()))
+                for kind in self.rng.choice(kinds, size=n, p=p)]
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def rss_mb(pid):
+    try:
+        with open("/proc/%d/status" % pid) as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def children(pid):
+    try:
+        with open("/proc/%d/task/%d/children" % (pid, pid)) as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def run_inprocess(app, warmup, reqs):
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    module, name = app.split(":")
+    server = getattr(importlib.import_module(module), name)
+
+    client = server.test_client()
+
+    def send(body):
+        r = client.post(ENDPOINT, data=body, content_type="application/json")
+        assert r.status_code in (200, 204), r.status_code
+
+    for _, body in warmup:
+        send(body)
+
+    latencies = []
+    t0 = time.perf_counter()
+    for kind, body in reqs:
+        t = time.perf_counter()
+        send(body)
+        latencies.append((kind, time.perf_counter() - t))
+    wall = time.perf_counter() - t0
+
+    memory = {'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+    return latencies, wall, memory
+
+
+def run_http(app, warmup, reqs, clients, workers, worker_class):
+    proc, base = start_gunicorn(app, worker_class, workers, 8, free_port())
+
+    def send(body):
+        req = urllib.request.Request(base + ENDPOINT, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=120) as r:
+            r.read()
+
+    try:
+        for _, body in warmup:
+            send(body)
+
+        latencies = []
+        lock = threading.Lock()
+        position = iter(range(len(reqs)))
+
+        def client():
+            while True:
+                with lock:
+                    i = next(position, None)
+                if i is None:
+                    return
+                kind, body = reqs[i]
+                t = time.perf_counter()
+                send(body)
+                with lock:
+                    latencies.append((kind, time.perf_counter() - t))
+
+        threads = [threading.Thread(target=client) for _ in range(clients)]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - t0
+
+        worker_rss = [rss_mb(p) for p in children(proc.pid)]
+        memory = {'worker_rss_mb': [m for m in worker_rss if m is not None]}
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    return latencies, wall, memory
+
+
+def summarize(latencies, wall):
+    result = {'requests': len(latencies), 'throughput_rps': len(latencies) / wall, 'callbacks': {}}
+    kinds = sorted(set(k for k, _ in latencies)) + ['all']
+    for kind in kinds:
+        ms = np.array([t for k, t in latencies if kind == 'all' or k == kind]) * 1000
+        result['callbacks'][kind] = {'n': len(ms), 'p50_ms': np.percentile(ms, 50),
+                                     'p95_ms': np.percentile(ms, 95), 'p99_ms': np.percentile(ms, 99)}
+    return result
+
+
+def report(result):
+    print("{} {} mix, {} requests, {:.1f} req/s".format(result['mode'], result['mix'], result['requests'],
+                                                        result['throughput_rps']))
+    for kind, r in result['callbacks'].items():
+        print("  {:<8} n={:<5} p50 {:8.1f} ms  p95 {:8.1f} ms  p99 {:8.1f} ms".format(
+            kind, r['n'], r['p50_ms'], r['p95_ms'], r['p99_ms']))
+    print("  memory  ", result['memory'])
+
+
+def compare(result, baseline, threshold):
+    # returns the list of regressions beyond `threshold` (relative) against the baseline run
+    regressions = []
+    for kind, r in result['callbacks'].items():
+        b = baseline['callbacks'].get(kind)
+        if b is None:
+            continue
+        for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+            change = r[key] / b[key] - 1 if b[key] else 0.0
+            print("  {:<8} {} {:8.1f} -> {:8.1f} ms ({:+.0%})".format(kind, key[:3], b[key], r[key], change))
+            if change > threshold:
+                regressions.append((kind, key, change))
+    change = result['throughput_rps'] / baseline['throughput_rps'] - 1
+    print("  throughput {:.1f} -> {:.1f} req/s ({:+.0%})".format(baseline['throughput_rps'],
+                                                                result['throughput_rps'], change))
+    if -change > threshold:
+        regressions.append(('all', 'throughput_rps', change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default="app:server", help="module:flask server to benchmark")
+    parser.add_argument("--mode", choices=["inprocess", "http"], default="inprocess")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="mixed")
+    parser.add_argument("-n", type=int, default=300, help="measured requests")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--clients", type=int, default=4, help="concurrent clients (http mode)")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--worker-class", default="gthread")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--name", help="result file name, defaults to the current commit")
+    parser.add_argument("--compare", help="result name (commit) to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    reqs = Traffic(args.seed).requests(args.mix, args.warmup + args.n)
+    warmup, reqs = reqs[:args.warmup], reqs[args.warmup:]
+    if args.mode == "inprocess":
+        latencies, wall, memory = run_inprocess(args.app, warmup, reqs)
+    else:
+        latencies, wall, memory = run_http(args.app, warmup, reqs, args.clients, args.workers, args.worker_class)
+
+    result = summarize(latencies, wall)
+    result.update(mode=args.mode, mix=args.mix, commit=git_commit(), memory=memory,
+                  config={k: v for k, v in vars(args).items() if k not in ("name", "compare", "threshold")},
+                  timestamp=time.strftime("%Y-%m-%dT%H:%M:%S"))
+    report(result)
+
+    baseline = None
+    if args.compare:
+        with open(os.path.join(RESULTS_DIR, "{}-{}-{}.json".format(args.compare, args.mode, args.mix))) as f:
+            baseline = json.load(f)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    name = args.name or result['commit']
+    path = os.path.join(RESULTS_DIR, "{}-{}-{}.json".format(name, args.mode, args.mix))
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2)
+    print("saved", os.path.relpath(path, ROOT))
+
+    if baseline is not None:
+        regressions = compare(result, baseline, args.threshold)
+        if regressions:
+            print("regressions above {:.0%}:".format(args.threshold), regressions)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Import-time profile of the dashboard (python -X importtime), normal vs fast boot.
+
+    python precompute.py && python -m benchmarks.importtime
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+from benchmarks.loadtest import ROOT
+
+
+def profile(module, fast_boot):
+    env = dict(os.environ, FAST_BOOT="1" if fast_boot else "0")
+    # the fast-boot warm-up thread would import pandas & co. concurrently and garble the nesting
+    # of the profile, so threads are not started: this measures the time until the worker serves
+    code = "import threading; threading.Thread.start = lambda self: None; import " + module
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env,
+                          stderr=subprocess.PIPE, stdout=subprocess.DEVNULL, universal_newlines=True, check=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), len(name) - len(name.lstrip()), name.strip()))
+
+    # -X importtime lists a module after everything it imported, indented one level deeper
+    k = max(i for i, r in enumerate(rows) if r[3] == module)
+    total, self_us, depth, _ = rows[k]
+    children = []
+    for cumulative, _, d, name in reversed(rows[:k]):
+        if d <= depth:
+            break
+        if d == depth + 2:
+            children.append((cumulative, name))
+    return total, self_us, sorted(children, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--top", type=int, default=12)
+    args = parser.parse_args()
+
+    for fast_boot in (False, True):
+        total, self_us, children = profile(args.module, fast_boot)
+        print("FAST_BOOT={}: import {} took {:.0f} ms".format(int(fast_boot), args.module, total / 1000))
+        for cumulative, name in children[:args.top]:
+            print("  {:8.0f} ms  {}".format(cumulative / 1000, name))
+        print("  {:8.0f} ms  {} itself (data, figures, model, news)".format(self_us / 1000, args.module))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Latency of cheap callbacks while the map callback is saturated.
+
+Starts gunicorn once per worker class, measures the cheap callbacks (display_click_data,
+reset_input) on an idle server and again while several clients hammer update_figure.
+
+    python -m benchmarks.loadtest --worker-class sync gthread
+"""
+import argparse
+import os
+import shutil
+import socket
+import subprocess
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+from benchmarks import payloads
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINT = "/_dash-update-component"
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(app, worker_class, workers, threads, port):
+    cmd = [shutil.which("gunicorn"), "-c", "gunicorn.conf.py", "--bind", "127.0.0.1:%d" % port,
+           "--worker-class", worker_class, "--workers", str(workers), app]
+    if worker_class == "gthread":
+        cmd += ["--threads", str(threads)]
+    proc = subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = "http://127.0.0.1:%d" % port
+
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("gunicorn exited with code %d" % proc.returncode)
+        try:
+            urllib.request.urlopen(base + "/_dash-layout", timeout=5).read()
+            return proc, base
+        except OSError:
+            time.sleep(0.5)
+    proc.kill()
+    raise RuntimeError("gunicorn did not come up")
+
+
+def post(base, body):
+    req = urllib.request.Request(base + ENDPOINT, data=body, headers={"Content-Type": "application/json"})
+    t = time.perf_counter()
+    with urllib.request.urlopen(req, timeout=120) as r:
+        r.read()
+    return time.perf_counter() - t
+
+
+def cheap_latencies(base, n):
+    bodies = [payloads.encode(payloads.click_body()), payloads.encode(payloads.reset_body())]
+    out = []
+    for i in range(n):
+        out.append(post(base, bodies[i % 2]))
+        time.sleep(0.02)
+    return np.array(out) * 1000
+
+
+def saturate(base, stop, clients):
+    # cycle through filter combinations so every request really rebuilds the figure
+    bodies = [payloads.encode(payloads.map_body(years=[2015, y], cat=c))
+              for y in [2020, 2021, 2022, 2023, 2024] for c in ['All', 'Eigentumswohnung']]
+
+    def loop(k):
+        i = k
+        while not stop.is_set():
+            post(base, bodies[i % len(bodies)])
+            i += 1
+
+    threads = [threading.Thread(target=loop, args=(k,), daemon=True) for k in range(clients)]
+    for t in threads:
+        t.start()
+    return threads
+
+
+def run(app, worker_class, workers, threads, clients, n):
+    proc, base = start_gunicorn(app, worker_class, workers, threads, free_port())
+    try:
+        cheap_latencies(base, 10)  # warm up
+        idle = cheap_latencies(base, n)
+
+        stop = threading.Event()
+        loaders = saturate(base, stop, clients)
+        time.sleep(2)
+        loaded = cheap_latencies(base, n)
+        stop.set()
+        for t in loaders:
+            t.join()
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    for label, lat in [("idle", idle), ("map saturated", loaded)]:
+        print("{:<8} {:<14} p50 {:8.1f} ms   p99 {:8.1f} ms".format(
+            worker_class, label, np.percentile(lat, 50), np.percentile(lat, 99)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default="app:server")
+    parser.add_argument("--worker-class", nargs="+", default=["sync", "gthread"])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--clients", type=int, default=6, help="concurrent map update clients")
+    parser.add_argument("-n", type=int, default=200, help="cheap requests per phase")
+    args = parser.parse_args()
+
+    for wc in args.worker_class:
+        run(args.app, wc, args.workers, args.threads, args.clients, args.n)
+
+
+if __name__ == "__main__":
+    main()
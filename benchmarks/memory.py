@@ -0,0 +1,97 @@
+"""Memory of the dashboard frame per worker: the flat dashdata.csv frame vs the compact one.
+
+    python precompute.py && python -m benchmarks.memory
+
+Before is the frame the app held before projects and units were split: dashdata.csv (rebuilt from
+resources/ with datamodel.load, one row per unit with the formatted display columns) read and
+filtered as app.py did. After is app.load_data(). Every variant is loaded in a fresh interpreter,
+like a gunicorn worker, and reported as the frame's own size per column and the growth of the
+process RSS while loading it.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.loadtest import ROOT
+
+# the warm-up thread is not started, so the worker holds nothing but what the variant loads
+CHILD = """
+import json, os, threading
+threading.Thread.start = lambda self: None
+os.environ["FAST_BOOT"] = "1"
+import app
+from benchmarks.bench import rss_mb
+app.np.zeros(1), app.pd.DataFrame
+rss = rss_mb(os.getpid())
+{load}
+report = app.datamodel.memory_report(df)
+report['rss_growth_mb'] = round(rss_mb(os.getpid()) - rss, 1)
+report['rss_mb'] = round(rss_mb(os.getpid()), 1)
+print(json.dumps(report))
+"""
+
+COMPACT = "df = app.load_data()"
+
+# the row filters of app.py on the flat dashdata.csv (the coordinate jitter does not change the size)
+FLAT = """
+pd = app.pd
+df = pd.read_csv({path!r}, index_col=0)
+df = df[df['price'].notna()]
+df = df[df['sqft'].notna()]
+df = df.loc[(df['longitude'] <= 15.58) & (df['longitude'] >= 5.58)]
+df = df.loc[(df['latitude'] <= 55.05) & (df['latitude'] >= 47.25)]
+df_diffq = (df["price"].max() - df["price"].min()) / 16
+df["scale"] = (df["price"] - df["price"].min()) / df_diffq + 1
+df['Eur/m²'] = round(df['price'] / df['sqft'])
+df = df.loc[(df['Eur/m²'] >= 2500) & (df['Eur/m²'] <= 25000)]
+"""
+
+
+def write_flat(path):
+    # dashdata.csv as 04_machine_learning wrote it: the joined table with its display columns
+    sys.path.insert(0, ROOT)
+    import datamodel
+    datamodel.load(os.path.join(ROOT, 'resources')).to_csv(path)
+
+
+def measure(load):
+    proc = subprocess.run([sys.executable, "-c", CHILD.format(load=load)], cwd=ROOT,
+                          stdout=subprocess.PIPE, universal_newlines=True, check=True)
+    return json.loads(proc.stdout.splitlines()[-1])
+
+
+def dtype(report, column):
+    # '-': the column is not in that frame
+    return report['dtypes'].get(column, '' if column in report['columns'] else '-')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--json", action="store_true", help="print the raw reports")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'dashdata.csv')
+        write_flat(path)
+        before = measure(FLAT.format(path=path))
+    after = measure(COMPACT)
+    if args.json:
+        print(json.dumps({'before': before, 'after': after}, indent=2))
+        return
+
+    print("{:24} {:>18} {:>18}".format("column", "before MB", "after MB"))
+    columns = list(before['columns']) + [c for c in after['columns'] if c not in before['columns']]
+    for column in columns:
+        print("{:24} {:>8.3f} {:>9} {:>8.3f} {:>9}".format(
+            column, before['columns'].get(column, 0), dtype(before, column),
+            after['columns'].get(column, 0), dtype(after, column)))
+    print("{:24} {:>8.3f} {:>9} {:>8.3f}".format("total", before['total_mb'], "", after['total_mb']))
+    print("worker RSS growth while loading: {} MB -> {} MB (RSS {} MB -> {} MB)".format(
+        before['rss_growth_mb'], after['rss_growth_mb'], before['rss_mb'], after['rss_mb']))
+
+
+if __name__ == "__main__":
+    main()
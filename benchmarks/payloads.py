@@ -0,0 +1,81 @@
+import json
+
+# request bodies for dash's /_dash-update-component endpoint (dash 1.x wire format)
+
+MAP_INPUTS = [('years-slider', 'value'), ('price-range', 'value'), ('psqm-range', 'value'),
+              ('size-range', 'value'), ('predict-range', 'value'), ('category-filter', 'value'),
+              ('stage-filter', 'value'), ('search', 'n_submit')]
+
+MAP_STATE = [('search', 'value')]
+
+PREDICT_INPUTS = [('submit-val', 'n_clicks'), ('sqft', 'value'), ('rooms', 'value'),
+                  ('dev_status-dd', 'value'), ('wohntyp-dd', 'value'), ('region-dd', 'value')]
+
+RESET_OUTPUTS = [('submit-val', 'n_clicks'), ('sqft', 'value'), ('dev_status-dd', 'value'),
+                 ('rooms', 'value'), ('wohntyp-dd', 'value'), ('region-dd', 'value')]
+
+
+def callback_body(outputs, inputs, values, changed=None, state=(), state_values=()):
+    # outputs: list of (id, property), a single output is sent unwrapped like the renderer does
+    if len(outputs) == 1:
+        output = "{}.{}".format(*outputs[0])
+        outputs_spec = {'id': outputs[0][0], 'property': outputs[0][1]}
+    else:
+        output = ".." + "...".join("{}.{}".format(*o) for o in outputs) + ".."
+        outputs_spec = [{'id': i, 'property': p} for i, p in outputs]
+
+    inputs_spec = [{'id': i, 'property': p, 'value': v} for (i, p), v in zip(inputs, values)]
+    if changed is None:
+        changed = ["{}.{}".format(*inputs[0])]
+
+    state_spec = [{'id': i, 'property': p, 'value': v} for (i, p), v in zip(state, state_values)]
+    return {'output': output, 'outputs': outputs_spec, 'inputs': inputs_spec,
+            'changedPropIds': changed, 'state': state_spec}
+
+
+def map_body(years=None, price=None, psqm=None, size=None, diff=None, cat='All', stages=None, query=None):
+    # range slider values are [low, high], None for an untouched slider or checklist
+    return callback_body([('map', 'figure')], MAP_INPUTS, [years, price, psqm, size, diff, cat, stages,
+                                                           1 if query else None], state=MAP_STATE, state_values=[query])
+
+
+def search_body(query):
+    return callback_body([('search-suggestions', 'children')], [('search', 'value')], [query])
+
+
+def lasso_body(groups, filters=(None, None, None, None, None, 'All', None),
+               url="https://www.neubaukompass.de/neubau/54-east-berlin/"):
+    # the selected markers are location groups, sent with the map filters they were drawn with
+    selected = {'points': [{'hovertext': "", 'customdata': [url, 0, group]} for group in groups]}
+    return callback_body([('histogram', 'figure')], [('map', 'selectedData')], [selected],
+                         state=MAP_INPUTS[:7], state_values=list(filters))
+
+
+def predict_body(sqft, rooms, dev_status, wohntyp, region, n_clicks=1):
+    return callback_body([('container-button-basic', 'children')], PREDICT_INPUTS,
+                         [n_clicks, sqft, rooms, dev_status, wohntyp, region])
+
+
+# a marker's customdata: url and row of its first unit, its location group
+def click_body(name="54 East Berlin ", url="https://www.neubaukompass.de/neubau/54-east-berlin/", row=0, group=0):
+    click = {'points': [{'hovertext': name, 'customdata': [url, row, group]}]}
+    return callback_body([('link', 'children'), ('link', 'href')], [('map', 'clickData')], [click])
+
+
+def comparables_body(row=0, url="https://www.neubaukompass.de/neubau/54-east-berlin/", group=0):
+    click = {'points': [{'hovertext': "", 'customdata': [url, row, group]}]}
+    return callback_body([('comparables', 'children')], [('map', 'clickData')], [click])
+
+
+def units_body(group=0, row=0, url="https://www.neubaukompass.de/neubau/54-east-berlin/",
+               filters=(None, None, None, None, None, 'All', None)):
+    click = {'points': [{'hovertext': "", 'customdata': [url, row, group]}]}
+    return callback_body([('units', 'children')], [('map', 'clickData')] + MAP_INPUTS[:7], [click] + list(filters))
+
+
+def reset_body(n_clicks=1):
+    return callback_body(RESET_OUTPUTS, [('reset', 'n_clicks')], [n_clicks])
+
+
+def encode(body):
+    return json.dumps(body).encode('utf-8')
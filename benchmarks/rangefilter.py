@@ -0,0 +1,90 @@
+"""Range filtering at scale: sorted indexes (rangeindex.py) vs boolean masks over the whole frame.
+
+    python -m benchmarks.rangefilter --rows 1000000
+
+Synthetic listings with the value distributions of the dashboard data; random slider ranges over
+one to four columns, both methods checked to select the same rows.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from rangeindex import RangeIndex
+
+
+def listings(n, rng):
+    price = np.round(rng.lognormal(13.1, 0.6, n), -3)
+    sqft = np.clip(rng.normal(93, 43, n), 18, 450)
+    return pd.DataFrame({'price': price.astype('float32'), 'sqft': sqft.astype('float32'),
+                         'Eur/m²': np.round(price / sqft).astype('float32'),
+                         'diff_from_prediction': rng.normal(-0.05, 0.27, n).astype('float32')})
+
+
+def random_ranges(frame, rng):
+    columns = rng.choice(frame.columns, size=rng.randint(1, 5), replace=False)
+    ranges = {}
+    for column in columns:
+        # bounds representable in float32, where numpy's masks and the exact index comparisons agree
+        low, high = np.sort(np.quantile(frame[column].values[:10000], rng.uniform(0, 1, 2))).astype('float32')
+        ranges[column] = (None if rng.rand() < 0.2 else low, None if rng.rand() < 0.2 else high)
+    return ranges
+
+
+def masks(frame, ranges):
+    mask = np.ones(len(frame), dtype=bool)
+    for column, (low, high) in ranges.items():
+        values = frame[column].values
+        if low is not None:
+            mask &= values >= low
+        if high is not None:
+            mask &= values <= high
+    return np.flatnonzero(mask)
+
+
+def percentiles(seconds):
+    return "p50 {:.3f} ms  p99 {:.3f} ms".format(*(np.percentile(seconds, [50, 99]) * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("-n", type=int, default=200, help="number of queries")
+    args = parser.parse_args()
+
+    rng = np.random.RandomState(0)
+    frame = listings(args.rows, rng)
+    t = time.perf_counter()
+    index = RangeIndex(frame, frame.columns)
+    built = time.perf_counter() - t
+    size = sum(c.order.nbytes + c.sorted.nbytes + c.codes.nbytes for c in index.columns.values())
+    print("{} rows, index built in {:.0f} ms, {:.1f} MB".format(args.rows, built * 1000, size / 2 ** 20))
+
+    indexed, masked, sizes = [], [], []
+    for _ in range(args.n):
+        ranges = random_ranges(frame, rng)
+        t = time.perf_counter()
+        rows = index.select(ranges)
+        indexed.append(time.perf_counter() - t)
+        t = time.perf_counter()
+        expected = masks(frame, ranges)
+        masked.append(time.perf_counter() - t)
+        if rows is None:
+            rows = np.arange(len(frame))
+        assert np.array_equal(rows, expected), ranges
+        sizes.append(len(rows))
+
+    sizes = np.array(sizes)
+    indexed, masked = np.array(indexed), np.array(masked)
+    print("sorted index  ", percentiles(indexed))
+    print("boolean masks ", percentiles(masked))
+    selective = sizes <= args.rows // 100
+    if selective.any():
+        print("results of at most 1% of the rows ({} queries):".format(selective.sum()))
+        print("  sorted index  ", percentiles(indexed[selective]))
+        print("  boolean masks ", percentiles(masked[selective]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Offline region assignment from coordinates: point-in-polygon against administrative boundaries.
+
+    index = BoundaryIndex.from_geojson('resources/kreise.geojson', key='AGS')
+    codes = index.assign(df['latitude'], df['longitude'])
+
+The polygons (e.g. the BKG VG250 Kreise, converted to WGS84 GeoJSON) are indexed on a regular
+grid. Points in grid cells that no boundary crosses get the cell's region by lookup; the others
+are tested with the crossing number rule, vectorized over all points of a grid row against the
+boundary edges of that row.
+"""
+import json
+
+import numpy as np
+
+OUTSIDE = -1
+MIXED = -2
+
+
+class BoundaryIndex:
+
+    def __init__(self, keys, rings, cell=0.05, chunk=4096):
+        # keys: one per feature; rings: per feature a list of (n, 2) lon/lat arrays (outer rings and
+        # holes alike, even-odd rule)
+        self.keys = np.array(list(keys) + [None], dtype=object)  # keys[OUTSIDE] is None
+        self.cell = cell
+        self.chunk = chunk
+
+        x1, y1, x2, y2, fid = [], [], [], [], []
+        for f, feature_rings in enumerate(rings):
+            for ring in feature_rings:
+                ring = np.asarray(ring, dtype=float)
+                a, b = ring, np.roll(ring, -1, axis=0)
+                x1.append(a[:, 0]), y1.append(a[:, 1]), x2.append(b[:, 0]), y2.append(b[:, 1])
+                fid.append(np.full(len(ring), f))
+        x1, y1, x2, y2, fid = map(np.concatenate, (x1, y1, x2, y2, fid))
+
+        self.x0 = min(x1.min(), x2.min())
+        self.y0 = min(y1.min(), y2.min())
+        self.nx = int(np.ceil((max(x1.max(), x2.max()) - self.x0) / cell)) + 1
+        self.ny = int(np.ceil((max(y1.max(), y2.max()) - self.y0) / cell)) + 1
+
+        # cells no edge passes through belong to a single region (or none)
+        lo, hi = self._row(np.minimum(y1, y2)), self._row(np.maximum(y1, y2))
+        col_lo, col_hi = self._col(np.minimum(x1, x2)), self._col(np.maximum(x1, x2))
+        touched = _cover(self.ny, self.nx, lo, hi, col_lo, col_hi)
+
+        # edges bucketed by grid row, inside a row sorted by feature for the per-feature parity;
+        # horizontal edges never cross a horizontal ray
+        keep = y1 != y2
+        x1, y1, x2, y2, fid, lo, hi = x1[keep], y1[keep], x2[keep], y2[keep], fid[keep], lo[keep], hi[keep]
+        edge, row = _expand(lo, hi)
+        order = np.lexsort((fid[edge], row))
+        edge, row = edge[order], row[order]
+        self.ex1, self.ey1, self.ex2, self.ey2, self.efid = x1[edge], y1[edge], x2[edge], y2[edge], fid[edge]
+        self.row_start = np.searchsorted(row, np.arange(self.ny + 1))
+
+        self.cells = np.full((self.ny, self.nx), MIXED, dtype=np.int64)
+        rows, cols = np.nonzero(~touched)
+        self.cells[rows, cols] = self._crossing(self.x0 + (cols + 0.5) * cell, self.y0 + (rows + 0.5) * cell, rows)
+
+    @classmethod
+    def from_geojson(cls, path, key, **kwargs):
+        with open(path, encoding='utf-8') as f:
+            collection = json.load(f)
+        keys, rings = [], []
+        for feature in collection['features']:
+            geometry = feature['geometry']
+            polygons = [geometry['coordinates']] if geometry['type'] == 'Polygon' else geometry['coordinates']
+            keys.append(feature['properties'][key])
+            rings.append([np.asarray(ring, dtype=float)[:, :2] for polygon in polygons for ring in polygon])
+        return cls(keys, rings, **kwargs)
+
+    def _row(self, y):
+        return np.floor((y - self.y0) / self.cell).astype(np.int64)
+
+    def _col(self, x):
+        return np.floor((x - self.x0) / self.cell).astype(np.int64)
+
+    def _crossing(self, px, py, rows):
+        # feature id containing each point (OUTSIDE if none), points of one grid row at a time
+        result = np.full(len(px), OUTSIDE, dtype=np.int64)
+        order = np.argsort(rows, kind='stable')
+        bounds = np.searchsorted(rows[order], np.arange(self.ny + 1))
+        for r in np.unique(rows):
+            s, e = self.row_start[r], self.row_start[r + 1]
+            if s == e:
+                continue
+            x1, y1, x2, y2, fid = self.ex1[s:e], self.ey1[s:e], self.ex2[s:e], self.ey2[s:e], self.efid[s:e]
+            starts = np.flatnonzero(np.r_[True, fid[1:] != fid[:-1]])
+            slope = (x2 - x1) / (y2 - y1)
+            members = order[bounds[r]:bounds[r + 1]]
+            for c in range(0, len(members), self.chunk):
+                idx = members[c:c + self.chunk]
+                x, y = px[idx, None], py[idx, None]
+                crosses = ((y1 > y) != (y2 > y)) & (x < x1 + (y - y1) * slope)
+                inside = np.add.reduceat(crosses, starts, axis=1) % 2 == 1
+                hit = inside.any(axis=1)
+                result[idx[hit]] = fid[starts[inside[hit].argmax(axis=1)]]
+        return result
+
+    def assign(self, latitude, longitude):
+        # key of the region containing each point, None outside all regions or for missing coordinates
+        py = np.asarray(latitude, dtype=float)
+        px = np.asarray(longitude, dtype=float)
+        result = np.full(len(px), OUTSIDE, dtype=np.int64)
+
+        rows, cols = self._row(np.nan_to_num(py, nan=-1e9)), self._col(np.nan_to_num(px, nan=-1e9))
+        valid = (rows >= 0) & (rows < self.ny) & (cols >= 0) & (cols < self.nx)
+        result[valid] = self.cells[rows[valid], cols[valid]]
+
+        mixed = np.flatnonzero(result == MIXED)
+        result[mixed] = self._crossing(px[mixed], py[mixed], rows[mixed])
+        return self.keys[result]
+
+
+def _expand(lo, hi):
+    # (i, j) for every i and every j in lo[i]..hi[i]
+    counts = hi - lo + 1
+    i = np.repeat(np.arange(len(lo)), counts)
+    j = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + lo[i]
+    return i, j
+
+
+def _cover(ny, nx, lo, hi, col_lo, col_hi):
+    # mask of the cells inside any of the rectangles rows lo..hi x columns col_lo..col_hi: +1/-1 at the
+    # corners of every rectangle, summed up along both axes
+    corners = np.zeros((ny + 1, nx + 1), dtype=np.int64)
+    np.add.at(corners, (lo, col_lo), 1)
+    np.add.at(corners, (lo, col_hi + 1), -1)
+    np.add.at(corners, (hi + 1, col_lo), -1)
+    np.add.at(corners, (hi + 1, col_hi + 1), 1)
+    return corners.cumsum(axis=0).cumsum(axis=1)[:ny, :nx] > 0
@@ -0,0 +1,69 @@
+"""Comparable listings: k nearest neighbours by location, size, rooms, building type and Eur/m².
+
+    comps = Comparables(df)
+    positions, distances = comps.query(position, k=5)
+
+Listings are points in a scaled feature space (kilometres for the location, standard deviations
+for the measures, one-hot building type) indexed by a KD-tree once per worker. add() appends new
+listings to a small buffer that is searched by brute force next to the tree and merged into a
+rebuilt tree once it outgrows a fraction of it.
+"""
+import numpy as np
+from sklearn.neighbors import KDTree
+
+# weight of each feature after scaling: the location in units of 5 km, the measures in standard
+# deviations, a different building type counts like 2 standard deviations
+LOCATION_KM = 5.0
+MEASURES = {'sqft': 1.0, 'rooms': 0.5, 'Eur/m²': 1.0}
+TYPE_WEIGHT = 2.0
+
+
+class Comparables:
+
+    def __init__(self, frame, rebuild_fraction=0.1, leaf_size=40):
+        self.rebuild_fraction = rebuild_fraction
+        self.leaf_size = leaf_size
+        # the scale is fixed by the first frame, so added listings land in the same space
+        self.km_per_lon = 111.32 * np.cos(np.radians(frame['latitude'].mean()))
+        self.means = {c: float(frame[c].mean()) for c in MEASURES}
+        self.stds = {c: float(frame[c].std()) or 1.0 for c in MEASURES}
+        self.types = sorted(frame['Wohntyp'].dropna().unique())
+
+        self._points = self.features(frame)
+        self._tree = KDTree(self._points, leaf_size=leaf_size)
+        self._indexed = len(self._points)  # points [0, _indexed) are in the tree, the rest in the buffer
+
+    def features(self, frame):
+        location = np.column_stack([frame['latitude'].values * 111.32, frame['longitude'].values * self.km_per_lon])
+        columns = [location / LOCATION_KM]
+        for column, weight in MEASURES.items():
+            # a missing measure (e.g. rooms) counts as average
+            values = (frame[column].values.astype(float) - self.means[column]) / self.stds[column]
+            columns.append(np.nan_to_num(values)[:, None] * weight)
+        wohntyp = frame['Wohntyp'].astype(object).values
+        columns.append(np.column_stack([wohntyp == t for t in self.types]) * (TYPE_WEIGHT / np.sqrt(2)))
+        return np.hstack(columns)
+
+    def __len__(self):
+        return len(self._points)
+
+    def add(self, frame):
+        # new listings get the next positions
+        self._points = np.vstack([self._points, self.features(frame)])
+        if len(self._points) - self._indexed > self.rebuild_fraction * self._indexed:
+            self._tree = KDTree(self._points, leaf_size=self.leaf_size)
+            self._indexed = len(self._points)
+
+    def query(self, position, k=5):
+        """Positions and feature-space distances of the k listings closest to the one at `position`."""
+        point = self._points[position][None, :]
+        distances, positions = self._tree.query(point, k=min(k + 1, self._indexed))
+        distances, positions = distances[0], positions[0]
+        if len(self._points) > self._indexed:
+            buffer = np.sqrt(((self._points[self._indexed:] - point) ** 2).sum(axis=1))
+            distances = np.concatenate([distances, buffer])
+            positions = np.concatenate([positions, np.arange(self._indexed, len(self._points))])
+            order = np.argsort(distances, kind='stable')
+            distances, positions = distances[order], positions[order]
+        keep = positions != position
+        return positions[keep][:k], distances[keep][:k]
@@ -0,0 +1,83 @@
+"""Aggregation cube: listing count, median Eur/m² and mean deviation from the predicted price for
+every combination of region, building type, status and price band.
+
+    stats = Cube.from_frame(df)
+    stats.cell(region='Berlin', Wohntyp='Etagenwohnung')   # the other dimensions rolled up
+    stats.slice('price_band', region='Berlin')            # one row per price band
+
+Medians do not roll up from finer groups, so every subset of the dimensions (16 group-bys over
+the categorical codes) is aggregated once when the data is loaded; a cell is then a dict lookup.
+"""
+import itertools
+
+import numpy as np
+import pandas as pd
+
+DIMENSIONS = ['region', 'Wohntyp', 'dev_status', 'price_band']
+
+# price bands of the former price dropdown
+PRICE_EDGES = [0, 250000, 500000, 1000000, 1500000, 2000000, np.inf]
+PRICE_BANDS = ['0-250k', '250k-500k', '500k-1mio', '1mio-1.5mio', '1.5-2mio', '>2mio']
+
+
+def price_band(price):
+    return pd.cut(price, PRICE_EDGES, labels=PRICE_BANDS, right=True, include_lowest=True)
+
+
+def _stats(count, median, mean):
+    return {'count': int(count), 'median_eur_m2': None if pd.isna(median) else float(median),
+            'mean_deviation': None if pd.isna(mean) else round(float(mean), 4)}
+
+
+class Cube:
+
+    def __init__(self, cuboids, values):
+        # cuboids: {tuple of dimensions: {tuple of their values: stats}}, values: {dimension: values}
+        self.cuboids = cuboids
+        self.values = values
+
+    @classmethod
+    def from_frame(cls, frame):
+        frame = pd.DataFrame({
+            'region': frame['region'].astype('category'),
+            'Wohntyp': frame['Wohntyp'].astype('category'),
+            'dev_status': frame['dev_status'].astype('category'),
+            'price_band': price_band(frame['price']),
+            'eur_m2': frame['Eur/m²'].astype(float),
+            'deviation': frame['diff_from_prediction'].astype(float),
+        })
+        cuboids = {(): {(): _stats(len(frame), frame['eur_m2'].median(), frame['deviation'].mean())}}
+        for n in range(1, len(DIMENSIONS) + 1):
+            for dims in itertools.combinations(DIMENSIONS, n):
+                grouped = frame.groupby(list(dims), observed=True).agg(
+                    count=('eur_m2', 'size'), median=('eur_m2', 'median'), mean=('deviation', 'mean'))
+                keys = grouped.index if n > 1 else [(key,) for key in grouped.index]
+                cuboids[dims] = {tuple(key): _stats(*row)
+                                 for key, row in zip(keys, grouped[['count', 'median', 'mean']].values)}
+        values = {dim: [v for v in frame[dim].cat.categories if (v,) in cuboids[(dim,)]] for dim in DIMENSIONS}
+        return cls(cuboids, values)
+
+    def _fixed(self, fixed):
+        unknown = set(fixed) - set(DIMENSIONS)
+        if unknown:
+            raise KeyError("unknown dimension(s): " + ", ".join(sorted(unknown)))
+        return {dim: value for dim, value in fixed.items() if value not in (None, 'All')}
+
+    def cell(self, **fixed):
+        """Statistics of the listings matching `fixed` ({dimension: value}, None or 'All' rolls it up)."""
+        fixed = self._fixed(fixed)
+        dims = tuple(dim for dim in DIMENSIONS if dim in fixed)
+        return self.cuboids[dims].get(tuple(fixed[dim] for dim in dims), _stats(0, None, None))
+
+    def slice(self, by, **fixed):
+        """One row per value of the dimension `by` within `fixed`, in the order of its values."""
+        fixed = self._fixed(fixed)
+        fixed.pop(by, None)
+        if by not in DIMENSIONS:
+            raise KeyError("unknown dimension: " + str(by))
+        rows = []
+        for value in self.values[by]:
+            stats = self.cell(**dict(fixed, **{by: value}))
+            if stats['count']:
+                rows.append(dict(stats, **{by: value}))
+        return rows
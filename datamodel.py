@@ -0,0 +1,135 @@
+"""Normalized dashboard data: one row per project, one row per unit (price bound) of a project.
+
+    python datamodel.py resources/dashdata.csv
+
+splits a flat dashdata.csv (every project row repeated per unit_id) into resources/projects.csv
+and resources/units.csv, linked by the integer project_id. join() rebuilds the flat table when
+a consumer needs it, with the formatted display columns derived on the fly.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+PROJECTS = 'projects.csv'
+UNITS = 'units.csv'
+
+# values that differ between the units of one project, everything else belongs to the project
+UNIT_COLUMNS = ['unit_id', 'price', 'sqft', 'rooms', 'price-pred', 'diff_from_prediction']
+
+# formatted copies of other columns (see 04_machine_learning), not stored
+DERIVED_COLUMNS = ['Price', 'Predicted price', 'Living space', 'Status', 'Number of rooms']
+
+# strings repeated over many rows (statuses, types, regions, the address of every unit of a project)
+# and measures, see compact()
+CATEGORICAL_COLUMNS = ['dev_status', 'Status', 'Wohntyp', 'region', 'Address']
+FLOAT32_COLUMNS = ['price', 'sqft', 'rooms', 'price-pred', 'diff_from_prediction']
+
+# stage of a project parsed from dev_status; only SCHEDULED ("Fertigstellung 2022") carries a year,
+# values outside the vocabulary count as unknown
+SCHEDULED = 'Fertigstellung'
+STAGES = ['Fertiggestellt', SCHEDULED, 'Bau gestartet', 'geplant', 'auf Anfrage', 'unbekannt']
+
+# column order of the flat table
+FLAT_COLUMNS = ['url', 'dev_status', 'Address', 'location', 'latitude', 'longitude', 'allprice', 'allrooms',
+                'allsqft', 'price', 'sqft', 'rooms', 'unit_id', 'Wohntyp', 'price-pred', 'region', 'is_lk',
+                'diff_from_prediction', 'Name', 'Price', 'Predicted price', 'Living space', 'Status',
+                'Number of rooms']
+
+
+def split(flat):
+    flat = flat.drop(columns=[c for c in DERIVED_COLUMNS if c in flat.columns])
+    project_id = flat.groupby('url', sort=False).ngroup()
+
+    projects = flat.drop(columns=UNIT_COLUMNS).assign(project_id=project_id).drop_duplicates('project_id')
+    projects = projects.set_index('project_id')
+    units = flat[UNIT_COLUMNS].assign(project_id=project_id.values)
+    return projects, units[['project_id'] + UNIT_COLUMNS]
+
+
+def write(projects, units, directory='resources'):
+    projects.to_csv(os.path.join(directory, PROJECTS))
+    units.to_csv(os.path.join(directory, UNITS), index=False)
+
+
+def read(directory='resources', project_columns=None, unit_columns=None):
+    # project_columns/unit_columns restrict what is parsed, project_id is always read
+    usecols = None if project_columns is None else ['project_id'] + list(project_columns)
+    projects = pd.read_csv(os.path.join(directory, PROJECTS), index_col='project_id', usecols=usecols)
+    usecols = None if unit_columns is None else ['project_id'] + list(unit_columns)
+    units = pd.read_csv(os.path.join(directory, UNITS), usecols=usecols)
+    return projects, units
+
+
+def derive(flat):
+    # display strings as 04_machine_learning wrote them into dashdata.csv, returns a new frame
+    columns = flat.columns
+    derived = {}
+    if 'price' in columns:
+        derived['Price'] = ["€{:,.2f}".format(price) for price in flat['price']]
+    if 'price-pred' in columns:
+        derived['Predicted price'] = ["€{:,.2f}".format(price) for price in flat['price-pred']]
+    if 'sqft' in columns:
+        derived['Living space'] = ["{:,.0f} m²".format(sqft) for sqft in flat['sqft']]
+    if 'dev_status' in columns:
+        derived['Status'] = flat['dev_status']
+    if 'rooms' in columns:
+        derived['Number of rooms'] = flat['rooms']
+    return flat.assign(**derived)
+
+
+def join(projects, units, derived=True):
+    # one row per unit with the columns of its project, in the row order of units.csv; without
+    # `derived` the display columns are left to the consumer (see derive)
+    flat = units.join(projects, on='project_id')
+    if derived:
+        flat = derive(flat)
+    return flat[[c for c in FLAT_COLUMNS if c in flat.columns] +
+                [c for c in flat.columns if c not in FLAT_COLUMNS and c != 'project_id']]
+
+
+def completion(dev_status):
+    # completion_year (int16, 0 without a year) and stage (categorical over STAGES) of dev_status
+    # values; each distinct value is parsed once
+    codes = pd.Categorical(dev_status)
+    values = pd.Series(codes.categories)
+    years = values.str.extract(r'^' + SCHEDULED + r' (\d{4})$', expand=False)
+    stages = values.where(values.isin(STAGES), 'unbekannt').where(years.isna(), SCHEDULED)
+    year = np.append(years.fillna(0).astype('int16').values, np.int16(0))  # code -1 (NaN) -> 0
+    stage = np.append(stages.values, 'unbekannt').astype(object)
+    index = dev_status.index if isinstance(dev_status, pd.Series) else None
+    return pd.DataFrame({'completion_year': year[codes.codes],
+                         'stage': pd.Categorical(stage[codes.codes], categories=STAGES)}, index=index)
+
+
+def compact(flat, categorical=CATEGORICAL_COLUMNS, float32=FLOAT32_COLUMNS):
+    # category codes for the repeated strings and float32 for the measures; coordinates stay float64:
+    # the map groups units by their exact coordinates, and plotly writes float32 values as long decimals
+    flat = flat.copy()
+    for column in categorical:
+        if column in flat.columns:
+            flat[column] = flat[column].astype('category')
+    for column in float32:
+        if column in flat.columns:
+            flat[column] = flat[column].astype('float32')
+    return flat
+
+
+def memory_report(flat):
+    # bytes per column (strings included) and in total, in MB
+    usage = flat.memory_usage(index=True, deep=True)
+    return {'columns': {column: round(size / 2 ** 20, 3) for column, size in usage.items()},
+            'dtypes': {column: str(dtype) for column, dtype in flat.dtypes.items()},
+            'total_mb': round(usage.sum() / 2 ** 20, 3)}
+
+
+def load(directory='resources'):
+    return join(*read(directory))
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else os.path.join('resources', 'dashdata.csv')
+    projects, units = split(pd.read_csv(source, index_col=0))
+    write(projects, units, os.path.dirname(source) or '.')
+    print("{} projects, {} units".format(len(projects), len(units)))
@@ -0,0 +1,16 @@
+import os
+
+# concurrency mode, overridable per dyno through config vars
+#   gthread (default): each worker serves several requests at once on threads
+#   gevent: cooperative greenlets
+#   sync: one request per worker (old behaviour)
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+
+if worker_class == "gthread":
+    threads = int(os.environ.get("GUNICORN_THREADS", 8))
+
+if worker_class == "gevent":
+    worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 100))
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
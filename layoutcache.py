@@ -0,0 +1,68 @@
+import gzip
+import hashlib
+import json
+import os
+
+import flask
+import plotly
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# The initial layout (including the map and histogram figures) only changes with the data, so
+# it is serialized and compressed once, by precompute.py or at start-up, and /_dash-layout sends
+# the stored bytes with a strong ETag instead of running plotly's JSON encoder per page load.
+
+FILES = {'identity': 'layout.json', 'gzip': 'layout.json.gz', 'br': 'layout.json.br'}
+
+
+def serialize(layout):
+    # same encoding as dash.Dash.serve_layout
+    return json.dumps(layout, cls=plotly.utils.PlotlyJSONEncoder).encode('utf-8')
+
+
+def compress(raw, brotli_quality=11):
+    variants = {'identity': raw, 'gzip': gzip.compress(raw, 9)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(raw, quality=brotli_quality)
+    return variants
+
+
+def write(variants, directory):
+    for encoding, data in variants.items():
+        with open(os.path.join(directory, FILES[encoding]), 'wb') as f:
+            f.write(data)
+
+
+def read(directory):
+    variants = {}
+    for encoding, name in FILES.items():
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                variants[encoding] = f.read()
+    return variants if 'identity' in variants else None
+
+
+def init_app(app, variants, max_age=60):
+    etag = hashlib.sha1(variants['identity']).hexdigest()[:24]
+    # strong validators differ per content-coding
+    etags = {encoding: "{}-{}".format(etag, encoding) for encoding in variants}
+
+    def serve_layout():
+        accepted = flask.request.accept_encodings
+        encoding = next((e for e in ('br', 'gzip') if e in variants and accepted[e]), 'identity')
+
+        response = flask.Response(variants[encoding], mimetype='application/json')
+        if encoding != 'identity':
+            # set before flask-compress runs, so it leaves the body alone
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+        response.set_etag(etags[encoding])
+        return response.make_conditional(flask.request)
+
+    app.server.view_functions[app.config.routes_pathname_prefix + '_dash-layout'] = serve_layout
@@ -0,0 +1,125 @@
+import contextvars
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+import flask
+
+# Per-callback latency and payload histograms, exposed in the Prometheus text format on /metrics.
+# Recording is a bisect and a few additions under a lock, cheap enough to stay on in production.
+# Every gunicorn worker keeps its own numbers, the `worker` label tells the series apart.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+class Histogram:
+
+    def __init__(self, name, help, buckets, labelnames):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.labelnames = labelnames
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def expose(self, extra_labels=()):
+        lines = ["# HELP {} {}".format(self.name, self.help), "# TYPE {} histogram".format(self.name)]
+        with self._lock:
+            items = [(labels, list(counts), total) for labels, (counts, total) in sorted(self._series.items())]
+
+        for labels, counts, total in items:
+            pairs = list(zip(self.labelnames, labels)) + list(extra_labels)
+            base = ",".join('{}="{}"'.format(k, v) for k, v in pairs)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append('{}_bucket{{{},le="{}"}} {}'.format(self.name, base, le, cumulative))
+            lines.append("{}_sum{{{}}} {}".format(self.name, base, total))
+            lines.append("{}_count{{{}}} {}".format(self.name, base, cumulative))
+        return "\n".join(lines)
+
+
+callback_seconds = Histogram("dash_callback_duration_seconds",
+                             "Wall time of dash callbacks split into phases (total, callback, filter, figure, "
+                             "predict, serialize).",
+                             LATENCY_BUCKETS, ("callback", "phase"))
+response_bytes = Histogram("dash_callback_response_bytes", "Size of the uncompressed callback response.",
+                           SIZE_BUCKETS, ("callback",))
+
+_current = contextvars.ContextVar("callback_phases", default=None)
+
+
+def mark(name):
+    # closes a phase of the running callback: the time since the previous mark (or the callback
+    # start) is booked under `name`. No-op outside an instrumented callback.
+    state = _current.get()
+    if state is not None:
+        now = time.perf_counter()
+        phases, last = state
+        phases[name] = phases.get(name, 0.0) + now - last[0]
+        last[0] = now
+
+
+# decorator for dash callbacks, placed directly below @app.callback
+def instrument(func):
+    name = func.__name__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        phases = {}
+        t = time.perf_counter()
+        token = _current.set((phases, [t]))
+        try:
+            return func(*args, **kwargs)
+        finally:
+            phases["callback"] = time.perf_counter() - t
+            _current.reset(token)
+            for p, seconds in phases.items():
+                callback_seconds.observe(seconds, name, p)
+            if flask.has_request_context():
+                flask.g.metrics_callback = (name, phases["callback"])
+
+    return wrapper
+
+
+def init_app(app, path="/metrics"):
+    server = app.server
+    dispatch_path = app.config.routes_pathname_prefix + "_dash-update-component"
+
+    @server.before_request
+    def _start_timer():
+        if flask.request.path == dispatch_path:
+            flask.g.metrics_start = time.perf_counter()
+
+    # registered after flask-compress, so it runs first and sees the uncompressed body
+    @server.after_request
+    def _record_response(response):
+        recorded = flask.g.pop("metrics_callback", None)
+        start = flask.g.pop("metrics_start", None)
+        if recorded is not None and start is not None:
+            name, callback_time = recorded
+            total = time.perf_counter() - start
+            callback_seconds.observe(total, name, "total")
+            # dash serializes the return value after the callback returns
+            callback_seconds.observe(max(total - callback_time, 0.0), name, "serialize")
+            response_bytes.observe(response.calculate_content_length() or 0, name)
+        return response
+
+    @server.route(path)
+    def _metrics():
+        worker = [("worker", os.getpid())]
+        body = "\n".join(h.expose(worker) for h in (callback_seconds, response_bytes)) + "\n"
+        return flask.Response(body, mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,65 @@
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+# CPU-heavy callback work (figure building, model prediction) runs on a small, bounded pool of
+# native threads. With gthread workers the request threads stay free for cheap callbacks
+# (click details, reset) even while every map update is busy; with gevent workers the work is
+# moved off the event loop so it doesn't stall all other greenlets of the worker.
+
+HEAVY_THREADS = int(os.environ.get("HEAVY_THREADS", 2))
+
+_pool = None
+_gevent_pool = None
+_pool_lock = threading.Lock()
+
+
+def _gevent_patched():
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched("threading")
+
+
+def _get_pool():
+    global _pool
+    # created lazily so the pool is started inside each forked gunicorn worker
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=HEAVY_THREADS, thread_name_prefix="heavy")
+    return _pool
+
+
+def _get_gevent_pool():
+    global _gevent_pool
+    # patched threading only gives greenlets, a gevent ThreadPool runs on real OS threads. Not the
+    # hub's own threadpool: that one holds 10 threads and also serves the DNS resolver
+    if _gevent_pool is None:
+        with _pool_lock:
+            if _gevent_pool is None:
+                from gevent.threadpool import ThreadPool
+                _gevent_pool = ThreadPool(HEAVY_THREADS)
+    return _gevent_pool
+
+
+def run_heavy(func, *args, **kwargs):
+    # copy the context so per-request state (e.g. instrumentation) follows the work into the pool
+    ctx = contextvars.copy_context()
+
+    if _gevent_patched():
+        return _get_gevent_pool().apply(ctx.run, (func,) + args, kwargs)
+
+    return _get_pool().submit(ctx.run, func, *args, **kwargs).result()
+
+
+# decorator for dash callbacks, placed below @app.callback
+def heavy(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return run_heavy(func, *args, **kwargs)
+
+    return wrapper
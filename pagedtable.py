@@ -0,0 +1,108 @@
+"""Backend paging for the listings table (dash_table.DataTable with custom paging, sorting and filtering).
+
+    table = PagedTable(df, ['Name', 'region', 'price', ...])
+    records, total = table.page(rows, sort_by, filter_query, page=0, size=15)
+
+The ascending and descending order of every column is sorted once per worker; a page walks the
+order of the sorted column, keeps the positions that pass the map filters and the table's filter
+query, and copies only the rows of the requested page.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+# operators of DataTable's filter_query, as the table writes them ('{price} > 500000') or in words
+OPERATORS = {'>=': '>=', 'ge': '>=', '<=': '<=', 'le': '<=', '>': '>', 'gt': '>', '<': '<', 'lt': '<',
+             '!=': '!=', 'ne': '!=', '=': '=', 'eq': '=', 'contains': 'contains'}
+EXPRESSION = re.compile(r"^\{(?P<column>[^}]+)\}\s*(?P<operator>[is]?(?:>=|<=|!=|>|<|=)|\w+)\s+(?P<value>.+)$")
+
+
+def parse_filter(filter_query):
+    """[(column, operator, value)] of a filter_query, the expressions joined by '&&'."""
+    expressions = []
+    for part in (filter_query or "").split(" && "):
+        part = part.strip()
+        if not part:
+            continue
+        match = EXPRESSION.match(part)
+        operator = match and match.group('operator')
+        # 'i'/'s' prefixes (case-insensitive/-sensitive) of newer tables: text is compared case-insensitively
+        if operator and operator[:1] in ('i', 's') and operator[1:] in OPERATORS:
+            operator = operator[1:]
+        if operator not in OPERATORS:
+            raise ValueError("unsupported filter: " + part)
+        value = match.group('value').strip()
+        if value[:1] == value[-1:] and value[:1] in ('"', "'", '`') and len(value) > 1:
+            value = value[1:-1]
+        expressions.append((match.group('column'), OPERATORS[operator], value))
+    return expressions
+
+
+class PagedTable:
+
+    def __init__(self, frame, columns):
+        self.frame = frame
+        self.columns = list(columns)
+        self.size = len(frame)
+        dtype = np.int32 if self.size < 2 ** 31 else np.int64
+        self.orders = {}
+        for column in self.columns:
+            values = pd.Series(frame[column].values)
+            if str(values.dtype) == 'category':
+                values = values.astype(object)
+            # missing values last in both directions
+            self.orders[column] = {
+                direction: values.sort_values(ascending=direction == 'asc', kind='mergesort',
+                                              na_position='last').index.values.astype(dtype)
+                for direction in ('asc', 'desc')}
+
+    def _matches(self, positions, column, operator, value):
+        values = self.frame[column].values[positions]
+        if operator == 'contains':
+            return np.array([value.lower() in str(v).lower() for v in values.astype(object)], dtype=bool)
+        if values.dtype.kind in 'fiu':
+            value = float(value)
+        else:
+            values = values.astype(object)
+        if operator == '=':
+            return values == value
+        if operator == '!=':
+            return values != value
+        # text columns support =, != and contains only
+        if values.dtype == object:
+            raise ValueError("{} {} needs a number".format(column, operator))
+        return {'>=': values >= value, '<=': values <= value, '>': values > value, '<': values < value}[operator]
+
+    def select(self, rows=None, filter_query=None):
+        """Sorted positions among `rows` (None for all) that pass `filter_query`."""
+        positions = np.arange(self.size) if rows is None else np.asarray(rows)
+        for column, operator, value in parse_filter(filter_query):
+            if column not in self.columns:
+                raise ValueError("unknown column: " + column)
+            positions = positions[self._matches(positions, column, operator, value)]
+        return positions
+
+    def page(self, rows=None, sort_by=None, filter_query=None, page=0, size=15):
+        """Records of one page and the number of matching rows.
+
+        `rows` are the sorted positions of the listings on the map (None for all), `sort_by` is
+        DataTable's [{'column_id': ..., 'direction': 'asc' | 'desc'}], of which the first is used.
+        """
+        positions = self.select(rows, filter_query)
+        total = len(positions)
+        start = page * size
+        if sort_by and sort_by[0]['column_id'] in self.orders:
+            order = self.orders[sort_by[0]['column_id']][sort_by[0].get('direction', 'asc')]
+            if total < self.size:
+                keep = np.zeros(self.size, dtype=bool)
+                keep[positions] = True
+                order = order[keep[order]]
+            positions = order[start:start + size]
+        else:
+            positions = positions[start:start + size]
+        records = self.frame.iloc[positions][self.columns]
+        # float32 measures as their shortest decimals (31.29, not the float64 31.290000915527344)
+        decimals = {column: records[column].astype(str).astype(float)
+                    for column in self.columns if records[column].dtype == np.float32}
+        return records.assign(**decimals).to_dict('records'), total
@@ -0,0 +1,37 @@
+"""Build step: precompute what the dashboard needs to boot without touching the data.
+
+    python precompute.py
+
+Writes resources/precomputed/boot.json (initial figures and dropdown labels) and the serialized
+initial layout as layout.json, layout.json.gz and layout.json.br. They are only used with
+FAST_BOOT=1 and only while resources/projects.csv, units.csv and the code of app.py and the modules
+it imports are unchanged, so rerun after every data refresh. On Heroku bin/post_compile runs it during the build.
+"""
+import json
+import os
+
+import plotly
+
+# build from the data, never from an older precomputed file
+os.environ["FAST_BOOT"] = "0"
+
+import app  # noqa: E402
+import layoutcache  # noqa: E402
+
+
+def main():
+    boot = {
+        'data_version': app.data_version(),
+        'labels': app.labels,
+        'map': app.fig,
+        'histogram': app.hist,
+    }
+    os.makedirs(app.PRECOMPUTED_DIR, exist_ok=True)
+    with open(app.PRECOMPUTED, "w") as f:
+        json.dump(boot, f, cls=plotly.utils.PlotlyJSONEncoder)
+    layoutcache.write(layoutcache.compress(layoutcache.serialize(app.app.layout)), app.PRECOMPUTED_DIR)
+    print("wrote", app.PRECOMPUTED_DIR)
+
+
+if __name__ == "__main__":
+    main()
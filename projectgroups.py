@@ -0,0 +1,86 @@
+"""Units grouped by project location: one map marker per building instead of one per unit.
+
+    groups = ProjectGroups.from_frame(df)
+    points = groups.aggregate(df, rows)    # one row per location with units among `rows`
+    groups.units(points['group'][0])       # row positions of that location's units
+    groups.units_of(points['group'])       # ... of several locations, sorted
+
+Units at the same coordinates get one group id. The row positions of all units are stored in
+group order with an offset per group (compressed sparse rows), so the units of a group are one
+slice and the aggregates of a filter selection are segment reductions over its sorted positions.
+"""
+import numpy as np
+
+COLUMNS = ['latitude', 'longitude']
+
+# taken from the group's first unit of the selection
+FIRST = ['latitude', 'longitude', 'Name', 'url', 'Wohntyp', 'dev_status']
+
+
+class ProjectGroups:
+
+    def __init__(self, group_of):
+        # group_of: group id of every row; rows[offsets[g]:offsets[g + 1]] are the rows of group g
+        self.group_of = np.asarray(group_of, dtype=np.int32)
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(self.group_of))])
+        self.rows = np.argsort(self.group_of, kind='stable').astype(np.int32)
+
+    @classmethod
+    def from_frame(cls, frame, columns=COLUMNS):
+        return cls(frame.groupby(columns, sort=False).ngroup().to_numpy())
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def units(self, group):
+        return self.rows[self.offsets[group]:self.offsets[group + 1]]
+
+    def units_of(self, groups):
+        # sorted row positions of the units of several groups (the markers of a lasso selection),
+        # ids that are no group are skipped
+        groups = np.unique(np.asarray(groups, dtype=np.int64))
+        groups = groups[(groups >= 0) & (groups < len(self))]
+        if not len(groups):
+            return np.empty(0, dtype=np.int32)
+        return np.sort(np.concatenate([self.units(group) for group in groups]))
+
+    def segments(self, rows=None):
+        """Groups with units among `rows` (sorted positions, None for all), `rows` ordered by group and
+        the offsets of each group's segment in them."""
+        if rows is None:
+            return np.arange(len(self), dtype=np.int32), self.rows, self.offsets
+        rows = np.asarray(rows)
+        groups = self.group_of[rows]
+        order = np.argsort(groups, kind='stable')
+        rows, groups = rows[order], groups[order]
+        starts = np.flatnonzero(groups[1:] != groups[:-1]) + 1
+        starts = np.concatenate([[0], starts]) if len(rows) else starts
+        return groups[starts], rows, np.append(starts, len(rows))
+
+    def aggregate(self, frame, rows=None):
+        """One row per group with units among `rows`: the group, its first unit's row and FIRST columns,
+        the number of units, price, size and predicted price range, mean Eur/m² and deviation from the
+        prediction, and the largest marker scale."""
+        groups, rows, offsets = self.segments(rows)
+        starts = offsets[:-1]
+        first = rows[starts]
+        points = frame.iloc[first][FIRST].reset_index(drop=True)
+        points.insert(0, 'group', groups)
+        points.insert(1, 'row', first)
+        points['units'] = np.diff(offsets)
+
+        def reduce(ufunc, column):
+            # one value per segment, the empty selection gives empty columns
+            values = frame[column].to_numpy()[rows]
+            return ufunc.reduceat(values, starts) if len(starts) else values[:0]
+
+        points['price_min'] = reduce(np.minimum, 'price')
+        points['price_max'] = reduce(np.maximum, 'price')
+        points['sqft_min'] = reduce(np.minimum, 'sqft')
+        points['sqft_max'] = reduce(np.maximum, 'sqft')
+        points['pred_min'] = reduce(np.minimum, 'price-pred')
+        points['pred_max'] = reduce(np.maximum, 'price-pred')
+        points['Eur/m²'] = np.round(reduce(np.add, 'Eur/m²').astype(float) / points['units'])
+        points['diff_from_prediction'] = reduce(np.add, 'diff_from_prediction').astype(float) / points['units']
+        points['scale'] = reduce(np.maximum, 'scale')
+        return points
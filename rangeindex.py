@@ -0,0 +1,129 @@
+"""Range filters over numeric columns through sorted indexes.
+
+    index = RangeIndex(df, ['price', 'sqft'])
+    rows = index.select({'price': (250000, 500000), 'sqft': (60, None)})
+    filtered = df if rows is None else df.iloc[rows]
+
+Every column keeps its argsort order once, so a range is two binary searches and a contiguous
+slice of row positions. Several ranges start from the narrowest slice and check the other
+columns only for those rows, so the cost follows the size of the result, not of the table.
+Ranges too wide for that to pay off fall back to a sequential scan over one-byte rank codes:
+rows whose rank bucket lies strictly inside the range are found by comparing the codes, the
+rows of the two boundary buckets are taken from the sorted order.
+"""
+import numpy as np
+
+# ranges matching more than 1/SCAN_FRACTION of the rows are resolved by a scan instead
+SCAN_FRACTION = 16
+
+# rank buckets of the scan codes, equal parts of the sorted values; code BUCKETS marks NaN
+BUCKETS = 255
+
+
+class SortedColumn:
+
+    def __init__(self, values):
+        self.values = np.asarray(values)
+        # NaN sorts last and is never inside a range; int32 positions halve the memory traffic
+        self.order = np.argsort(self.values, kind='stable').astype(np.int32 if len(self.values) < 2 ** 31 else np.int64)
+        self.sorted = self.values[self.order][:np.count_nonzero(~np.isnan(self.values))]
+        # codes[row]: bucket of the row's position in sorted order; the bucket b holds the sorted
+        # positions edges[b]:edges[b + 1]
+        valid = len(self.sorted)
+        bucket = (np.arange(valid, dtype=np.int64) * BUCKETS // max(valid, 1)).astype(np.uint8)
+        self.codes = np.full(len(self.values), BUCKETS, dtype=np.uint8)
+        self.codes[self.order[:valid]] = bucket
+        self.edges = np.searchsorted(bucket, np.arange(BUCKETS + 1))
+
+    def _at_least(self, low):
+        # smallest value of the column's dtype >= low, so comparing in float32 or int gives the exact result
+        if np.issubdtype(self.values.dtype, np.integer):
+            return int(np.ceil(low))
+        value = self.values.dtype.type(low)
+        return np.nextafter(value, value.dtype.type(np.inf)) if float(value) < low else value
+
+    def _at_most(self, high):
+        if np.issubdtype(self.values.dtype, np.integer):
+            return int(np.floor(high))
+        value = self.values.dtype.type(high)
+        return np.nextafter(value, value.dtype.type(-np.inf)) if float(value) > high else value
+
+    def bounds(self, low=None, high=None):
+        # positions [start, stop) in sorted order of the values with low <= value <= high
+        start = 0 if low is None else np.searchsorted(self.sorted, self._at_least(low), side='left')
+        stop = len(self.sorted) if high is None else np.searchsorted(self.sorted, self._at_most(high), side='right')
+        return start, max(start, stop)
+
+    def rows(self, low=None, high=None):
+        start, stop = self.bounds(low, high)
+        return self.order[start:stop]
+
+    def smallest(self, rows, k):
+        # positions of the k smallest values among `rows` (positions, None for all), smallest first:
+        # the sorted order as is for all rows, a partial selection otherwise
+        if rows is None:
+            return self.order[:min(k, len(self.sorted))]
+        values = self.values[rows]
+        if len(rows) > k:
+            # NaN is partitioned to the end like in a sort
+            part = np.argpartition(values, k)[:k]
+            rows, values = rows[part], values[part]
+        order = np.argsort(values, kind='stable')
+        order = order[~np.isnan(values[order])] if values.dtype.kind == 'f' else order
+        return rows[order]
+
+    def restrict(self, mask, low=None, high=None):
+        # mask &= low <= value <= high over the whole column, in place
+        start, stop = self.bounds(low, high)
+        if start == stop:
+            mask[:] = False
+            return mask
+        first, last = int(self.codes[self.order[start]]), int(self.codes[self.order[stop - 1]])
+        # buckets first + 1 .. last - 1 are inside: one unsigned comparison, lower codes wrap around
+        # to large values and the NaN code is above every bucket
+        inside = np.subtract(self.codes, np.uint8(first + 1), dtype=np.uint8) < np.uint8(max(last - first - 1, 0))
+        inside[self.order[start:min(stop, self.edges[first + 1])]] = True
+        inside[self.order[max(start, self.edges[last]):stop]] = True
+        mask &= inside
+        return mask
+
+    def contains(self, rows, low=None, high=None):
+        # mask over `rows` (positions or a slice): value of the row inside the range, at least one
+        # bound given (NaN compares false)
+        values = self.values[rows]
+        if low is None:
+            return values <= self._at_most(high)
+        if high is None:
+            return values >= self._at_least(low)
+        return (values >= self._at_least(low)) & (values <= self._at_most(high))
+
+
+class RangeIndex:
+
+    def __init__(self, frame, columns):
+        self.size = len(frame)
+        self.columns = {column: SortedColumn(frame[column].to_numpy()) for column in columns}
+
+    def select(self, ranges):
+        """Sorted row positions inside all `ranges` ({column: (low, high)}, None for an open side).
+
+        Returns None if no range restricts anything, so the caller can skip the copy.
+        """
+        ranges = {c: (low, high) for c, (low, high) in ranges.items() if low is not None or high is not None}
+        if not ranges:
+            return None
+        bounds = {c: self.columns[c].bounds(*ranges[c]) for c in ranges}
+        narrowest = min(bounds, key=lambda c: bounds[c][1] - bounds[c][0])
+        start, stop = bounds[narrowest]
+        if (stop - start) * SCAN_FRACTION > self.size:
+            # even the narrowest range holds a large part of the rows: comparing whole columns in
+            # sequence is cheaper than gathering that many scattered rows
+            inside = np.ones(self.size, dtype=bool)
+            for column in ranges:
+                self.columns[column].restrict(inside, *ranges[column])
+            return np.flatnonzero(inside)
+        rows = self.columns[narrowest].order[start:stop]
+        for column in ranges:
+            if column != narrowest and len(rows):
+                rows = rows[self.columns[column].contains(rows, *ranges[column])]
+        return np.sort(rows)
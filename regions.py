@@ -0,0 +1,89 @@
+"""Postal code -> region (Gemeinde/Kreis) lookup shared by the training notebook and the dashboard.
+
+    python regions.py DE.txt
+
+builds resources/plz_regions.csv from the GeoNames postal code dump for Germany
+(https://download.geonames.org/export/zip/DE.zip, the data pgeocode uses). The table is loaded
+once and indexed by postal code, so a whole column of postal codes is resolved with one join
+and the prediction callback looks up is_lk without per-request parsing.
+"""
+import functools
+import os
+import sys
+
+import pandas as pd
+
+TABLE = os.path.join('resources', 'plz_regions.csv')
+
+GEONAMES_COLUMNS = ['country_code', 'postal_code', 'place_name', 'state_name', 'state_code', 'county_name',
+                    'county_code', 'community_name', 'community_code', 'latitude', 'longitude', 'accuracy']
+
+# postal code in a Nominatim address ("11, Gubener Straße, ..., Berlin, 10243, Deutschland")
+POSTAL_CODE = r"[\,] [\S]+[\,] ([\d]+)[\,] Deutschland"
+
+
+def is_landkreis(names):
+    return names.fillna("").str.contains("Landkreis")
+
+
+class RegionTable:
+
+    def __init__(self, table):
+        # table: index postal_code (str), columns region, is_lk and code (Kreis key, AGS)
+        self.table = table
+        self._lk_by_region = table.drop_duplicates('region').set_index('region')['is_lk'].to_dict()
+        self._by_code = table.dropna(subset=['code']).drop_duplicates('code').set_index('code')[['region', 'is_lk']]
+
+    @classmethod
+    def from_csv(cls, path=TABLE):
+        return cls(pd.read_csv(path, dtype={'postal_code': str, 'code': str}, index_col='postal_code'))
+
+    @classmethod
+    def from_geonames(cls, path):
+        raw = pd.read_csv(path, sep='\t', header=None, names=GEONAMES_COLUMNS,
+                          dtype={'postal_code': str, 'community_code': str},
+                          usecols=['postal_code', 'community_name', 'community_code'])
+        # like pgeocode, the first entry of a postal code that spans several places wins
+        raw = raw.drop_duplicates('postal_code').set_index('postal_code')
+        # for Germany the GeoNames community code is the Kreis key, as in the boundary data
+        table = pd.DataFrame({'region': raw['community_name'], 'is_lk': is_landkreis(raw['community_name']),
+                              'code': raw['community_code'].str.zfill(5)})
+        return cls(table.sort_index())
+
+    def to_csv(self, path=TABLE):
+        self.table.to_csv(path, index_label='postal_code')
+
+    @staticmethod
+    def postal_codes(locations):
+        return pd.Series(locations).astype(str).str.extract(POSTAL_CODE, expand=False)
+
+    def resolve(self, postal_codes):
+        # region and is_lk for a column of postal codes, NaN where the code is unknown
+        postal_codes = pd.Series(postal_codes)
+        resolved = self.table.reindex(postal_codes.values)
+        resolved.index = postal_codes.index
+        return resolved
+
+    def resolve_codes(self, codes):
+        # region and is_lk for a column of Kreis keys (see boundaries.BoundaryIndex), NaN where unknown
+        codes = pd.Series(codes)
+        resolved = self._by_code.reindex(codes.values)
+        resolved.index = codes.index
+        return resolved
+
+    def is_lk(self, region):
+        # regions outside the table (e.g. 'other') fall back to their name
+        if region in self._lk_by_region:
+            return bool(self._lk_by_region[region])
+        return "Landkreis" in str(region)
+
+
+@functools.lru_cache(maxsize=None)
+def load(path=TABLE):
+    return RegionTable.from_csv(path)
+
+
+if __name__ == "__main__":
+    regions = RegionTable.from_geonames(sys.argv[1])
+    regions.to_csv(sys.argv[2] if len(sys.argv) > 2 else TABLE)
+    print("{} postal codes, {} regions".format(len(regions.table), regions.table['region'].nunique()))
@@ -0,0 +1,103 @@
+"""In-memory full-text search over the listings, with prefix autocomplete.
+
+    index = SearchIndex.from_frame(df, ['Name', 'Address', 'region'])
+    rows = index.search("tacheles berl")      # row positions matching every word (as a prefix)
+    index.complete("tacheles berl")           # ['tacheles berlin', ...]
+
+Words are lowercased and folded to ASCII (ü -> u, ß -> ss). The vocabulary is one sorted list with
+the postings of all words concatenated in the same order, so every word starting with a prefix
+sits in one contiguous range: a prefix lookup is two binary searches and one slice of postings.
+"""
+import bisect
+import re
+import unicodedata
+
+import numpy as np
+
+WORD = re.compile(r"\w+")
+
+
+def fold(text):
+    text = unicodedata.normalize('NFKD', str(text).lower().replace('ß', 'ss'))
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def tokenize(text):
+    return WORD.findall(fold(text))
+
+
+class SearchIndex:
+
+    def __init__(self, terms, offsets, postings):
+        # terms: sorted words; postings[offsets[i]:offsets[i + 1]] are the sorted rows of terms[i]
+        self.terms = terms
+        self.offsets = offsets
+        self.postings = postings
+
+    @classmethod
+    def from_frame(cls, frame, columns):
+        words = {}
+        for column in columns:
+            values = frame[column].astype(object).values
+            # repeated values (units of a project, regions) are tokenized once
+            tokens = {}
+            for row, value in enumerate(values):
+                if value is None or value != value:
+                    continue
+                if value not in tokens:
+                    tokens[value] = set(tokenize(value))
+                for word in tokens[value]:
+                    words.setdefault(word, set()).add(row)
+        terms = sorted(words)
+        counts = np.array([len(words[t]) for t in terms], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        postings = np.fromiter((row for t in terms for row in sorted(words[t])), dtype=np.int32,
+                               count=int(offsets[-1]))
+        return cls(terms, offsets, postings)
+
+    def prefix_range(self, prefix):
+        # indexes [lo, hi) of the terms starting with prefix
+        lo = bisect.bisect_left(self.terms, prefix)
+        hi = bisect.bisect_left(self.terms, prefix + '\U0010ffff', lo)
+        return lo, hi
+
+    def postings_count(self, prefix):
+        lo, hi = self.prefix_range(prefix)
+        return self.offsets[hi] - self.offsets[lo]
+
+    def rows(self, prefix):
+        lo, hi = self.prefix_range(prefix)
+        if hi - lo == 1:
+            return self.postings[self.offsets[lo]:self.offsets[hi]]
+        return np.unique(self.postings[self.offsets[lo]:self.offsets[hi]])
+
+    def search(self, query):
+        """Sorted row positions whose text contains a word starting with every word of `query`."""
+        rows = None
+        # rarest prefix first, the intersection only shrinks
+        for word in sorted(set(tokenize(query)), key=self.postings_count):
+            matches = self.rows(word)
+            rows = matches if rows is None else np.intersect1d(rows, matches, assume_unique=True)
+            if not len(rows):
+                break
+        return np.empty(0, dtype=np.int32) if rows is None else rows
+
+    def complete(self, query, limit=8):
+        # the query with its last word completed, most frequent words first; with several words only
+        # completions that still match something
+        words = tokenize(query)
+        if not words or not query[-1:].strip():
+            return []
+        head, last = words[:-1], words[-1]
+        rows = self.search(" ".join(head)) if head else None
+        lo, hi = self.prefix_range(last)
+        completions = []
+        for t in lo + np.argsort(-np.diff(self.offsets[lo:hi + 1]), kind='stable'):
+            if rows is not None:
+                postings = self.postings[self.offsets[t]:self.offsets[t + 1]]
+                if not np.intersect1d(rows, postings, assume_unique=True).size:
+                    continue
+            completions.append(" ".join(head + [self.terms[t]]))
+            if len(completions) == limit:
+                break
+        return completions
@@ -0,0 +1,201 @@
+"""Price history: every crawl appended as a dated snapshot of the flat listing table.
+
+    python snapshots.py append [resources] [YYYY-MM-DD]
+    python snapshots.py changes --days 90 --region "Berlin, Stadt" --Wohntyp Eigentumswohnung
+
+resources/snapshots/date=YYYY-MM-DD/ holds one snapshot in columns: one .npy file per column,
+strings dictionary-encoded (int32 codes, the distinct values in meta.json) and min/max of every
+numeric column in meta.json. A query reads meta.json of the partitions in its date range, skips
+partitions whose dictionary or value range cannot match the filters, and loads (memory-maps)
+only the columns it needs.
+"""
+import argparse
+import datetime
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+import datamodel
+
+DIRECTORY = os.path.join('resources', 'snapshots')
+
+# a listing's unit is identified by its url and unit_id
+KEY = ['url', 'unit_id']
+
+PREFIX = 'date='
+
+
+class SnapshotStore:
+
+    def __init__(self, directory=DIRECTORY):
+        self.directory = directory
+        self._meta = {}  # partition date -> (mtime, meta)
+
+    def dates(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[len(PREFIX):] for name in os.listdir(self.directory)
+                      if name.startswith(PREFIX) and os.path.exists(os.path.join(self.directory, name, 'meta.json')))
+
+    def path(self, date):
+        return os.path.join(self.directory, PREFIX + date)
+
+    def append(self, frame, date=None):
+        """Writes `frame` as the snapshot of `date` (default today), replacing an earlier one of that day."""
+        date = str(date or datetime.date.today())
+        final = self.path(date)
+        tmp = final + '.tmp'
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        meta = {'date': date, 'rows': len(frame), 'columns': {}}
+        for i, column in enumerate(frame.columns):
+            values = frame[column]
+            entry = {'file': 'c{}.npy'.format(i)}
+            if values.dtype == object or str(values.dtype) == 'category':
+                codes, uniques = pd.factorize(values.astype(object))
+                np.save(os.path.join(tmp, entry['file']), codes.astype(np.int32))
+                entry.update(kind='dict', values=[str(v) for v in uniques])
+            else:
+                array = values.to_numpy()
+                np.save(os.path.join(tmp, entry['file']), array)
+                finite = array[~pd.isna(array)] if array.dtype.kind == 'f' else array
+                entry.update(kind='num', min=finite.min().item() if len(finite) else None,
+                             max=finite.max().item() if len(finite) else None)
+            meta['columns'][column] = entry
+        # meta.json last: a partition without it is incomplete and ignored
+        with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        if os.path.exists(final):
+            shutil.rmtree(final)
+        os.rename(tmp, final)
+        self._meta.pop(date, None)
+        return final
+
+    def meta(self, date):
+        path = os.path.join(self.path(date), 'meta.json')
+        mtime = os.path.getmtime(path)
+        cached = self._meta.get(date)
+        if cached is None or cached[0] != mtime:
+            with open(path, encoding='utf-8') as f:
+                cached = (mtime, json.load(f))
+            self._meta[date] = cached
+        return cached[1]
+
+    @staticmethod
+    def _can_match(entry, condition):
+        # partition pruning from meta.json alone
+        if entry['kind'] == 'dict':
+            return any(v in set(entry['values']) for v in _values(condition))
+        if isinstance(condition, tuple):
+            low, high = condition
+            return entry['min'] is not None and (low is None or entry['max'] >= low) and \
+                (high is None or entry['min'] <= high)
+        return any(entry['min'] is not None and entry['min'] <= v <= entry['max'] for v in _values(condition))
+
+    def _load(self, date, entry):
+        return np.load(os.path.join(self.path(date), entry['file']), mmap_mode='r')
+
+    def read(self, columns=None, since=None, until=None, where=None):
+        """Rows of the snapshots from `since` to `until` (dates or 'YYYY-MM-DD', inclusive) with a `date` column.
+
+        `where` maps columns to a value, a list of values or, for numbers, a (low, high) range
+        (None for an open side). Only the columns in `columns` and `where` are read.
+        """
+        where = where or {}
+        since = None if since is None else str(since)
+        until = None if until is None else str(until)
+        parts = []
+        for date in self.dates():
+            if since is not None and date < since or until is not None and date > until:
+                continue
+            meta = self.meta(date)
+            entries = meta['columns']
+            if any(c not in entries or not self._can_match(entries[c], cond) for c, cond in where.items()):
+                continue
+
+            mask = np.ones(meta['rows'], dtype=bool)
+            for column, condition in where.items():
+                entry = entries[column]
+                data = self._load(date, entry)
+                if entry['kind'] == 'dict':
+                    wanted = set(_values(condition))
+                    mask &= np.isin(data, [i for i, v in enumerate(entry['values']) if v in wanted])
+                elif isinstance(condition, tuple):
+                    low, high = condition
+                    if low is not None:
+                        mask &= data >= low
+                    if high is not None:
+                        mask &= data <= high
+                else:
+                    mask &= np.isin(data, _values(condition))
+            rows = np.flatnonzero(mask)
+            if not len(rows):
+                continue
+
+            part = {}
+            for column in (columns if columns is not None else list(entries)):
+                entry = entries.get(column)
+                if entry is None:
+                    part[column] = np.full(len(rows), None, dtype=object)
+                elif entry['kind'] == 'dict':
+                    # code -1 (missing) picks the None appended to the dictionary
+                    part[column] = np.array(entry['values'] + [None], dtype=object)[self._load(date, entry)[rows]]
+                else:
+                    part[column] = np.asarray(self._load(date, entry)[rows])
+            part = pd.DataFrame(part)
+            part.insert(0, 'date', pd.Timestamp(date))
+            parts.append(part)
+        if not parts:
+            return pd.DataFrame(columns=['date'] + list(columns or []))
+        return pd.concat(parts, ignore_index=True)
+
+    def history(self, url, column='price'):
+        # trajectory of `column` for the units of one listing, one row per unit and snapshot
+        return self.read(KEY + [column], where={'url': url}).sort_values(['unit_id', 'date'])
+
+    def changes(self, column='price', since=None, until=None, where=None):
+        """Rows where `column` differs from the previous snapshot of the same unit in the range."""
+        frame = self.read(KEY + ['Name', column], since, until, where)
+        frame = frame.sort_values(KEY + ['date'])
+        previous = frame.groupby(KEY, sort=False)[column].shift()
+        changed = previous.notna() & (frame[column] != previous)
+        return frame.assign(previous=previous)[changed].reset_index(drop=True)
+
+
+def _values(condition):
+    return list(condition) if isinstance(condition, (list, set, frozenset)) else [condition]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest='command')
+    append = sub.add_parser('append', help="snapshot projects.csv/units.csv of a directory")
+    append.add_argument('source', nargs='?', default='resources')
+    append.add_argument('date', nargs='?')
+    changes = sub.add_parser('changes', help="price changes in the last days")
+    changes.add_argument('--days', type=int, default=90)
+    for dim in ['region', 'Wohntyp', 'dev_status']:
+        changes.add_argument('--' + dim)
+    parser.add_argument('--store', default=DIRECTORY)
+    args = parser.parse_args()
+
+    store = SnapshotStore(args.store)
+    if args.command == 'append':
+        print("wrote", store.append(datamodel.load(args.source).drop(columns=datamodel.DERIVED_COLUMNS), args.date))
+    elif args.command == 'changes':
+        where = {dim: getattr(args, dim) for dim in ['region', 'Wohntyp', 'dev_status'] if getattr(args, dim)}
+        since = datetime.date.today() - datetime.timedelta(days=args.days)
+        print(store.changes(since=since, where=where).to_string())
+    else:
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
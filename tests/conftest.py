@@ -0,0 +1,68 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the dashboard modules live in the repository root, the scraping helpers next to the notebooks
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'webscraping notebooks')]
+
+NAMES = ['Tacheles Berlin', 'Quartier Heidestraße', 'Wohnen am Lützowplatz', 'Berliner Höfe', 'Haus Süd',
+         'Bergmannkiez', 'Am Stadtpark', np.nan]
+STREETS = ['Müllerstraße', 'Bergstraße', 'Oranienburger Str.', 'Bernauer Straße', 'Am Park']
+REGIONS = ['Berlin, Stadt', 'Landkreis München', 'Kreisfreie Stadt Leipzig', 'Landkreis Bernkastel-Wittlich']
+WOHNTYPEN = ['Etagenwohnung', 'Penthouse', 'Reihenhaus']
+DEV_STATUS = ['Fertiggestellt', 'Fertigstellung 2022', 'geplant']
+
+
+def synthetic_listings(n=3000, buildings=400, seed=0):
+    # n units in the columns and dtypes of the dashboard frame. The units of a building share its
+    # coordinates, name, url, address and region and are spread over the table; names repeat across
+    # buildings, some are missing, and so are 2% of the prices.
+    rng = np.random.RandomState(seed)
+    building = rng.randint(0, buildings, n)
+    latitude, longitude = rng.uniform(47.3, 55, buildings), rng.uniform(5.6, 15.5, buildings)
+    names = np.array(NAMES, dtype=object)[rng.randint(0, len(NAMES), buildings)]
+    names = [np.nan if pd.isna(name) else "{} {}".format(name, b) for b, name in enumerate(names)]
+    addresses = ["{} {}, {}".format(rng.choice(STREETS), rng.randint(1, 40), rng.randint(10000, 99999))
+                 for _ in range(buildings)]
+    regions = rng.choice(REGIONS, buildings)
+
+    price = rng.lognormal(13, 0.6, n).round(-3)
+    price[rng.rand(n) < 0.02] = np.nan
+    sqft = rng.uniform(20, 200, n).round(2)
+    return pd.DataFrame({
+        'url': ['https://example.org/neubau/{}/'.format(b) for b in building],
+        'dev_status': pd.Categorical(rng.choice(DEV_STATUS, n)),
+        'Address': pd.Categorical(np.array(addresses, dtype=object)[building]),
+        'latitude': latitude[building], 'longitude': longitude[building],
+        'Wohntyp': pd.Categorical(rng.choice(WOHNTYPEN, n)),
+        'region': pd.Categorical(regions[building]),
+        'Name': np.array(names, dtype=object)[building],
+        'price': price.astype(np.float32),
+        'sqft': sqft.astype(np.float32),
+        'rooms': rng.randint(1, 6, n).astype(np.float32),
+        'price-pred': (price * rng.uniform(0.8, 1.2, n)).astype(np.float32),
+        'diff_from_prediction': rng.normal(0, 0.2, n).astype(np.float32),
+        'Eur/m²': (price / sqft).round().astype(np.float32),
+        'completion_year': rng.randint(2015, 2026, n).astype(np.int16),
+        'scale': rng.uniform(1, 17, n)})
+
+
+@pytest.fixture(scope='session')
+def listings():
+    return synthetic_listings()
+
+
+@pytest.fixture(scope='session')
+def dashboard():
+    with pytest.MonkeyPatch.context() as patch:
+        patch.chdir(ROOT)
+        # model and news load on the warm-up thread, the data callbacks only wait for the data
+        patch.setenv('FAST_BOOT', '1')
+        import app
+        app.warm.wait('data')
+        yield app
@@ -0,0 +1,61 @@
+import json
+
+import numpy as np
+
+from boundaries import BoundaryIndex
+
+
+def star(cx, cy, points=7, outer=1.0, inner=0.4):
+    angles = np.arange(2 * points) * np.pi / points
+    radius = np.where(np.arange(2 * points) % 2, inner, outer)
+    return np.c_[cx + radius * np.cos(angles), cy + radius * np.sin(angles)].tolist()
+
+
+def square(x0, y0, x1, y1):
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]]
+
+
+# a star, a square with a hole and two triangles of one multipolygon, none overlapping
+FEATURES = [
+    ('star', {'type': 'Polygon', 'coordinates': [star(0, 0)]}),
+    ('frame', {'type': 'Polygon', 'coordinates': [square(2, -1, 4, 1), square(2.5, -0.5, 3.5, 0.5)]}),
+    ('islands', {'type': 'MultiPolygon', 'coordinates': [[[[5, -1], [7, -1], [6, 1.5], [5, -1]]],
+                                                         [[[5, 2], [7, 2], [6, 3], [5, 2]]]]}),
+]
+
+
+def contains(rings, x, y):
+    # even-odd rule, one edge at a time
+    inside = False
+    for ring in rings:
+        for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1]):
+            if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                inside = not inside
+    return inside
+
+
+def naive(x, y):
+    for key, geometry in FEATURES:
+        polygons = [geometry['coordinates']] if geometry['type'] == 'Polygon' else geometry['coordinates']
+        if contains([ring for polygon in polygons for ring in polygon], x, y):
+            return key
+    return None
+
+
+def test_assign_matches_point_by_point_test(tmp_path):
+    path = tmp_path / 'regions.geojson'
+    path.write_text(json.dumps({'type': 'FeatureCollection', 'features': [
+        {'type': 'Feature', 'properties': {'AGS': key}, 'geometry': geometry} for key, geometry in FEATURES]}))
+    index = BoundaryIndex.from_geojson(str(path), key='AGS', cell=0.1, chunk=64)
+
+    rng = np.random.RandomState(0)
+    x, y = rng.uniform(-1.5, 8, 5000), rng.uniform(-1.5, 3.5, 5000)
+    result = index.assign(y, x)
+    assert list(result) == [naive(px, py) for px, py in zip(x, y)]
+    assert set(result) == {'star', 'frame', 'islands', None}
+
+
+def test_missing_and_far_coordinates_are_outside():
+    index = BoundaryIndex(['square'], [[np.array(square(0, 0, 1, 1), dtype=float)]])
+    result = index.assign([0.5, np.nan, 0.5, 50.0], [0.5, 0.5, np.nan, 0.5])
+    assert list(result) == ['square', None, None, None]
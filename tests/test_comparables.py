@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from comparables import Comparables
+
+
+@pytest.fixture(scope='module')
+def frame(listings):
+    # the dashboard drops the units without a price
+    return listings[listings['price'].notna()].reset_index(drop=True)
+
+
+def naive(points, position, k):
+    # the k smallest distances from the listing at `position` to all others
+    distances = np.sqrt(((points - points[position]) ** 2).sum(axis=1))
+    return np.sort(np.delete(distances, position))[:k]
+
+
+def test_query_matches_brute_force(frame):
+    comps = Comparables(frame)
+    points = comps.features(frame)
+    for position in np.random.RandomState(0).choice(len(frame), 50, replace=False):
+        positions, distances = comps.query(position, k=5)
+        np.testing.assert_allclose(distances, naive(points, position, 5))
+        # units of one building can be equally far, so the positions may differ from a sort's
+        assert position not in positions and len(set(positions)) == 5
+        np.testing.assert_allclose(np.sqrt(((points[positions] - points[position]) ** 2).sum(axis=1)), distances)
+
+
+def test_added_listings_are_found_before_and_after_the_rebuild(frame):
+    half = len(frame) // 2
+    comps = Comparables(frame.iloc[:half], rebuild_fraction=0.1)
+    points = comps.features(frame)
+
+    # a few listings stay in the buffer next to the tree, more than a tenth of it rebuild the tree
+    for stop, indexed in [(half + 20, half), (len(frame), len(frame))]:
+        comps.add(frame.iloc[len(comps):stop])
+        assert (len(comps), comps._indexed) == (stop, indexed)
+        for position in [0, half + 5, stop - 1]:
+            _, distances = comps.query(position, k=8)
+            np.testing.assert_allclose(distances, naive(points[:stop], position, 8))
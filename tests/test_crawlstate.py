@@ -0,0 +1,40 @@
+import pandas as pd
+
+from crawlstate import CrawlState, digest, merge_by_url
+
+URL = 'https://example.org/neubau/1/'
+
+
+def page(text, ad):
+    # the extracted text and the parts of the page around it that change between crawls
+    return '<html><aside>{}</aside><main>{}</main></html>'.format(ad, text)
+
+
+def test_only_new_and_changed_texts_count_as_changed(tmp_path):
+    path = str(tmp_path / 'crawlstate.csv')
+    state = CrawlState(path)
+    assert state.validators(URL) == {'etag': None, 'last_modified': None}
+    assert state.record(URL, page('3 Zimmer', 'ad 1'), '3 Zimmer', {'etag': '"a"', 'last_modified': None})
+    state.save()
+
+    # a second run: the same page, a new ad around the same text, a new text, a 304
+    state = CrawlState(path)
+    assert state.validators(URL) == {'etag': '"a"', 'last_modified': None}
+    assert not state.record(URL, page('3 Zimmer', 'ad 1'), '3 Zimmer')
+    assert not state.record(URL, page('3 Zimmer', 'ad 2'), '3 Zimmer')
+    assert state.record(URL, page('4 Zimmer', 'ad 2'), '4 Zimmer', {'etag': '"b"'})
+    state.not_modified(URL)
+    assert state.counts == {'not_modified': 1, 'same_page': 1, 'same_text': 1, 'changed': 1, 'new': 0}
+    assert state.changed_df()['url'].tolist() == [URL]
+
+    state.save()
+    row = CrawlState(path).rows[URL]
+    assert row['etag'] == '"b"' and row['text_hash'] == digest('4 Zimmer')
+    assert row['changed_at'] <= row['fetched_at']
+
+
+def test_merge_by_url_replaces_changed_rows():
+    old = pd.DataFrame({'url': ['a', 'b', 'c'], 'text': ['1', '2', '3']})
+    new = pd.DataFrame({'url': ['b', 'd'], 'text': ['2 neu', '4']})
+    merged = merge_by_url(old, new)
+    assert merged.to_dict('list') == {'url': ['a', 'c', 'b', 'd'], 'text': ['1', '3', '2 neu', '4']}
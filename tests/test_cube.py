@@ -0,0 +1,43 @@
+import itertools
+
+import pandas as pd
+import pytest
+
+from cube import DIMENSIONS, Cube, price_band
+
+
+def naive(frame, fixed):
+    selection = frame.assign(price_band=price_band(frame['price']))
+    for dim, value in fixed.items():
+        selection = selection[selection[dim] == value]
+    median = selection['Eur/m²'].astype(float).median()
+    mean = selection['diff_from_prediction'].astype(float).mean()
+    return {'count': len(selection), 'median_eur_m2': None if pd.isna(median) else median,
+            'mean_deviation': None if pd.isna(mean) else round(mean, 4)}
+
+
+def test_cells_match_pandas_filters(listings):
+    stats = Cube.from_frame(listings)
+    for n in range(len(DIMENSIONS) + 1):
+        for dims in itertools.combinations(DIMENSIONS, n):
+            for values in itertools.product(*[stats.values[dim][:2] for dim in dims]):
+                fixed = dict(zip(dims, values))
+                assert stats.cell(**fixed) == pytest.approx(naive(listings, fixed)), fixed
+
+
+def test_rolled_up_and_empty_cells(listings):
+    stats = Cube.from_frame(listings)
+    assert stats.cell(region='All', Wohntyp=None) == pytest.approx(naive(listings, {}))
+    assert stats.cell(region='Hamburg') == {'count': 0, 'median_eur_m2': None, 'mean_deviation': None}
+    with pytest.raises(KeyError):
+        stats.cell(city='Berlin')
+
+
+def test_slice_matches_groupby(listings):
+    stats = Cube.from_frame(listings)
+    selection = listings[listings['region'] == 'Berlin, Stadt']
+    expected = selection.groupby('Wohntyp', observed=True)['Eur/m²'].agg(['size', 'median']).sort_index()
+    rows = stats.slice('Wohntyp', region='Berlin, Stadt')
+    assert [row['Wohntyp'] for row in rows] == list(expected.index)
+    assert [row['count'] for row in rows] == list(expected['size'])
+    assert [row['median_eur_m2'] for row in rows] == pytest.approx(list(expected['median']))
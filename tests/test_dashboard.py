@@ -0,0 +1,98 @@
+import numpy as np
+
+from benchmarks import payloads
+
+FILTERS = payloads.MAP_INPUTS[:7]
+
+
+def dispatch(dashboard, output, inputs, values):
+    response = dashboard.server.test_client().post(
+        '/_dash-update-component', json=payloads.callback_body([output], inputs, values))
+    assert response.status_code == 200
+    return response.get_json()['response'][output[0]][output[1]]
+
+
+def links(component):
+    # hrefs of the links in a rendered component tree, in order
+    if isinstance(component, list):
+        return [href for child in component for href in links(child)]
+    if not isinstance(component, dict):
+        return []
+    own = [component['props']['href']] if component.get('type') == 'A' else []
+    return own + links(component['props'].get('children'))
+
+
+def test_best_deals_match_nsmallest(dashboard):
+    df = dashboard.df
+    for price, cat in [(None, 'All'), ([200000, 600000], 'Eigentumswohnung'), ([100000, 101000], 'All')]:
+        result = dispatch(dashboard, ('best-deals', 'children'), FILTERS, [None, price, None, None, None, cat, None])
+        mask = np.ones(len(df), dtype=bool)
+        if price:
+            mask &= df['price'].between(*price).values
+        if cat != 'All':
+            mask &= (df['Wohntyp'] == cat).values
+        expected = df[mask].nsmallest(dashboard.BEST_DEALS, 'diff_from_prediction')
+        if expected.empty:
+            assert result['props']['children'] == "No listings match the filters"
+        else:
+            assert links(result) == expected['url'].tolist()
+
+
+def test_filtered_rows_are_shared_read_only(dashboard):
+    filters = [None, [200000, 600000], None, [40, 120], None, 'All', None]
+    rows = dashboard.filtered_rows(*filters)
+    assert dashboard.filtered_rows(*[list(f) if isinstance(f, list) else f for f in filters]) is rows
+    assert not rows.flags.writeable
+    df = dashboard.df
+    np.testing.assert_array_equal(rows, np.flatnonzero((df['price'].between(200000, 600000) &
+                                                        df['sqft'].between(40, 120)).values))
+
+
+def test_export_link_is_instrumented(dashboard):
+    href = dispatch(dashboard, ('export-link', 'href'), FILTERS, [None, [200000, 600000], None, None, None,
+                                                                  'Penthouse', None])
+    assert href == '/api/export?price=200000%2C600000&cat=Penthouse'
+    assert ('update_export_link', 'callback') in dashboard.metrics.callback_seconds._series
+
+
+def test_lasso_counts_the_filtered_units_of_the_selected_markers(dashboard):
+    df, groups = dashboard.df, dashboard.project_groups
+    sizes = np.diff(groups.offsets)
+    # a building with several units and one with a single unit
+    selected = [int(np.flatnonzero(sizes >= 5)[0]), int(np.flatnonzero(sizes == 1)[0])]
+    units = np.concatenate([groups.units(g) for g in selected])
+
+    def lasso(filters):
+        response = dashboard.server.test_client().post('/_dash-update-component',
+                                                       json=payloads.lasso_body(selected, filters))
+        assert response.status_code == 200
+        return response.get_json()['response']['histogram']['figure']['data'][0]['x']
+
+    assert len(lasso([None, None, None, None, None, 'All', None])) == len(units)
+    price = [0, int(np.median(df['price'].values[units]))]
+    x = lasso([None, price, None, None, None, 'All', None])
+    expected = df.iloc[units]
+    expected = expected[expected['price'].between(*price)]
+    assert 0 < len(x) < len(units)
+    assert sorted(x) == sorted(expected['Eur/m²'].tolist())
+
+
+def test_unit_list_follows_the_filters(dashboard):
+    df, groups = dashboard.df, dashboard.project_groups
+    group = int(np.flatnonzero(np.diff(groups.offsets) >= 5)[0])
+    units = groups.units(group)
+    prices = df['price'].values[units]
+
+    def unit_list(price):
+        response = dashboard.server.test_client().post('/_dash-update-component', json=payloads.units_body(
+            group, int(units[0]), filters=[None, price, None, None, None, 'All', None]))
+        assert response.status_code == 200
+        return response.get_json()['response']['units']['children']
+
+    assert unit_list(None)[0]['props']['children'] == "{} units at this location".format(len(units))
+    price = [0, int(np.median(prices))]
+    result = unit_list(price)
+    matching = df.iloc[units][df['price'].values[units] <= price[1]].sort_values('price')
+    assert result[0]['props']['children'].startswith("{} unit".format(len(matching)))
+    assert links(result[1]) == matching['url'].tolist()
+    assert unit_list([0, int(prices.min()) - 1])['props']['children'] == "No units at this location match the filters"
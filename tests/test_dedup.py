@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from dedup import find_duplicates
+
+BERLIN = (52.52, 13.40)
+
+
+def listings(n=30, copies=8, seed=0):
+    # n texts of random words, `copies` of them listed a second time under another url at the same place
+    rng = np.random.RandomState(seed)
+    vocabulary = ['wort{}'.format(i) for i in range(800)]
+    texts = [" ".join(rng.choice(vocabulary, 80)) for _ in range(n)]
+    frame = pd.DataFrame({'url': ['https://site-a.de/neubau/{}/'.format(i) for i in range(n)], 'text': texts})
+    again = frame.sample(copies, random_state=seed).assign(url=lambda f: f['url'].str.replace('site-a', 'site-b'))
+    frame = pd.concat([frame, again], ignore_index=True)
+    return frame.assign(latitude=BERLIN[0], longitude=BERLIN[1])
+
+
+def test_exact_copies_match_pandas_duplicated():
+    frame = listings()
+    result = find_duplicates(frame['url'], frame['text'], frame['latitude'], frame['longitude'])
+
+    # equal texts have equal lengths, so the first listing of every text is kept
+    first = frame.groupby('text')['url'].transform('first')
+    expected = first.where(frame['text'].duplicated(keep='first'), None)
+    assert result.tolist() == expected.tolist()
+
+
+def test_units_prices_and_distance_keep_listings_apart():
+    def text(subject):
+        return "Neubau {} mit 24 Eigentumswohnungen, Tiefgarage, Aufzug und Dachterrasse ".format(subject) * 5
+
+    frame = pd.DataFrame({
+        'url': ['https://b.de/neubau/park/wohneinheit-1/', 'https://a.de/neubau/park/',
+                'https://b.de/neubau/park/wohneinheit-2/', 'https://a.de/hafen/', 'https://c.de/hafen/',
+                'https://a.de/markt/', 'https://c.de/markt/'],
+        'text': [text('am Park')] * 3 + [text('am Hafen')] * 2 + [text('am Markt')] * 2,
+        'latitude': [BERLIN[0]] * 6 + [48.14],
+        'longitude': [BERLIN[1]] * 6 + [11.58],
+        'prices': [None] * 3 + ['300.000 EUR - 500.000 EUR', '250.000 EUR - 400.000 EUR', None, None]})
+    result = find_duplicates(frame['url'], frame['text'], frame['latitude'], frame['longitude'], frame['prices'])
+
+    # the unit pages join the project page, which is kept; other price ranges and the same text in
+    # Munich are different listings
+    assert result.tolist() == [frame['url'][1], None, frame['url'][1], None, None, None, None]
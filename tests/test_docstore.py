@@ -0,0 +1,44 @@
+import pandas as pd
+
+from docstore import DocStore
+
+
+def crawl():
+    # two crawls of 50 pages, the second one changes every third page
+    first = pd.DataFrame({'url': ['https://example.org/{}'.format(i) for i in range(50)],
+                          'text': ['Neubau Projekt {} mit {} Wohnungen'.format(i, i % 7) for i in range(50)]})
+    second = first.iloc[::3].assign(text=lambda f: f['text'] + ' (aktualisiert)')
+    return pd.concat([first, second], ignore_index=True)
+
+
+def test_latest_texts_survive_reopening(tmp_path):
+    pages = crawl()
+    with DocStore(str(tmp_path), block_docs=8) as store:
+        store.put_many(pages['url'], pages['text'])
+
+    expected = pages.drop_duplicates('url', keep='last').set_index('url')['text']
+    store = DocStore(str(tmp_path), block_docs=8)
+    assert len(store) == len(expected)
+    assert sorted(store.urls()) == sorted(expected.index)
+    assert [store.get(url) for url in expected.index] == list(expected)
+    assert store.get('https://example.org/missing', '') == ''
+
+    stats = store.stats()
+    assert stats['documents'] == len(expected)
+    assert stats['dead_records'] == len(pages) - len(expected)
+
+
+def test_iter_chunks_matches_the_latest_versions(tmp_path):
+    pages = crawl()
+    store = DocStore(str(tmp_path), block_docs=8)
+    store.put_many(pages['url'], pages['text'])
+
+    chunks = list(store.iter_chunks(chunksize=10))
+    assert all(len(chunk) >= 10 for chunk in chunks[:-1])
+    result = pd.concat(chunks).set_index('url')['text'].sort_index()
+    expected = pages.drop_duplicates('url', keep='last').set_index('url')['text'].sort_index()
+    pd.testing.assert_series_equal(result, expected)
+
+    wanted = list(expected.index[:5])
+    subset = pd.concat(store.iter_chunks(urls=wanted)).set_index('url')['text']
+    pd.testing.assert_series_equal(subset.sort_index(), expected[wanted].sort_index())
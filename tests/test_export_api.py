@@ -0,0 +1,54 @@
+import gzip
+
+import numpy as np
+import pytest
+
+
+def naive(df, price=None, psqm=None, size=None, diff=None, years=None, cat='All', stages=None):
+    mask = np.ones(len(df), dtype=bool)
+    for column, bounds in [('price', price), ('Eur/m²', psqm), ('sqft', size), ('diff_from_prediction', diff)]:
+        if bounds:
+            mask &= df[column].astype(np.float64).between(*bounds).values
+    if cat != 'All':
+        mask &= (df['Wohntyp'] == cat).values
+    if stages is not None:
+        mask &= df['stage'].isin(stages).values
+    if years:
+        scheduled = (df['stage'] == 'Fertigstellung').values
+        mask &= ~scheduled | df['completion_year'].between(*years).values
+    return df[mask]
+
+
+def csv(dashboard, frame):
+    return frame[dashboard.EXPORT_COLUMNS].to_csv(index=False).encode('utf-8')
+
+
+def test_export_matches_pandas_filters(dashboard):
+    client = dashboard.server.test_client()
+    df = dashboard.df
+
+    response = client.get('/api/export')
+    assert response.status_code == 200
+    assert response.data == csv(dashboard, df)
+
+    query = ('/api/export?price=200000,900000&psqm=3000,9000&size=40,120&diff=-0.2,0.3&years=2021,2023'
+             '&cat=Eigentumswohnung&stages=Fertigstellung&stages=Bau+gestartet')
+    expected = naive(df, price=(200000, 900000), psqm=(3000, 9000), size=(40, 120), diff=(-0.2, 0.3),
+                     years=(2021, 2023), cat='Eigentumswohnung', stages=['Fertigstellung', 'Bau gestartet'])
+    assert len(expected)
+    response = client.get(query)
+    assert response.data == csv(dashboard, expected)
+    assert gzip.decompress(client.get(query + '&compression=gzip').data) == csv(dashboard, expected)
+
+    # no stage checked: the header only
+    assert client.get('/api/export?stages=').data == csv(dashboard, df.iloc[:0])
+
+
+@pytest.mark.parametrize('query', ['stages=foo', 'stages=geplant&stages=Baustelle', 'price=1,2,3', 'size=big',
+                                   'compression=zip'])
+def test_invalid_queries_are_rejected(dashboard, query):
+    response = dashboard.server.test_client().get('/api/export?' + query)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+    if query.startswith('stages'):
+        assert response.get_json()['stages'] == dashboard.datamodel.STAGES
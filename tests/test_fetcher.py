@@ -0,0 +1,129 @@
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from fetcher import PageFetcher
+
+PAGES = {
+    '/projekt/1/': '<h1>Projekt 1</h1><p>Projektdetails</p>',
+    '/projekt/2/': '<h1>Projekt 2</h1><p>Projektdetails</p>',
+    # rendered by JavaScript: plain HTTP only gets the empty shell
+    '/app/3/': '<div id="root"></div>',
+}
+MODIFIED = 'Mon, 01 Mar 2021 10:00:00 GMT'
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        # the client port tells the connections apart
+        self.server.requests.append((self.path, self.client_address[1]))
+        body = PAGES.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        data = body.encode('utf-8')
+        etag = '"{}"'.format(hashlib.sha1(data).hexdigest()[:12])
+        if self.headers.get('If-None-Match') == etag or self.headers.get('If-Modified-Since') == MODIFIED:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', MODIFIED)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = HTTPServer(('127.0.0.1', 0), Handler)
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class FakeDriver:
+    # renders every page like the browser would, the JavaScript page included
+
+    def __init__(self, opened):
+        self.opened = opened
+        self.page_source = None
+
+    def get(self, url):
+        self.opened.append(url)
+        self.page_source = '<h1>Projekt 3</h1><p>Projektdetails</p>'
+
+    def quit(self):
+        pass
+
+
+def test_plain_http_pages_are_fetched_once_on_one_session(server):
+    host = '127.0.0.1:{}'.format(server.server_port)
+    base = 'http://' + host
+    fetcher = PageFetcher(markers={host: ['Projektdetails']})
+    assert fetcher.fetch(base + '/projekt/1/') == PAGES['/projekt/1/']
+    assert fetcher.fetch(base + '/projekt/2/') == PAGES['/projekt/2/']
+
+    # both over one kept-alive connection
+    assert [path for path, _ in server.requests] == ['/projekt/1/', '/projekt/2/']
+    assert len({port for _, port in server.requests}) == 1
+    stats = fetcher.stats()[host]
+    assert (stats['pages'], stats['http'], stats['browser']) == (2, 2, 0)
+    fetcher.close()
+
+
+def test_incomplete_pages_go_to_the_browser(server):
+    host = '127.0.0.1:{}'.format(server.server_port)
+    base = 'http://' + host
+    opened = []
+    fetcher = PageFetcher(driver_factory=lambda: FakeDriver(opened), markers={host: ['Projektdetails']},
+                          switch_after=2)
+
+    # without the marker the page is loaded again in the browser, after two of those the host
+    # skips plain HTTP
+    for _ in range(3):
+        assert 'Projekt 3' in fetcher.fetch(base + '/app/3/')
+    assert [path for path, _ in server.requests] == ['/app/3/'] * 2
+    assert opened == [base + '/app/3/'] * 3
+    assert host in fetcher.browser_hosts
+
+    stats = fetcher.stats()[host]
+    assert (stats['pages'], stats['http'], stats['browser']) == (3, 0, 3)
+    fetcher.close()
+
+
+def test_without_a_browser_the_http_result_is_returned(server):
+    base = 'http://127.0.0.1:{}'.format(server.server_port)
+    fetcher = PageFetcher(markers={})
+    assert fetcher.fetch(base + '/missing/') == ''
+    assert fetcher.fetch(base + '/app/3/') == PAGES['/app/3/']
+
+
+def test_unchanged_pages_answer_not_modified(server):
+    host = '127.0.0.1:{}'.format(server.server_port)
+    url = 'http://{}/projekt/1/'.format(host)
+    fetcher = PageFetcher(markers={host: ['Projektdetails']})
+    html, validators = fetcher.fetch_if_changed(url)
+    assert html == PAGES['/projekt/1/'] and validators['last_modified'] == MODIFIED
+
+    assert fetcher.fetch_if_changed(url, **validators) == (None, {'etag': validators['etag'], 'last_modified': None})
+    assert fetcher.fetch_if_changed(url, last_modified=MODIFIED)[0] is None
+    html, _ = fetcher.fetch_if_changed(url, etag='"stale"')
+    assert html == PAGES['/projekt/1/']
+    stats = fetcher.stats()[host]
+    assert (stats['pages'], stats['http'], stats['not_modified']) == (4, 2, 2)
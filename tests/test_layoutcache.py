@@ -0,0 +1,50 @@
+import gzip
+
+import brotli
+import dash
+import dash_core_components as dcc
+import dash_html_components as html
+import pytest
+
+import layoutcache
+
+
+@pytest.fixture(scope='module')
+def served():
+    app = dash.Dash(__name__)
+    app.layout = html.Div([dcc.Graph(id='map', figure={'data': [{'x': list(range(500)), 'y': list(range(500))}]})])
+    raw = layoutcache.serialize(app.layout)
+    layoutcache.init_app(app, layoutcache.compress(raw, brotli_quality=5))
+    return app.server.test_client(), raw
+
+
+@pytest.mark.parametrize('accept, encoding', [('br, gzip', 'br'), ('gzip, deflate', 'gzip'), ('', None),
+                                              ('deflate', None)])
+def test_layout_is_sent_in_the_preferred_encoding(served, accept, encoding):
+    client, raw = served
+    response = client.get('/_dash-layout', headers={'Accept-Encoding': accept})
+    assert response.status_code == 200
+    assert response.headers.get('Content-Encoding') == encoding
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    decode = {'br': brotli.decompress, 'gzip': gzip.decompress, None: bytes}[encoding]
+    assert decode(response.data) == raw
+
+
+def test_revalidation_answers_304_per_encoding(served):
+    client, _ = served
+    etags = {accept: client.get('/_dash-layout', headers={'Accept-Encoding': accept}).headers['ETag']
+             for accept in ['br', 'gzip', '']}
+    assert len(set(etags.values())) == 3
+
+    response = client.get('/_dash-layout', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etags['gzip']})
+    assert response.status_code == 304 and response.data == b''
+    # a validator of another coding does not match
+    response = client.get('/_dash-layout', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etags['br']})
+    assert response.status_code == 200
+
+
+def test_written_variants_are_read_back(tmp_path):
+    variants = layoutcache.compress(b'{"props": {}}')
+    assert layoutcache.read(str(tmp_path)) is None
+    layoutcache.write(variants, str(tmp_path))
+    assert layoutcache.read(str(tmp_path)) == variants
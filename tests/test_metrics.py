@@ -0,0 +1,78 @@
+import time
+
+import dash
+import dash_html_components as html
+from dash.dependencies import Input, Output
+
+import metrics
+
+
+def samples(text, name):
+    # {labels: value} of the lines of one metric in the exposition format
+    result = {}
+    for line in text.splitlines():
+        if line.startswith(name + '{'):
+            labels, value = line[len(name) + 1:].rsplit('} ', 1)
+            result[labels] = float(value)
+    return result
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram('test_seconds', 'Test.', (0.1, 1.0), ('callback',))
+    for value in [0.05, 0.1, 0.5, 3.0]:
+        histogram.observe(value, 'a')
+    histogram.observe(0.2, 'b')
+
+    text = histogram.expose([('worker', 1)])
+    assert text.startswith('# HELP test_seconds Test.\n# TYPE test_seconds histogram\n')
+    assert samples(text, 'test_seconds_bucket') == {
+        'callback="a",worker="1",le="0.1"': 2, 'callback="a",worker="1",le="1.0"': 3,
+        'callback="a",worker="1",le="+Inf"': 4,
+        'callback="b",worker="1",le="0.1"': 0, 'callback="b",worker="1",le="1.0"': 1,
+        'callback="b",worker="1",le="+Inf"': 1}
+    assert samples(text, 'test_seconds_sum') == {'callback="a",worker="1"': 3.65, 'callback="b",worker="1"': 0.2}
+    assert samples(text, 'test_seconds_count') == {'callback="a",worker="1"': 4, 'callback="b",worker="1"': 1}
+
+
+def test_marks_split_the_callback_into_phases():
+    @metrics.instrument
+    def marked_callback():
+        time.sleep(0.02)
+        metrics.mark('filter')
+        time.sleep(0.01)
+        metrics.mark('figure')
+        return 'done'
+
+    assert marked_callback() == 'done'
+    # outside a callback mark does nothing
+    metrics.mark('filter')
+
+    series = metrics.callback_seconds._series
+    phases = {phase: series[('marked_callback', phase)] for phase in ['filter', 'figure', 'callback']}
+    assert all(sum(counts) == 1 for counts, _ in phases.values())
+    assert 0.02 <= phases['filter'][1] < phases['callback'][1]
+    assert 0.01 <= phases['figure'][1] < phases['callback'][1]
+    assert phases['filter'][1] + phases['figure'][1] <= phases['callback'][1]
+
+
+def test_metrics_route_reports_dispatched_callbacks():
+    app = dash.Dash(__name__)
+    app.layout = html.Div([html.Div(id='in', children='x'), html.Div(id='out')])
+
+    @app.callback(Output('out', 'children'), [Input('in', 'children')])
+    @metrics.instrument
+    def echo_callback(value):
+        return value * 1000
+
+    metrics.init_app(app)
+    client = app.server.test_client()
+    client.post('/_dash-update-component', json={
+        'output': 'out.children', 'outputs': {'id': 'out', 'property': 'children'},
+        'inputs': [{'id': 'in', 'property': 'children', 'value': 'x'}], 'changedPropIds': ['in.children']})
+
+    text = client.get('/metrics').get_data(as_text=True)
+    counts = samples(text, 'dash_callback_duration_seconds_count')
+    for phase in ['callback', 'total', 'serialize']:
+        assert sum(v for k, v in counts.items() if 'echo_callback' in k and 'phase="{}"'.format(phase) in k) == 1
+    sizes = {k: v for k, v in samples(text, 'dash_callback_response_bytes_sum').items() if 'echo_callback' in k}
+    assert len(sizes) == 1 and list(sizes.values())[0] > 1000
@@ -0,0 +1,32 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import offload
+
+
+def test_heavy_work_runs_on_at_most_heavy_threads():
+    running, peak, lock = [0], [0], threading.Lock()
+
+    @offload.heavy
+    def work(value):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return threading.current_thread().name, value
+
+    with ThreadPoolExecutor(offload.HEAVY_THREADS + 3) as requests:
+        results = list(requests.map(work, range(offload.HEAVY_THREADS + 3)))
+    assert [value for _, value in results] == list(range(offload.HEAVY_THREADS + 3))
+    assert all(name.startswith('heavy') for name, _ in results)
+    assert peak[0] == offload.HEAVY_THREADS
+
+
+def test_gevent_pool_is_bounded_by_heavy_threads():
+    pytest.importorskip('gevent')
+    assert offload._get_gevent_pool().maxsize == offload.HEAVY_THREADS
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pagedtable import PagedTable, parse_filter
+
+COLUMNS = ['Name', 'region', 'price', 'sqft', 'diff_from_prediction']
+
+
+FILTERS = [
+    ('', lambda f: pd.Series(True, index=f.index)),
+    ('{price} > 500000', lambda f: f['price'] > 500000),
+    ('{sqft} <= 80.5 && {region} = "Berlin, Stadt"',
+     lambda f: (f['sqft'] <= 80.5) & (f['region'] == 'Berlin, Stadt')),
+    ('{Name} icontains berlin 1', lambda f: f['Name'].str.lower().str.contains('berlin 1', regex=False, na=False)),
+    ('{region} != Landkreis München && {diff_from_prediction} ge 0',
+     lambda f: (f['region'] != 'Landkreis München') & (f['diff_from_prediction'] >= 0)),
+]
+
+
+def shown(frame):
+    # the columns of a page as the table gets them: float32 values as their shortest decimals
+    page = frame[COLUMNS].astype({'region': object}).reset_index(drop=True)
+    return page.assign(**{c: [float(str(v)) for v in page[c]] for c in COLUMNS if page[c].dtype == np.float32})
+
+
+@pytest.mark.parametrize('query, mask', FILTERS)
+@pytest.mark.parametrize('sort_by', [None, 'price', 'Name', 'region', 'sqft'])
+@pytest.mark.parametrize('direction', ['asc', 'desc'])
+def test_page_matches_pandas(listings, query, mask, sort_by, direction):
+    table = PagedTable(listings, COLUMNS)
+    rows = np.flatnonzero((listings['price'] < 900000).values)
+    selection = listings.iloc[rows]
+    selection = selection[mask(selection)]
+    if sort_by:
+        selection = selection.sort_values(sort_by, ascending=direction == 'asc', kind='mergesort', na_position='last')
+
+    for page in range(3):
+        result, total = table.page(rows, sort_by and [{'column_id': sort_by, 'direction': direction}], query,
+                                   page=page, size=15)
+        assert total == len(selection)
+        expected = shown(selection.iloc[page * 15:(page + 1) * 15])
+        pd.testing.assert_frame_equal(pd.DataFrame(result, columns=COLUMNS), expected, check_dtype=False)
+
+
+def test_float32_values_are_sent_as_short_decimals(listings):
+    result, _ = PagedTable(listings, COLUMNS).page(size=50)
+    for record, sqft in zip(result, listings['sqft'].to_numpy()[:50]):
+        assert repr(record['sqft']) == str(sqft)
+
+
+@pytest.mark.parametrize('query', ['{price} between 1', 'price > 5', '{Name} > 5'])
+def test_unsupported_filters_raise(listings, query):
+    with pytest.raises(ValueError):
+        PagedTable(listings, COLUMNS).select(None, query)
+
+
+def test_parse_filter():
+    assert parse_filter('{price} >= 500000 && {Name} contains "Haus am See"') == [
+        ('price', '>=', '500000'), ('Name', 'contains', 'Haus am See')]
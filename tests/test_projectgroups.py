@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from projectgroups import FIRST, ProjectGroups
+
+
+@pytest.fixture(scope='module')
+def frame(listings):
+    # the dashboard drops the units without a price
+    return listings[listings['price'].notna()].reset_index(drop=True)
+
+
+def naive(frame, rows):
+    # one row per location among `rows` with a groupby, in the order the locations first appear in the table
+    selection = frame.assign(group=frame.groupby(['latitude', 'longitude'], sort=False).ngroup(),
+                             row=np.arange(len(frame))).iloc[rows]
+    grouped = selection.groupby('group')
+    points = grouped[['row'] + FIRST].first()
+    points['units'] = grouped.size()
+    for column, name in [('price', 'price'), ('sqft', 'sqft'), ('price-pred', 'pred')]:
+        points[name + '_min'] = grouped[column].min()
+        points[name + '_max'] = grouped[column].max()
+    points['Eur/m²'] = np.round(grouped['Eur/m²'].sum().astype(float) / points['units'])
+    points['diff_from_prediction'] = grouped['diff_from_prediction'].sum().astype(float) / points['units']
+    points['scale'] = grouped['scale'].max()
+    return points.reset_index()
+
+
+@pytest.mark.parametrize('selection', ['all', 'some', 'none'])
+def test_aggregate_matches_groupby(frame, selection):
+    groups = ProjectGroups.from_frame(frame)
+    rows = {'all': None, 'some': np.flatnonzero(frame['price'].values < 400000), 'none': np.empty(0, dtype=np.int64)}
+    result = groups.aggregate(frame, rows[selection])
+    expected = naive(frame, np.arange(len(frame)) if rows[selection] is None else rows[selection])
+    pd.testing.assert_frame_equal(result, expected[list(result.columns)], check_dtype=False, rtol=1e-6)
+
+
+def test_units_of_a_group(frame):
+    groups = ProjectGroups.from_frame(frame)
+    group_of = frame.groupby(['latitude', 'longitude'], sort=False).ngroup().to_numpy()
+    assert len(groups) == group_of.max() + 1
+    for group in range(len(groups)):
+        np.testing.assert_array_equal(groups.units(group), np.flatnonzero(group_of == group))
+
+
+def test_units_of_several_groups(frame):
+    groups = ProjectGroups.from_frame(frame)
+    group_of = frame.groupby(['latitude', 'longitude'], sort=False).ngroup().to_numpy()
+    selected = [7, 3, 3, len(groups) - 1]
+    np.testing.assert_array_equal(groups.units_of(selected + [len(groups), -1]),
+                                  np.flatnonzero(np.isin(group_of, selected)))
+    assert groups.units_of([]).dtype == np.int32 and not len(groups.units_of([len(groups)]))
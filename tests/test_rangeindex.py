@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from rangeindex import RangeIndex, SortedColumn
+
+# a float32 column with NaN, one without and an integer column
+COLUMNS = ['price', 'sqft', 'completion_year']
+
+
+def naive(frame, ranges):
+    # the exact comparison of every row in float64, NaN outside every range
+    mask = np.ones(len(frame), dtype=bool)
+    for column, (low, high) in ranges.items():
+        values = frame[column].astype(np.float64)
+        if low is not None:
+            mask &= values >= low
+        if high is not None:
+            mask &= values <= high
+    return np.flatnonzero(mask)
+
+
+def test_select_matches_pandas_masks(listings):
+    frame = listings[COLUMNS]
+    rng = np.random.RandomState(1)
+    quantiles = {column: frame[column].quantile(np.linspace(0, 1, 41)).values for column in frame}
+    index = RangeIndex(frame, list(frame))
+    for _ in range(300):
+        # narrow and wide ranges, open sides and bounds between float32 values (31.29 ...)
+        ranges = {}
+        for column in rng.choice(list(frame), rng.randint(1, 4), replace=False):
+            low, high = sorted(rng.choice(quantiles[column], 2))
+            low, high = [None if rng.rand() < 0.2 else round(v + rng.uniform(-1, 1), 2) for v in (low, high)]
+            ranges[column] = (low, high)
+        rows = index.select(ranges)
+        expected = naive(frame, ranges)
+        if rows is None:
+            assert all(low is None and high is None for low, high in ranges.values())
+        else:
+            np.testing.assert_array_equal(rows, expected)
+
+
+def test_wide_ranges_over_few_distinct_values(listings):
+    # every value spans several rank buckets, ranges end inside, at and between them
+    rooms = listings[['rooms']]
+    index = RangeIndex(rooms, ['rooms'])
+    for low in [None, 0.5, 1, 2, 2.5, 5]:
+        for high in [None, 1, 2.5, 4, 5, 7]:
+            rows = index.select({'rooms': (low, high)})
+            if low is None and high is None:
+                assert rows is None
+            else:
+                np.testing.assert_array_equal(rows, naive(rooms, {'rooms': (low, high)}))
+
+
+def test_select_without_ranges_is_none(listings):
+    assert RangeIndex(listings, ['price']).select({'price': (None, None)}) is None
+
+
+@pytest.mark.parametrize('column', ['price', 'completion_year'])
+@pytest.mark.parametrize('k', [1, 25, 5000])
+def test_smallest_matches_nsmallest(listings, column, k):
+    # partial selection among some rows, more rows than k or fewer, NaN never among the smallest
+    values = listings[column]
+    sorted_column = SortedColumn(values.to_numpy())
+    rows = np.flatnonzero(listings['Wohntyp'].to_numpy() == 'Penthouse')
+    for selection in (None, rows):
+        subset = values if selection is None else values.iloc[selection]
+        expected = subset.reset_index(drop=True).dropna().nsmallest(k, keep='first').index
+        result = sorted_column.smallest(selection, k)
+        # equal values may come in another order, the values may not
+        np.testing.assert_array_equal(values.to_numpy()[result], subset.to_numpy()[expected])
@@ -0,0 +1,60 @@
+import pandas as pd
+
+from regions import RegionTable
+
+# GeoNames rows: country, postal code, place, state, state code, county, county code, community,
+# community code, latitude, longitude, accuracy; 10115 spans two places
+GEONAMES = """\
+DE\t10115\tBerlin\tBerlin\tBE\t\t00\tBerlin, Stadt\t11000\t52.5323\t13.3846\t6
+DE\t10115\tBerlin Mitte\tBerlin\tBE\t\t00\tBerlin, Stadt\t11000\t52.5323\t13.3846\t6
+DE\t85221\tDachau\tBayern\tBY\tOberbayern\t091\tLandkreis Dachau\t9174\t48.2603\t11.4342\t4
+DE\t04109\tLeipzig\tSachsen\tSN\t\t00\tKreisfreie Stadt Leipzig\t14713\t51.3396\t12.3713\t4
+"""
+
+
+def table(tmp_path):
+    path = tmp_path / 'DE.txt'
+    path.write_text(GEONAMES, encoding='utf-8')
+    return RegionTable.from_geonames(str(path))
+
+
+def test_resolve_matches_a_merge(tmp_path):
+    regions = table(tmp_path)
+    codes = pd.Series(['85221', '99999', '04109', None, '10115', '85221'], index=list('abcdef'))
+    result = regions.resolve(codes)
+
+    expected = pd.DataFrame({'postal_code': codes}).merge(
+        regions.table, left_on='postal_code', right_index=True, how='left').drop(columns='postal_code')
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+    assert result.loc['e', 'region'] == 'Berlin, Stadt'
+    assert result[['region', 'is_lk']].loc[['b', 'd']].isna().all(axis=None)
+
+
+def test_resolve_codes_of_boundaries(tmp_path):
+    regions = table(tmp_path)
+    result = regions.resolve_codes(['09174', '11000', '05315', None])
+    assert result['region'].tolist()[:2] == ['Landkreis Dachau', 'Berlin, Stadt']
+    assert result['is_lk'].tolist()[:2] == [True, False]
+    assert result[2:].isna().all(axis=None)
+
+
+def test_postal_codes_of_nominatim_addresses():
+    locations = ["11, Gubener Straße, Friedrichshain, Friedrichshain-Kreuzberg, Berlin, 10243, Deutschland",
+                 "Ludwigstraße, Dachau, Landkreis Dachau, Bayern, 85221, Deutschland",
+                 "Leipzig, Sachsen, Deutschland", None]
+    assert RegionTable.postal_codes(locations).tolist()[:2] == ['10243', '85221']
+    assert RegionTable.postal_codes(locations)[2:].isna().all()
+
+
+def test_is_lk_falls_back_to_the_name(tmp_path):
+    regions = table(tmp_path)
+    assert regions.is_lk('Landkreis Dachau') and not regions.is_lk('Berlin, Stadt')
+    assert regions.is_lk('Landkreis Unbekannt') and not regions.is_lk('other')
+
+
+def test_csv_round_trip(tmp_path):
+    regions = table(tmp_path)
+    regions.to_csv(str(tmp_path / 'plz_regions.csv'))
+    loaded = RegionTable.from_csv(str(tmp_path / 'plz_regions.csv'))
+    pd.testing.assert_frame_equal(loaded.table, regions.table, check_dtype=False)
+    assert loaded.table.index.tolist() == ['04109', '10115', '85221']
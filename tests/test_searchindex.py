@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from searchindex import SearchIndex, tokenize
+
+COLUMNS = ['Name', 'Address', 'region']
+
+
+def naive(frame, query):
+    # rows with a word starting with every word of the query, in any of the columns
+    words = [set(tokenize(" ".join(str(v) for v in row if v == v))) for row in frame[COLUMNS].values]
+    return np.array([row for row, text in enumerate(words)
+                     if all(any(w.startswith(q) for w in text) for q in tokenize(query))], dtype=np.int64)
+
+
+@pytest.mark.parametrize('query', ['berl', 'Berlin Stadt', 'muller', 'MÜLLERSTR', 'heidestrasse', 'ber str 1',
+                                   'stadt leipzig', 'bernkastel wittlich', 'nichts', 'am park', '1'])
+def test_search_matches_a_scan(listings, query):
+    index = SearchIndex.from_frame(listings, COLUMNS)
+    np.testing.assert_array_equal(index.search(query), naive(listings, query))
+
+
+def test_complete_orders_words_by_rows(listings):
+    index = SearchIndex.from_frame(listings, COLUMNS)
+    words = pd.Series([w for row in listings[COLUMNS].values
+                       for w in set(tokenize(" ".join(str(v) for v in row if v == v)))])
+    counts = words[words.str.startswith('ber')].value_counts()
+    completions = index.complete('Ber', limit=100)
+    assert sorted(completions) == sorted(counts.index)
+    assert [counts[c] for c in completions] == sorted(counts, reverse=True)
+
+    # with several words only completions that still match something
+    for completion in index.complete('muller ber'):
+        assert len(naive(listings, completion))
+    assert index.complete('berlin ') == []
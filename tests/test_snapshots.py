@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from snapshots import SnapshotStore
+
+DATES = ['2021-01-01', '2021-02-01', '2021-03-01']
+
+
+@pytest.fixture
+def crawls(listings):
+    # three crawls of the same units, every fifth price changes from one crawl to the next
+    frame = listings[['url', 'Name', 'region', 'Wohntyp', 'price', 'sqft']].assign(
+        unit_id=listings.groupby('url').cumcount() + 1)
+    crawls = [frame]
+    for _ in DATES[1:]:
+        price = crawls[-1]['price'].copy()
+        price.iloc[::5] += 10000
+        crawls.append(crawls[-1].assign(price=price))
+    return crawls
+
+
+@pytest.fixture
+def store(tmp_path, crawls):
+    store = SnapshotStore(str(tmp_path))
+    for date, crawl in zip(DATES, crawls):
+        store.append(crawl, date)
+    return store
+
+
+def test_read_matches_pandas_filters(store, crawls):
+    assert store.dates() == DATES
+    where = {'region': ['Berlin, Stadt', 'Landkreis München'], 'price': (200000, 500000), 'Wohntyp': 'Penthouse'}
+    result = store.read(['url', 'unit_id', 'price'], since='2021-02-01', where=where)
+
+    expected = []
+    for date, crawl in zip(DATES[1:], crawls[1:]):
+        mask = (crawl['region'].isin(where['region']) & crawl['price'].between(*where['price']) &
+                (crawl['Wohntyp'] == 'Penthouse'))
+        expected.append(crawl[mask][['url', 'unit_id', 'price']].assign(date=pd.Timestamp(date)))
+    expected = pd.concat(expected, ignore_index=True)[['date', 'url', 'unit_id', 'price']]
+    assert len(expected)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_partitions_that_cannot_match_are_skipped(store, monkeypatch):
+    loaded = []
+    load = SnapshotStore._load
+    monkeypatch.setattr(SnapshotStore, '_load',
+                        lambda self, date, entry: loaded.append(date) or load(self, date, entry))
+    assert store.read(['price'], where={'region': 'Hamburg'}).empty
+    assert store.read(['price'], where={'price': (1e9, None)}).empty
+    assert loaded == []
+
+
+def test_changes_and_history(store, crawls):
+    changes = store.changes()
+    changed = crawls[0].iloc[::5]
+    changed = changed[changed['price'].notna()]
+    assert len(changes) == 2 * len(changed)
+    assert np.allclose(changes['price'] - changes['previous'], 10000)
+    assert set(changes['date']) == {pd.Timestamp(d) for d in DATES[1:]}
+
+    url = changed['url'].iloc[0]
+    history = store.history(url)
+    units = crawls[0][crawls[0]['url'] == url]
+    assert len(history) == len(DATES) * len(units)
+    assert history['unit_id'].is_monotonic_increasing
+    first = units.index[0]
+    assert history['price'].tolist()[:len(DATES)] == [crawl.loc[first, 'price'] for crawl in crawls]
+
+
+def test_a_rewritten_day_replaces_its_snapshot(store, crawls):
+    store.append(crawls[0].iloc[:10], DATES[-1])
+    assert store.dates() == DATES
+    assert len(store.read(['url'], since=DATES[-1])) == 10
@@ -0,0 +1,69 @@
+import sys
+import threading
+
+import flask
+import pytest
+
+from warmup import NotReady, Warmup, lazy_import
+
+
+def test_steps_run_in_order_and_report_failures():
+    warm, ran = Warmup(), []
+
+    @warm.step('data')
+    def load_data():
+        ran.append('data')
+        return {'rows': 3}
+
+    @warm.step('model')
+    def load_model():
+        ran.append('model')
+        raise IOError('model.pkl missing')
+
+    assert not warm.ready() and warm.status()['steps']['data'] == {'state': 'pending'}
+    warm.start(background=False)
+    assert ran == ['data', 'model']
+
+    steps = warm.status()['steps']
+    assert steps['data']['state'] == 'ready' and steps['data']['rows'] == 3
+    assert steps['model'] == {'state': 'failed', 'error': repr(IOError('model.pkl missing'))}
+    assert warm.ready('data') and not warm.ready()
+    warm.wait('data')
+    with pytest.raises(NotReady):
+        warm.wait('model')
+
+    # finished steps do not run again
+    warm.run()
+    assert ran == ['data', 'model']
+
+
+def test_background_start_and_readiness_routes():
+    warm, release = Warmup(), threading.Event()
+
+    @warm.step('data')
+    def load_data():
+        release.wait(5)
+
+    server = flask.Flask(__name__)
+    warm.init_app(server)
+    client = server.test_client()
+
+    warm.start(background=True)
+    with pytest.raises(NotReady):
+        warm.wait('data', timeout=0.01)
+    assert client.get('/healthz').get_json() == {'status': 'ok'}
+    response = client.get('/readyz')
+    assert response.status_code == 503 and response.get_json()['steps']['data']['state'] == 'running'
+
+    release.set()
+    warm.wait('data', timeout=5)
+    response = client.get('/readyz')
+    assert response.status_code == 200 and response.get_json()['ready']
+
+
+def test_lazy_import_waits_for_the_first_attribute():
+    sys.modules.pop('colorsys', None)
+    colorsys = lazy_import('colorsys')
+    assert 'colorsys' not in sys.modules
+    assert colorsys.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert 'colorsys' in sys.modules
@@ -0,0 +1,101 @@
+import importlib
+import logging
+import threading
+import time
+
+import flask
+
+# Start-up work of the dashboard (data, model, news) as named steps. Normally the steps run while
+# app.py is imported, in fast-boot mode they run on a background thread so the worker serves
+# requests right away; callbacks wait for the step they depend on.
+
+log = logging.getLogger(__name__)
+
+
+class LazyModule:
+    # stands in for a module until the first attribute access imports it
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            # import_module is thread safe and returns the cached module after the first call
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+def lazy_import(name):
+    return LazyModule(name)
+
+
+class NotReady(Exception):
+    pass
+
+
+class Warmup:
+
+    def __init__(self):
+        self._steps = []
+        self._done = {}
+        self._status = {}
+        self._started = None
+
+    # decorator registering a step, steps run in the order they are registered
+    def step(self, name):
+        def register(func):
+            self._steps.append((name, func))
+            self._done[name] = threading.Event()
+            self._status[name] = {'state': 'pending'}
+            return func
+        return register
+
+    def _run_step(self, name, func):
+        self._status[name] = {'state': 'running'}
+        t = time.perf_counter()
+        try:
+            info = func()
+        except Exception as e:
+            log.exception("warm-up step %s failed", name)
+            self._status[name] = {'state': 'failed', 'error': repr(e)}
+        else:
+            # a step may return a dict of facts worth reporting (sizes, counts)
+            self._status[name] = dict(info or {}, state='ready', seconds=round(time.perf_counter() - t, 3))
+        self._done[name].set()
+
+    def run(self, names=None):
+        for name, func in self._steps:
+            if (names is None or name in names) and not self._done[name].is_set():
+                self._run_step(name, func)
+
+    def start(self, background):
+        self._started = time.time()
+        if background:
+            threading.Thread(target=self.run, name="warmup", daemon=True).start()
+        else:
+            self.run()
+
+    def wait(self, name, timeout=None):
+        if not self._done[name].wait(timeout):
+            raise NotReady(name)
+        if self._status[name]['state'] != 'ready':
+            raise NotReady(name)
+
+    def ready(self, name=None):
+        names = [name] if name else self._done
+        return all(self._status[n]['state'] == 'ready' for n in names)
+
+    def status(self):
+        return {'ready': self.ready(), 'started': self._started, 'steps': dict(self._status)}
+
+    def init_app(self, server):
+        @server.route("/healthz")
+        def _healthz():
+            # liveness: the worker answers requests, whatever the warm-up state
+            return flask.jsonify(status="ok")
+
+        @server.route("/readyz")
+        def _readyz():
+            status = self.status()
+            return flask.jsonify(status), 200 if status['ready'] else 503
@@ -0,0 +1,92 @@
+import csv
+import hashlib
+import os
+import time
+
+import pandas as pd
+
+# Per-url crawl bookkeeping for change-aware recrawls: the validators the server sent (ETag,
+# Last-Modified), hashes of the raw page and of the extracted text, and when the url was last
+# fetched and last changed. Only urls whose extracted text changed (or that are new) go on to
+# cleaning, geocoding and scoring in 03_feature_engineering, the texts themselves are kept in
+# the page store (docstore.py).
+
+FIELDS = ['url', 'etag', 'last_modified', 'page_hash', 'text_hash', 'fetched_at', 'changed_at']
+
+
+def digest(text):
+    return hashlib.sha1((text or "").encode('utf-8')).hexdigest()
+
+
+def now():
+    return time.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+class CrawlState:
+
+    def __init__(self, path='crawlstate.csv'):
+        self.path = path
+        self.rows = {}
+        if os.path.exists(path):
+            with open(path, newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    self.rows[row['url']] = row
+        self.changed = []  # urls of this run's new or changed pages
+        self.counts = {'not_modified': 0, 'same_page': 0, 'same_text': 0, 'changed': 0, 'new': 0}
+
+    def validators(self, url):
+        # keyword arguments for PageFetcher.fetch_if_changed
+        row = self.rows.get(url, {})
+        return {'etag': row.get('etag') or None, 'last_modified': row.get('last_modified') or None}
+
+    def not_modified(self, url):
+        self.rows[url]['fetched_at'] = now()
+        self.counts['not_modified'] += 1
+
+    def record(self, url, page_html, text, validators=None):
+        # returns True when the text is new or differs from the last crawl
+        validators = validators or {}
+        stamp = now()
+        row = self.rows.get(url)
+        if row is None:
+            row = self.rows[url] = {'url': url, 'text_hash': None, 'changed_at': stamp}
+            self.counts['new'] += 1
+            changed = True
+        elif row['page_hash'] == digest(page_html):
+            self.counts['same_page'] += 1
+            changed = False
+        elif row['text_hash'] == digest(text):
+            self.counts['same_text'] += 1
+            changed = False
+        else:
+            self.counts['changed'] += 1
+            changed = True
+
+        row.update(etag=validators.get('etag') or '', last_modified=validators.get('last_modified') or '',
+                   page_hash=digest(page_html), text_hash=digest(text), fetched_at=stamp)
+        if changed:
+            row['changed_at'] = stamp
+            self.changed.append(url)
+        return changed
+
+    def changed_df(self):
+        return pd.DataFrame({'url': self.changed})
+
+    def save(self):
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            for url in sorted(self.rows):
+                writer.writerow({k: self.rows[url].get(k, '') for k in FIELDS})
+        os.replace(tmp, self.path)
+
+    def report(self):
+        print("{} urls known, this run: {}".format(len(self.rows), ", ".join(
+            "{} {}".format(v, k.replace('_', ' ')) for k, v in self.counts.items())))
+
+
+def merge_by_url(old, new):
+    # rows of `new` replace the rows of `old` with the same url, new urls are appended
+    old = old[~old['url'].isin(new['url'])]
+    return pd.concat([old, new], ignore_index=True, sort=False)
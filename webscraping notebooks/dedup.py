@@ -0,0 +1,122 @@
+import zlib
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+# Near-duplicate listings across sources (the same project on neubaukompass, howoge and
+# wuestenrot, or under a project and a wohneinheit url). Texts are cut into word shingles,
+# summarized as MinHash signatures and bucketed per band of the signature (LSH), so only
+# listings sharing a bucket are compared instead of all pairs. The geocoded points decide the
+# borderline cases: similar text at the same place is one listing, at different places it is
+# only the same template.
+
+# universal hashing (a * x + b) mod p with a Mersenne prime, a * x stays below 2**62
+_PRIME = (1 << 31) - 1
+
+
+def shingles(text, k=5):
+    words = str(text).lower().split()
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    grams = {" ".join(words[i:i + k]) for i in range(max(1, len(words) - k + 1))}
+    return np.fromiter((zlib.crc32(g.encode('utf-8')) % _PRIME for g in grams), dtype=np.uint64, count=len(grams))
+
+
+class MinHasher:
+
+    def __init__(self, num_perm=128, seed=1):
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, _PRIME, size=num_perm).astype(np.uint64)[:, None]
+        self.b = rng.randint(0, _PRIME, size=num_perm).astype(np.uint64)[:, None]
+        self.num_perm = num_perm
+
+    def signature(self, hashes):
+        # one universal hash per permutation, the signature keeps the minimum over all shingles
+        if len(hashes) == 0:
+            return None
+        return ((self.a * hashes[None, :] + self.b) % _PRIME).min(axis=1)
+
+
+def candidate_pairs(signatures, bands, rows):
+    # pairs of documents that agree on all rows of at least one band
+    pairs = set()
+    for band in range(bands):
+        buckets = defaultdict(list)
+        for i, sig in enumerate(signatures):
+            if sig is not None:
+                buckets[sig[band * rows:(band + 1) * rows].tobytes()].append(i)
+        for members in buckets.values():
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    pairs.add((members[x], members[y]))
+    return pairs
+
+
+def coordinates(values):
+    # floats from the geocoded columns, which may still be strings like ' 13.44'
+    return pd.to_numeric(pd.Series(list(values)).astype(str).str.strip(), errors='coerce').values
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0 * np.arcsin(np.sqrt(h))
+
+
+def find_duplicates(urls, texts, latitude=None, longitude=None, prices=None, num_perm=128, bands=32,
+                    threshold=0.6, strict=0.9, near_km=0.3, max_km=2.0):
+    """Returns a Series aligned with `urls`: the url a listing duplicates, None for kept listings.
+
+    Pairs with an estimated Jaccard similarity of at least `strict` are duplicates unless their
+    points are more than `max_km` apart; between `threshold` and `strict` the points have to be
+    known and within `near_km`. Listings with different non-empty `prices` (the scraped price
+    range) and two wohneinheit pages are different units and never merged. Of every group the listing with the longest
+    text is kept, project pages before wohneinheit pages.
+    """
+    index = urls.index if isinstance(urls, pd.Series) else None
+    urls = list(urls)
+    texts = ["" if pd.isna(t) else str(t) for t in texts]
+    n = len(urls)
+    rows = num_perm // bands
+
+    hasher = MinHasher(num_perm)
+    signatures = [hasher.signature(shingles(t)) for t in texts]
+    lat = np.full(n, np.nan) if latitude is None else coordinates(latitude)
+    lon = np.full(n, np.nan) if longitude is None else coordinates(longitude)
+    prices = [None] * n if prices is None else [p if isinstance(p, str) and p.strip() else None for p in prices]
+
+    parent = list(range(n))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in candidate_pairs(signatures, bands, rows):
+        if prices[i] and prices[j] and prices[i] != prices[j]:
+            continue
+        if "wohneinheit" in urls[i] and "wohneinheit" in urls[j]:
+            # two unit pages are two units, even with the same specs (e.g. on different floors)
+            continue
+        similarity = np.mean(signatures[i] == signatures[j])
+        if similarity < threshold:
+            continue
+        distance = haversine_km(lat[i], lon[i], lat[j], lon[j])
+        known = not np.isnan(distance)
+        if similarity >= strict and (not known or distance <= max_km) or known and distance <= near_km:
+            parent[find(i)] = find(j)
+
+    groups = defaultdict(list)
+    for i in range(n):
+        groups[find(i)].append(i)
+
+    duplicate_of = [None] * n
+    for members in groups.values():
+        if len(members) > 1:
+            keep = min(members, key=lambda i: ("wohneinheit" in urls[i], -len(texts[i]), i))
+            for i in members:
+                if i != keep:
+                    duplicate_of[i] = urls[keep]
+    return pd.Series(duplicate_of, index=index, dtype=object)
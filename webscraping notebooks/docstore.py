@@ -0,0 +1,152 @@
+import csv
+import json
+import os
+from collections import OrderedDict
+
+import pandas as pd
+import zstandard
+
+# Append-only store for page texts. Texts are written in blocks of a few dozen documents, each
+# block is one zstd frame appended to the current segment file (segment-00000.zst, ...), and
+# index.csv maps every url to the block and position of its latest version. One text is read
+# by decompressing a single block, iter_chunks streams the store segment by segment, so no
+# notebook has to hold the whole corpus in memory.
+
+INDEX_FIELDS = ['url', 'segment', 'offset', 'length', 'item']
+
+
+class DocStore:
+
+    def __init__(self, directory, level=10, block_docs=64, segment_bytes=256 * 2 ** 20, cache_blocks=8):
+        self.directory = directory
+        self.block_docs = block_docs
+        self.segment_bytes = segment_bytes
+        self.cache_blocks = cache_blocks
+        os.makedirs(directory, exist_ok=True)
+
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+        self._index = {}  # url -> (segment, offset, length, item)
+        self._records = 0
+        self._pending = OrderedDict()  # url -> text, not yet written
+        self._cache = OrderedDict()  # (segment, offset) -> decoded block
+
+        index_path = os.path.join(directory, 'index.csv')
+        if os.path.exists(index_path):
+            with open(index_path, newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    # later lines win, older versions of a url stay in the segments as dead records
+                    self._index[row['url']] = (int(row['segment']), int(row['offset']), int(row['length']),
+                                               int(row['item']))
+                    self._records += 1
+        self._segment = max([s for s, _, _, _ in self._index.values()], default=0)
+
+    def segment_path(self, segment):
+        return os.path.join(self.directory, 'segment-{:05d}.zst'.format(segment))
+
+    def __len__(self):
+        return len(self._index) + sum(1 for url in self._pending if url not in self._index)
+
+    def __contains__(self, url):
+        return url in self._pending or url in self._index
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+    def urls(self):
+        return list(self._index) + [url for url in self._pending if url not in self._index]
+
+    def put(self, url, text):
+        self._pending.pop(url, None)
+        self._pending[url] = text if isinstance(text, str) else ""
+        if len(self._pending) >= self.block_docs:
+            self.flush()
+
+    def put_many(self, urls, texts):
+        for url, text in zip(urls, texts):
+            self.put(url, text)
+
+    def flush(self):
+        if not self._pending:
+            return
+        path = self.segment_path(self._segment)
+        if os.path.exists(path) and os.path.getsize(path) >= self.segment_bytes:
+            self._segment += 1
+            path = self.segment_path(self._segment)
+
+        urls = list(self._pending)
+        frame = self._compressor.compress(json.dumps(list(self._pending.values())).encode('utf-8'))
+        with open(path, 'ab') as f:
+            offset = f.tell()
+            f.write(frame)
+
+        # the index line is written after the data, a crash in between leaves only unreferenced bytes
+        index_path = os.path.join(self.directory, 'index.csv')
+        new_index = not os.path.exists(index_path)
+        with open(index_path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            if new_index:
+                writer.writerow(INDEX_FIELDS)
+            for item, url in enumerate(urls):
+                entry = (self._segment, offset, len(frame), item)
+                writer.writerow((url,) + entry)
+                self._index[url] = entry
+        self._records += len(urls)
+        self._pending.clear()
+
+    def _block(self, segment, offset, length):
+        key = (segment, offset)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        with open(self.segment_path(segment), 'rb') as f:
+            f.seek(offset)
+            block = json.loads(self._decompressor.decompress(f.read(length)))
+        self._cache[key] = block
+        if len(self._cache) > self.cache_blocks:
+            self._cache.popitem(last=False)
+        return block
+
+    def get(self, url, default=None):
+        if url in self._pending:
+            return self._pending[url]
+        if url not in self._index:
+            return default
+        segment, offset, length, item = self._index[url]
+        return self._block(segment, offset, length)[item]
+
+    def texts(self, urls, default=None):
+        # texts in the order of `urls`, neighbouring urls usually share a cached block
+        for url in urls:
+            yield self.get(url, default)
+
+    def iter_chunks(self, chunksize=1000, urls=None):
+        # DataFrames (url, text) of the latest versions, read in file order; `urls` restricts the output
+        self.flush()
+        wanted = None if urls is None else set(urls)
+        blocks = {}
+        for url, (segment, offset, length, item) in self._index.items():
+            if wanted is None or url in wanted:
+                blocks.setdefault((segment, offset, length), []).append((item, url))
+
+        chunk_urls, chunk_texts = [], []
+        for (segment, offset, length), items in sorted(blocks.items()):
+            block = self._block(segment, offset, length)
+            for item, url in items:
+                chunk_urls.append(url)
+                chunk_texts.append(block[item])
+            if len(chunk_urls) >= chunksize:
+                yield pd.DataFrame({'url': chunk_urls, 'text': chunk_texts})
+                chunk_urls, chunk_texts = [], []
+        if chunk_urls:
+            yield pd.DataFrame({'url': chunk_urls, 'text': chunk_texts})
+
+    def stats(self):
+        self.flush()
+        segments = sorted({s for s, _, _, _ in self._index.values()})
+        size = sum(os.path.getsize(self.segment_path(s)) for s in segments)
+        return {'documents': len(self._index), 'dead_records': self._records - len(self._index),
+                'segments': len(segments), 'mb': round(size / 2 ** 20, 2)}
@@ -0,0 +1,180 @@
+import time
+from collections import defaultdict
+from queue import Queue
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Page acquisition for the text scraper: every page is loaded exactly once. Hosts are fetched
+# with plain HTTP on a persistent session per host (connection reuse, consent cookies kept);
+# only hosts whose pages need JavaScript go through a small pool of headless browsers, and
+# the cookie banner is clicked once per browser and host instead of on every page.
+
+USER_AGENT = ('Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) '
+              'Chrome/88.0.4324.96 Safari/537.36')
+
+# text that is present once a listing page is rendered, a plain HTTP response without it
+# means the host needs a browser
+MARKERS = {
+    'www.howoge.de': ['Daten und Fakten'],
+    'www.neubaukompass.de': ['Projektdetails', '<h1'],
+    'www.whs-wuestenrot.de': ['headlineContainer'],
+}
+
+# css selector of the cookie banner button per host
+CONSENT_BUTTONS = {
+    'www.neubaukompass.de': '.btn-cookies-accept-all',
+    'www.whs-wuestenrot.de': '#uc-btn-accept-banner',
+}
+
+
+def host_of(url):
+    return urlparse(url).netloc
+
+
+class PageFetcher:
+
+    def __init__(self, driver_factory=None, browsers=1, browser_hosts=(), markers=MARKERS,
+                 consent_buttons=CONSENT_BUTTONS, min_delay=0.0, timeout=30, switch_after=3):
+        # driver_factory: callable returning a new selenium webdriver, only called when a page
+        # really needs a browser; browser_hosts: hosts known to need JavaScript; switch_after: pages
+        # that only rendered in the browser before a host skips plain HTTP altogether
+        self.driver_factory = driver_factory
+        self.browsers = browsers
+        self.browser_hosts = set(browser_hosts)
+        self.markers = markers
+        self.consent_buttons = consent_buttons
+        self.min_delay = min_delay
+        self.timeout = timeout
+        self.switch_after = switch_after
+
+        self._sessions = {}
+        self._drivers = Queue()
+        self._created = 0
+        self._consented = set()  # (id(driver), host)
+        self._last = {}
+        self._js_only = defaultdict(int)
+        self._stats = defaultdict(lambda: {'pages': 0, 'http': 0, 'not_modified': 0, 'browser': 0,
+                                           'seconds': 0.0})
+
+    def session(self, host):
+        if host not in self._sessions:
+            s = requests.Session()
+            s.headers['User-Agent'] = USER_AGENT
+            s.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=self.browsers + 4))
+            s.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=self.browsers + 4))
+            self._sessions[host] = s
+        return self._sessions[host]
+
+    def _complete(self, host, html):
+        markers = self.markers.get(host)
+        return not markers or any(m in html for m in markers)
+
+    def _wait_turn(self, host):
+        if self.min_delay:
+            wait = self._last.get(host, 0) + self.min_delay - time.time()
+            if wait > 0:
+                time.sleep(wait)
+        self._last[host] = time.time()
+
+    def _get_http(self, url, host, headers=None):
+        r = self.session(host).get(url, headers=headers, timeout=self.timeout)
+        r.raise_for_status()
+        return r
+
+    def _get_driver(self):
+        if self._drivers.empty() and self._created < self.browsers:
+            if self.driver_factory is None:
+                raise RuntimeError("page needs a browser but no driver_factory was given")
+            self._created += 1
+            return self.driver_factory()
+        return self._drivers.get()
+
+    def _accept_cookies(self, driver, host):
+        key = (id(driver), host)
+        selector = self.consent_buttons.get(host)
+        if key in self._consented or not selector:
+            return
+        self._consented.add(key)
+        try:
+            driver.find_element_by_css_selector(selector).click()
+        except Exception:
+            return
+        # share the consent with the plain HTTP session of this host
+        for c in driver.get_cookies():
+            self.session(host).cookies.set(c['name'], c['value'], domain=c.get('domain'), path=c.get('path', '/'))
+
+    def _get_browser(self, url, host):
+        driver = self._get_driver()
+        try:
+            driver.get(url)
+            self._accept_cookies(driver, host)
+            return driver.page_source
+        finally:
+            self._drivers.put(driver)
+
+    def fetch(self, url):
+        return self._fetch(url)[0]
+
+    def fetch_if_changed(self, url, etag=None, last_modified=None):
+        # conditional GET with the validators of the previous crawl. Returns (None, validators)
+        # when the server answers 304 Not Modified, else (html, validators of this response);
+        # pages rendered in the browser come without validators and are compared by hash instead
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return self._fetch(url, headers)
+
+    def _fetch(self, url, headers=None):
+        host = host_of(url)
+        self._wait_turn(host)
+        stats = self._stats[host]
+        t = time.perf_counter()
+        try:
+            if host not in self.browser_hosts:
+                try:
+                    r = self._get_http(url, host, headers)
+                    validators = {'etag': r.headers.get('ETag'), 'last_modified': r.headers.get('Last-Modified')}
+                    if r.status_code == 304:
+                        stats['not_modified'] += 1
+                        return None, validators
+                    html = r.text
+                    if self._complete(host, html):
+                        stats['http'] += 1
+                        return html, validators
+                except requests.RequestException:
+                    html = None
+                if self.driver_factory is None:
+                    # nothing better available, hand back what plain HTTP gave us
+                    stats['http'] += 1
+                    return html or "", {}
+
+            html = self._get_browser(url, host)
+            stats['browser'] += 1
+            if host not in self.browser_hosts and self._complete(host, html):
+                # rendered in the browser only, after a few of those skip plain HTTP for this host
+                self._js_only[host] += 1
+                if self._js_only[host] >= self.switch_after:
+                    self.browser_hosts.add(host)
+            return html, {}
+        finally:
+            stats['pages'] += 1
+            stats['seconds'] += time.perf_counter() - t
+
+    def stats(self):
+        return {host: dict(s, pages_per_sec=s['pages'] / s['seconds'] if s['seconds'] else 0.0)
+                for host, s in self._stats.items()}
+
+    def report(self):
+        for host, s in sorted(self.stats().items()):
+            print("{:<28} {:>6} pages ({} http, {} not modified, {} browser) {:6.2f} pages/s".format(
+                host, s['pages'], s['http'], s['not_modified'], s['browser'], s['pages_per_sec']))
+
+    def close(self):
+        while not self._drivers.empty():
+            self._drivers.get().quit()
+        for s in self._sessions.values():
+            s.close()
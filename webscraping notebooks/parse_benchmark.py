@@ -0,0 +1,149 @@
+"""Compare parsing.py against the BeautifulSoup(..., 'html.parser') code of the notebooks.
+
+Runs both engines over the saved pages listed in fixtures/manifest.json, fails if the extracted
+links or text differ and prints the parse time per page for each engine.
+
+    python parse_benchmark.py --fixtures fixtures -n 20
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import namedtuple
+
+from bs4 import BeautifulSoup
+
+import parsing
+
+# Website definitions of 01_linkscraping.ipynb, only the fields the parsers look at
+Website = namedtuple('Website', 'name list_class unit_class next_button_class')
+NBK_UNIT = 'nbk-block nbk-px-1 nbk-py-2 hover:nbk-bg-gray-100'
+NBK_NEXT = ('nbk-flex nbk-items-center nbk-justify-center nbk-bg-red-700 nbk-border-none nbk-p-2 nbk-rounded '
+            'nbk-cursor-pointer nbk-text-white nbk-font-medium nbk-appearance-none hover:nbk-bg-red-800 '
+            'active:nbk-bg-red-800 focus:nbk-outline-none focus:nbk-shadow-none')
+WEBSITES = {
+    'hwg': Website('hwg', '', '', ''),
+    'wr': Website('wr', '', '', ''),
+    'nbk': Website('nbk_b', 'nbk-block hover:nbk-text-primary', NBK_UNIT, NBK_NEXT),
+}
+
+
+# reference: the selectors of Website.get_hl
+def bs4_links(website, page_html):
+    soup = BeautifulSoup(page_html, 'html.parser')
+    if website.name == 'wr':
+        listings = soup.find_all("a", string="Zum Projekt")
+    elif website.name == 'hwg':
+        listings = soup.select('a[href*="/wohnungsbau/neubauprojekte/"]')
+    else:
+        listings = soup.find_all("a", class_=website.list_class)
+
+    units = None
+    start = soup.find("div", class_="objUnits")
+    if start is not None and website.unit_class:
+        units = [row['href'] for row in start.find_all_next("a", class_=website.unit_class)]
+
+    next_links = []
+    if website.next_button_class:
+        next_links = [row['href'] for row in soup.find_all("a", class_=website.next_button_class)]
+    return [row['href'] for row in listings], units, next_links
+
+
+def lxml_links(website, page_html):
+    parser = parsing.ListingParser(website)
+    doc = parsing.parse(page_html)
+    return parser.listing_links(doc), parser.unit_links(doc), parser.next_links(doc)
+
+
+# reference: text_from_html of 02_textscraping.ipynb without the page fetch
+def bs4_text(url, page_html):
+    soup = BeautifulSoup(page_html, 'html.parser')
+    texts = ""
+
+    if "howoge" in url:
+        try:
+            start = soup.find(string="Daten und Fakten").find_all_next("tr")
+            texts = u" ".join(t.getText().strip() for t in start)
+        except AttributeError:
+            pass
+
+    if "neubaukompass" in url:
+        if "wohneinheit" in url:
+            start = soup.find("h1")
+        else:
+            start = soup.find(string="Projektdetails")
+
+        if start is not None:
+            cont = start.find_all_next(["span", "a"])
+            texts = u" ".join(t.getText().strip() for t in cont)
+            end = re.compile(r'[aA-zZ-]*ID.*', re.DOTALL)
+            texts = re.sub(end, '', texts)
+
+            merkmale = soup.find_all("div", class_="py-1 desktop-width nbk-text-sm")
+            if merkmale:
+                texts = texts + u" ".join(t.getText().strip() for t in merkmale)
+
+    if "wuestenrot" in url:
+        try:
+            head = soup.find("div", class_="headlineContainer").getText().strip()
+            start = soup.find("div", class_="headlineContainer").find_all_next("div", class_="textContainer")
+            texts = head + u" ".join(t.getText().strip() for t in start)
+        except AttributeError:
+            pass
+
+    texts = re.sub('\t', ' ', texts)
+    texts = re.sub('\n', ' ', texts)
+    texts = re.sub(' +', ' ', texts)
+    return texts
+
+
+def timed(func, args, n):
+    t = time.perf_counter()
+    for _ in range(n):
+        result = func(*args)
+    return result, (time.perf_counter() - t) / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures"))
+    parser.add_argument("-n", type=int, default=10, help="parses per page and engine")
+    args = parser.parse_args()
+
+    with open(os.path.join(args.fixtures, "manifest.json")) as f:
+        manifest = json.load(f)
+
+    mismatches = []
+    totals = [0.0, 0.0]
+    print("{:<28} {:>10} {:>10} {:>8}".format("page", "bs4 ms", "lxml ms", "speedup"))
+    for name, page in sorted(manifest.items()):
+        with open(os.path.join(args.fixtures, name), encoding="utf-8") as f:
+            page_html = f.read()
+
+        kind = page['kind']
+        if kind.startswith("listing:"):
+            website = WEBSITES[kind.split(":", 1)[1]]
+            expected, t_bs4 = timed(bs4_links, (website, page_html), args.n)
+            got, t_lxml = timed(lxml_links, (website, page_html), args.n)
+        else:
+            expected, t_bs4 = timed(bs4_text, (page['url'], page_html), args.n)
+            got, t_lxml = timed(parsing.extract_text, (page['url'], page_html), args.n)
+
+        if got != expected:
+            mismatches.append(name)
+        totals[0] += t_bs4
+        totals[1] += t_lxml
+        print("{:<28} {:10.2f} {:10.2f} {:7.1f}x{}".format(name, t_bs4 * 1000, t_lxml * 1000, t_bs4 / t_lxml,
+                                                          "" if got == expected else "  MISMATCH"))
+
+    print("{:<28} {:10.2f} {:10.2f} {:7.1f}x".format("total", totals[0] * 1000, totals[1] * 1000,
+                                                     totals[0] / totals[1]))
+    if mismatches:
+        print("output differs from the BeautifulSoup reference:", ", ".join(mismatches))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import re
+
+from lxml import etree
+from lxml import html as lxml_html
+
+# lxml based parsing for the scrapers. The selectors that Website.get_hl and text_from_html
+# used to evaluate with BeautifulSoup(..., 'html.parser') on every page are compiled once to
+# XPath here; parse_benchmark.py checks on saved pages that the extracted text is identical.
+
+
+def _has_class(cls):
+    # bs4's class_= matches the whole attribute when the value contains spaces, else one token
+    if ' ' in cls:
+        return "@class='{}'".format(cls)
+    return "contains(concat(' ', normalize-space(@class), ' '), ' {} ')".format(cls)
+
+
+def _following(xpath):
+    # bs4's find_all_next: everything after the start in document order, descendants included
+    return etree.XPath("descendant::{0} | following::{0}".format(xpath))
+
+
+def parse(page_html):
+    if not page_html:
+        return None
+    return lxml_html.document_fromstring(page_html)
+
+
+def text_of(el):
+    return el.text_content().strip()
+
+
+class ListingParser:
+    # link extraction for one Website definition (hwg, wr or a neubaukompass region)
+
+    def __init__(self, website):
+        self.website = website
+        if website.name == 'wr':
+            self.listings = etree.XPath("//a[string(.)='Zum Projekt']/@href")
+        elif website.name == 'hwg':
+            self.listings = etree.XPath("//a[contains(@href, '/wohnungsbau/neubauprojekte/')]/@href")
+        else:
+            self.listings = etree.XPath("//a[{}]/@href".format(_has_class(website.list_class)))
+
+        self.units_start = etree.XPath("(//div[{}])[1]".format(_has_class("objUnits")))
+        self.units = _following("a[{}]/@href".format(_has_class(website.unit_class))) if website.unit_class else None
+        self.next_buttons = etree.XPath("//a[{}]/@href".format(_has_class(website.next_button_class))) \
+            if website.next_button_class else None
+
+    def listing_links(self, doc):
+        return [str(h) for h in self.listings(doc)]
+
+    def unit_links(self, doc):
+        # None when the project page has no unit list
+        start = self.units_start(doc)
+        if not start or self.units is None:
+            return None
+        return [str(h) for h in self.units(start[0])]
+
+    def next_links(self, doc):
+        return [str(h) for h in self.next_buttons(doc)] if self.next_buttons is not None else []
+
+
+# detail pages (text_from_html)
+_first_h1 = etree.XPath("(//h1)[1]")
+_text_start = {
+    'howoge': etree.XPath("(//*[text()='Daten und Fakten'])[1]"),
+    'neubaukompass': etree.XPath("(//*[text()='Projektdetails'])[1]"),
+}
+_hwg_rows = _following("tr")
+_nbk_content = _following("*[self::span or self::a]")
+_nbk_merkmale = etree.XPath("//div[{}]".format(_has_class("py-1 desktop-width nbk-text-sm")))
+_wr_head = etree.XPath("(//div[{}])[1]".format(_has_class("headlineContainer")))
+_wr_text = _following("div[{}]".format(_has_class("textContainer")))
+_nbk_end = re.compile(r'[aA-zZ-]*ID.*', re.DOTALL)
+
+
+def extract_text(url, page_html):
+    doc = parse(page_html)
+    texts = ""
+    if doc is None:
+        return texts
+
+    if "howoge" in url:
+        start = _text_start['howoge'](doc)
+        if start:
+            texts = u" ".join(text_of(t) for t in _hwg_rows(start[0]))
+        else:
+            print(", Parsing Error for ", url)
+
+    if "neubaukompass" in url:
+        if "wohneinheit" in url:
+            start = _first_h1(doc)
+        else:
+            start = _text_start['neubaukompass'](doc)
+
+        if start:
+            texts = u" ".join(text_of(t) for t in _nbk_content(start[0]))
+            texts = re.sub(_nbk_end, '', texts)
+
+            merkmale = _nbk_merkmale(doc)
+            if merkmale:
+                texts = texts + u" ".join(text_of(t) for t in merkmale)
+            else:
+                print(", start not found for " + url)
+
+    if "wuestenrot" in url:
+        head = _wr_head(doc)
+        if head:
+            texts = text_of(head[0]) + u" ".join(text_of(t) for t in _wr_text(head[0]))
+        else:
+            print(", Parsing Error for ", url)
+
+    texts = re.sub('\t', ' ', texts)
+    texts = re.sub('\n', ' ', texts)
+    texts = re.sub(' +', ' ', texts)
+
+    return texts